@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+'''
+Benchmark suite for gym-copter environments and components
+
+Runs each benchmark in a fresh process, so that its import time and peak
+memory are its own, and reports rates (higher is better) and latencies and
+sizes (lower is better) as JSON:
+
+    python3 benchmarks/suite.py --save baseline.json
+    python3 benchmarks/suite.py --compare baseline.json --threshold 0.1
+
+With --compare, the exit status is 1 if any metric is worse than the
+baseline by more than the threshold fraction.  Renderers run headless,
+using the software rasterizer or matplotlib's Agg backend.
+
+Copyright (C) 2021 Simon D. Levy
+
+MIT License
+'''
+
+import argparse
+from argparse import ArgumentDefaultsHelpFormatter
+import importlib
+import json
+import multiprocessing as mp
+import platform
+import resource
+import sys
+from time import perf_counter
+
+import numpy as np
+
+
+def _envs(module, name, steps, resets, seed, **kwargs):
+
+    env = getattr(module, name)(**kwargs)
+    env.seed(seed)
+
+    rng = np.random.default_rng(seed)
+    actions = rng.uniform(-1, 1, (steps, env.action_space.shape[0]))
+
+    start = perf_counter()
+    for _ in range(resets):
+        env.reset()
+    reset_ms = 1000 * (perf_counter() - start) / resets
+
+    start = perf_counter()
+    for action in actions:
+        _, _, done, _ = env.step(action)
+        if done:
+            env.reset()
+    steps_per_sec = steps / (perf_counter() - start)
+
+    return {'steps_per_sec': steps_per_sec, 'reset_ms': reset_ms}
+
+
+def _sensor(module, name, steps, resets, seed, **kwargs):
+
+    from gym_copter.rendering.sinks import RingBufferSink
+
+    sensor = getattr(module, name)(sink=RingBufferSink(), **kwargs)
+
+    rng = np.random.default_rng(seed)
+
+    # Positions over the target and attitudes within a few degrees of level
+    poses = np.column_stack((rng.uniform(-1, 1, (steps, 2)),
+                             rng.uniform(2, 10, steps),
+                             rng.uniform(-5, 5, (steps, 3))))
+
+    start = perf_counter()
+    for pose in poses:
+        sensor.getImage(*pose)
+
+    return {'images_per_sec': steps / (perf_counter() - start)}
+
+
+def _pid(module, name, steps, resets, seed, **kwargs):
+
+    pid = getattr(module, name)(**kwargs)
+
+    rng = np.random.default_rng(seed)
+
+    # AngularVelocityPidController takes one value, the others two
+    args = [tuple(row) for row in
+            rng.uniform(-1, 1, (steps, 1 if 'Angular' in name else 2))]
+
+    start = perf_counter()
+    for arg in args:
+        pid.getDemand(*arg)
+
+    return {'demands_per_sec': steps / (perf_counter() - start)}
+
+
+def _renderer(module, name, steps, resets, seed, **kwargs):
+
+    from gym_copter.envs.lander2d import Lander2D
+    from gym_copter.envs.lander3d import Lander3D
+
+    if name == 'TwoDLanderRenderer':
+        env = Lander2D(render_backend='software')
+        env.reset()
+        viewer = module.TwoDLanderRenderer(env, 'software')
+        frame = (lambda: viewer.render('rgb_array', env.pose, env.spinning))
+
+    elif name == 'HUD':
+        env = Lander3D(render_backend='software')
+        env.reset()
+        frame = (lambda: env.viewer.render('rgb_array'))
+
+    else:
+        env = Lander3D(render_backend='software')
+        env.reset()
+        viewer = getattr(module, name)(env)
+
+        def frame():
+            viewer.display()
+            return viewer.render('rgb_array')
+
+    rng = np.random.default_rng(seed)
+    actions = rng.uniform(-1, 1, (steps, env.action_space.shape[0]))
+
+    elapsed = 0
+
+    for action in actions:
+
+        _, _, done, _ = env.step(action)
+
+        if done:
+            env.reset()
+
+        start = perf_counter()
+        frame()
+        elapsed += perf_counter() - start
+
+    return {'frames_per_sec': steps / elapsed}
+
+
+# Name: (function, module, class, steps, resets, keyword arguments)
+CASES = {
+    'Lander2D': (_envs, 'gym_copter.envs.lander2d', 'Lander2D',
+                 20000, 100, {'render_backend': 'software'}),
+    'Lander3D': (_envs, 'gym_copter.envs.lander3d', 'Lander3D',
+                 20000, 100, {'render_backend': 'software'}),
+    'Hover2D': (_envs, 'gym_copter.envs.hover2d', 'Hover2D',
+                20000, 100, {'render_backend': 'software'}),
+    'Hover3D': (_envs, 'gym_copter.envs.hover3d', 'Hover3D',
+                20000, 100, {}),
+    'LanderVisual': (_envs, 'gym_copter.envs.lander3d', 'LanderVisual',
+                     5000, 100, {'render_backend': 'software'}),
+    'LanderDVS': (_envs, 'gym_copter.envs.lander3d', 'LanderDVS',
+                  5000, 100, {'render_backend': 'software'}),
+    'VisionSensor': (_sensor, 'gym_copter.sensors.vision.vs', 'VisionSensor',
+                     5000, 0, {}),
+    'DVS': (_sensor, 'gym_copter.sensors.vision.dvs', 'DVS',
+            5000, 0, {}),
+    'AltitudeHoldPidController': (_pid, 'gym_copter.pidcontrollers',
+                                  'AltitudeHoldPidController',
+                                  100000, 0, {}),
+    'PositionHoldPidController': (_pid, 'gym_copter.pidcontrollers',
+                                  'PositionHoldPidController',
+                                  100000, 0, {}),
+    'AngularVelocityPidController': (_pid, 'gym_copter.pidcontrollers',
+                                     'AngularVelocityPidController',
+                                     100000, 0, {}),
+    'TwoDLanderRenderer': (_renderer, 'gym_copter.rendering.twod',
+                           'TwoDLanderRenderer', 500, 0, {}),
+    'HUD': (_renderer, 'gym_copter.rendering.hud', 'HUD', 500, 0, {}),
+    'ThreeDLanderRenderer': (_renderer, 'gym_copter.rendering.threed',
+                             'ThreeDLanderRenderer', 500, 0, {}),
+}
+
+
+def _run_case(args):
+
+    name, scale, seed = args
+
+    function, modname, classname, steps, resets, kwargs = CASES[name]
+
+    # Keep matplotlib offscreen before anything imports it
+    import matplotlib
+    matplotlib.use('Agg')
+
+    start = perf_counter()
+    module = importlib.import_module(modname)
+    import_ms = 1000 * (perf_counter() - start)
+
+    result = function(module,
+                      classname,
+                      max(1, int(steps * scale)),
+                      max(1, int(resets * scale)),
+                      seed,
+                      **kwargs)
+
+    result['import_ms'] = import_ms
+
+    # Linux reports maximum resident set size in kilobytes, macOS in bytes
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    result['peak_rss_mb'] = rss / (2**20 if sys.platform == 'darwin'
+                                   else 2**10)
+
+    return result
+
+
+def run(names, scale=1.0, seed=0):
+    '''
+    @param names names of cases to run
+    @param scale multiplier for the number of steps and resets
+    @param seed random seed
+    @return dictionary mapping case names to dictionaries of metrics
+    '''
+
+    ctx = mp.get_context('spawn')
+
+    results = {}
+
+    for name in names:
+
+        # One process per case, so that imports and memory start fresh
+        with ctx.Pool(1) as pool:
+            results[name] = pool.apply(_run_case, ((name, scale, seed),))
+
+    return results
+
+
+def _higher_is_better(metric):
+
+    return metric.endswith('_per_sec')
+
+
+def compare(results, baseline, threshold):
+    '''
+    @param results dictionary returned by run()
+    @param baseline dictionary returned by an earlier run()
+    @param threshold fraction by which a metric may worsen
+    @return list of (case, metric, baseline value, value, relative change)
+            for metrics that worsened by more than the threshold
+    '''
+
+    regressions = []
+
+    for name, metrics in results.items():
+
+        for metric, value in metrics.items():
+
+            old = baseline.get(name, {}).get(metric)
+
+            if not old:
+                continue
+
+            change = (value - old) / old
+
+            worse = -change if _higher_is_better(metric) else change
+
+            if worse > threshold:
+                regressions.append((name, metric, old, value, change))
+
+    return regressions
+
+
+def main():
+
+    parser = argparse.ArgumentParser(
+            formatter_class=ArgumentDefaultsHelpFormatter)
+
+    parser.add_argument('cases', metavar='CASE', nargs='*',
+                        help='Cases to run (default = all): ' +
+                        ', '.join(CASES))
+
+    parser.add_argument('--scale', type=float, default=1.0,
+                        help='Multiplier for number of steps and resets')
+
+    parser.add_argument('--seed', type=int, default=0,
+                        help='Random seed')
+
+    parser.add_argument('--save', required=False,
+                        help='Save results as JSON to this file')
+
+    parser.add_argument('--compare', required=False,
+                        help='Compare against results saved with --save')
+
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='Fraction by which a metric may worsen')
+
+    args = parser.parse_args()
+
+    for name in args.cases:
+        if name not in CASES:
+            parser.error('Unknown case %s' % name)
+
+    results = run(args.cases or list(CASES), args.scale, args.seed)
+
+    report = {'python': platform.python_version(),
+              'machine': platform.machine(),
+              'scale': args.scale,
+              'results': results}
+
+    print(json.dumps(report, indent=2))
+
+    if args.save is not None:
+        with open(args.save, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare is not None:
+
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+        regressions = compare(results, baseline['results'], args.threshold)
+
+        for name, metric, old, value, change in regressions:
+            print('REGRESSION %s %s: %.4g -> %.4g (%+.1f%%)' %
+                  (name, metric, old, value, 100 * change), file=sys.stderr)
+
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+'''
+Frames-per-second benchmark for ThreeDLanderRenderer
+
+Flies a Lander3D episode with random actions and times each rendered frame,
+both with blitting over the cached background and with a full redraw per
+frame (the old behavior).  Runs offscreen using matplotlib's Agg backend.
+
+Copyright (C) 2021 Simon D. Levy
+
+MIT License
+'''
+
+import argparse
+from time import perf_counter
+
+import numpy as np
+import matplotlib
+matplotlib.use('Agg')
+
+from gym_copter.envs.lander3d import Lander3D  # noqa: E402
+from gym_copter.rendering.threed import ThreeDLanderRenderer  # noqa: E402
+
+
+def _full_redraw(renderer):
+
+    canvas = renderer.fig.canvas
+    canvas.draw()
+    for artist in renderer.copter.artists():
+        renderer.axes.draw_artist(artist)
+
+    return np.asarray(canvas.buffer_rgba())[:, :, :3].copy()
+
+
+def run(frames, capture, seed=None):
+    '''
+    @param frames number of frames to render
+    @param capture function taking the renderer and returning a frame
+    @param seed random seed
+    @return frames per second
+    '''
+
+    env = Lander3D(render_backend='software')
+    env.seed(seed)
+    env.reset()
+
+    renderer = ThreeDLanderRenderer(env)
+
+    rng = np.random.default_rng(seed)
+
+    elapsed = 0
+
+    for _ in range(frames):
+
+        _, _, done, _ = env.step(rng.uniform(-1, 1, 4))
+
+        if done:
+            env.reset()
+
+        start = perf_counter()
+        renderer.copter.update(env.pose)
+        capture(renderer)
+        elapsed += perf_counter() - start
+
+    return frames / elapsed
+
+
+def main():
+
+    parser = argparse.ArgumentParser(
+            formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+
+    parser.add_argument('--frames', type=int, default=200,
+                        help='Number of frames to render')
+    parser.add_argument('--seed', type=int, default=None,
+                        help='Random seed')
+
+    args = parser.parse_args()
+
+    blit = run(args.frames, lambda r: r.render('rgb_array'), args.seed)
+    full = run(args.frames, _full_redraw, args.seed)
+
+    print('Blitted:     %6.1f frames/sec' % blit)
+    print('Full redraw: %6.1f frames/sec' % full)
+
+
+if __name__ == '__main__':
+    main()
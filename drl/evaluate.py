@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+'''
+Ranks saved Lander3D actor checkpoints by mean episode reward
+
+Each checkpoint is flown for many episodes at once on a VectorLander3D,
+with the same seed for every checkpoint so that they are compared on the
+same initial conditions:
+
+    python3 evaluate.py models/gym_copter:Lander3D-v0/*.dat --episodes 100
+
+Copyright (C) 2021 Simon D. Levy
+
+MIT License
+'''
+
+import argparse
+from argparse import ArgumentDefaultsHelpFormatter
+import json
+from time import time
+
+import torch
+
+from ac_gym import model
+from ac_gym.td3 import TD3
+
+from gym_copter.envs.vector import VectorLander3D
+from gym_copter.policies.harness import evaluate, summarize
+
+
+def load_actor(filename, obs_size, act_size):
+
+    parts, env_name, nhid = torch.load(open(filename, 'rb'))
+
+    if env_name != 'gym_copter:Lander3D-v0':
+        raise ValueError('%s was trained on %s, not Lander3D-v0' %
+                         (filename, env_name))
+
+    # We use different networks for TD3 vs. other algorithms
+    if 'td3' in filename:
+        policy = TD3(obs_size, act_size, 1.0, nhid)
+        policy.set(parts)
+        net = policy.actor
+
+    else:
+        net = model.ModelActor(obs_size, act_size, nhid)
+        net.load_state_dict(parts)
+
+    net.eval()
+
+    return net
+
+
+def main():
+
+    parser = argparse.ArgumentParser(
+            formatter_class=ArgumentDefaultsHelpFormatter)
+
+    parser.add_argument('filenames', metavar='FILENAME', nargs='+',
+                        help='checkpoint files')
+
+    parser.add_argument('--episodes', type=int, default=100,
+                        help='Episodes per checkpoint, run at once')
+
+    parser.add_argument('--seed', type=int, default=0,
+                        help='Random seed, shared by all checkpoints')
+
+    parser.add_argument('--confidence', type=float, default=0.95,
+                        help='Level of confidence interval for mean')
+
+    parser.add_argument('--json', required=False,
+                        help='Save results as JSON to this file')
+
+    args = parser.parse_args()
+
+    # Just for the observation and action sizes
+    space = VectorLander3D(1)
+    obs_size = space.observation_space.shape[0]
+    act_size = space.action_space.shape[0]
+
+    results = {}
+
+    start = time()
+
+    for filename in args.filenames:
+
+        try:
+            net = load_actor(filename, obs_size, act_size)
+
+        except ValueError as err:
+            print(err)
+            continue
+
+        results[filename] = summarize(evaluate(net,
+                                               episodes=args.episodes,
+                                               seed=args.seed),
+                                      args.confidence)
+
+    ranked = sorted(results.items(), key=lambda item: -item[1]['mean'])
+
+    for filename, result in ranked:
+        print('%+9.3f  [%+9.3f, %+9.3f]  %s' % (result['mean'],
+                                                result['ci_low'],
+                                                result['ci_high'],
+                                                filename))
+
+    print('%d checkpoints X %d episodes in %3.2f sec' %
+          (len(results), args.episodes, time() - start))
+
+    if args.json is not None:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+'''
+Exports saved actor checkpoints to NumPy weight files for torch-free
+inference with gym_copter.policies.numpy_mlp.MLPPolicy:
+
+    python3 export.py models/gym_copter:Lander3D-v0/<fitness>.dat
+
+writes <fitness>.npz next to each checkpoint.
+
+Copyright (C) 2021 Simon D. Levy
+
+MIT License
+'''
+
+import argparse
+from argparse import ArgumentDefaultsHelpFormatter
+import os
+
+import torch
+
+import gym
+
+from ac_gym import model
+from ac_gym.td3 import TD3
+
+from gym_copter.policies.numpy_mlp import export
+
+
+def load_actor(filename, parts, env_name, nhid):
+    '''
+    @return actor network, hidden activation, output scale
+    '''
+
+    # Make a gym environment from the name, just for its spaces
+    env = gym.make(env_name)
+    obs_size = env.observation_space.shape[0]
+    act_size = env.action_space.shape[0]
+    max_action = float(env.action_space.high[0])
+    env.close()
+
+    # We use different networks for TD3 vs. other algorithms
+    if 'td3' in filename:
+        policy = TD3(obs_size, act_size, max_action, nhid)
+        policy.set(parts)
+        return policy.actor, 'relu', max_action
+
+    net = model.ModelActor(obs_size, act_size, nhid)
+    net.load_state_dict(parts)
+    return net, 'tanh', 1.0
+
+
+def main():
+
+    parser = argparse.ArgumentParser(
+            formatter_class=ArgumentDefaultsHelpFormatter)
+
+    parser.add_argument('filenames', metavar='FILENAME', nargs='+',
+                        help='checkpoint files')
+
+    parser.add_argument('--outdir', required=False,
+                        help='Directory for .npz files (default = same as '
+                             'checkpoint)')
+
+    args = parser.parse_args()
+
+    for filename in args.filenames:
+
+        parts, env_name, nhid = torch.load(open(filename, 'rb'))
+
+        net, hidden, scale = load_actor(filename, parts, env_name, nhid)
+
+        base = os.path.splitext(filename)[0] + '.npz'
+        outfile = (base if args.outdir is None
+                   else os.path.join(args.outdir, os.path.basename(base)))
+
+        layers = export(net.state_dict(), outfile, hidden=hidden,
+                        scale=scale)
+
+        print('%s (%s): %d layers -> %s' % (filename, env_name, layers,
+                                            outfile))
+
+
+if __name__ == '__main__':
+    main()
@@ -19,3 +19,10 @@ register(
     entry_point='gym_copter.envs:Lander3D',
     max_episode_steps=400
 )
+
+# Swarm of 3D copters; episodes end inside the env, since steps return one
+# done flag per copter
+register(
+    id='Swarm3D-v0',
+    entry_point='gym_copter.envs:Swarm3D'
+)
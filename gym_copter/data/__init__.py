@@ -0,0 +1,5 @@
+'''
+Copyright (C) 2021 Simon D. Levy
+
+MIT License
+'''
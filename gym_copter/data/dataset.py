@@ -0,0 +1,263 @@
+'''
+Sharded transition store for offline RL
+
+DatasetWriter appends transitions (observation, action, reward, next
+observation, done) to fixed-size shards of memory-mapped .npy files and
+keeps an index of episodes.  DatasetReader memory-maps the shards for
+O(1) random minibatch sampling; each process opens its own maps, so
+readers can be shared across DataLoader workers or a multiprocessing pool.
+
+Layout of a dataset directory:
+
+    dataset.json                    sizes, shard size, rows per shard
+    episodes.npy                    (first row, length) of each episode
+    shard-00000/observations.npy    shard_size X observation size
+    shard-00000/actions.npy         shard_size X action size
+    shard-00000/rewards.npy         shard_size
+    shard-00000/next_observations.npy
+    shard-00000/dones.npy           shard_size
+
+Copyright (C) 2021 Simon D. Levy
+
+MIT License
+'''
+
+import json
+import os
+
+import numpy as np
+
+FIELDS = ('observations', 'actions', 'rewards', 'next_observations', 'dones')
+
+
+def _shard_dir(directory, shard):
+
+    return os.path.join(directory, 'shard-%05d' % shard)
+
+
+def _shard_path(directory, shard, field):
+
+    return os.path.join(_shard_dir(directory, shard), field + '.npy')
+
+
+class DatasetWriter:
+
+    def __init__(self, directory, observation_size, action_size,
+                 shard_size=1000000):
+        '''
+        @param directory new or empty directory for the dataset
+        @param observation_size length of each observation
+        @param action_size length of each action
+        @param shard_size transitions per shard
+        '''
+
+        os.makedirs(directory, exist_ok=True)
+
+        if os.path.exists(os.path.join(directory, 'dataset.json')):
+            raise ValueError('%s already holds a dataset' % directory)
+
+        self.directory = directory
+        self.observation_size = observation_size
+        self.action_size = action_size
+        self.shard_size = shard_size
+
+        self.shapes = {'observations': (observation_size,),
+                       'actions': (action_size,),
+                       'rewards': (),
+                       'next_observations': (observation_size,),
+                       'dones': ()}
+
+        self.dtypes = {'observations': np.float32,
+                       'actions': np.float32,
+                       'rewards': np.float32,
+                       'next_observations': np.float32,
+                       'dones': np.bool_}
+
+        self.rows = []        # rows written to each shard
+        self.episodes = []    # (first row, length)
+        self.episode_start = 0
+        self.count = 0
+
+        self.arrays = None
+
+    def append(self, observation, action, reward, next_observation, done):
+
+        if self.arrays is None or self.rows[-1] == self.shard_size:
+            self._open_shard()
+
+        k = self.rows[-1]
+
+        self.arrays['observations'][k] = observation
+        self.arrays['actions'][k] = action
+        self.arrays['rewards'][k] = reward
+        self.arrays['next_observations'][k] = next_observation
+        self.arrays['dones'][k] = done
+
+        self.rows[-1] += 1
+        self.count += 1
+
+        if done:
+            self.end_episode()
+
+    def end_episode(self):
+        '''
+        Ends the current episode without a terminal transition (e.g., on a
+        time limit).  Called automatically when done is True.
+        '''
+
+        if self.count > self.episode_start:
+            self.episodes.append((self.episode_start,
+                                  self.count - self.episode_start))
+            self.episode_start = self.count
+
+    def close(self):
+
+        self.end_episode()
+
+        self._close_shard()
+
+        self._save_metadata()
+
+    def _open_shard(self):
+
+        self._close_shard()
+
+        shard = len(self.rows)
+
+        os.makedirs(_shard_dir(self.directory, shard))
+
+        self.arrays = {field:
+                       np.lib.format.open_memmap(
+                           _shard_path(self.directory, shard, field),
+                           mode='w+',
+                           dtype=self.dtypes[field],
+                           shape=(self.shard_size,) + self.shapes[field])
+                       for field in FIELDS}
+
+        self.rows.append(0)
+
+        # Keep metadata and the episode index current, so that a crash
+        # loses at most the transitions in this shard and the episodes
+        # ending there
+        self._save_metadata()
+
+    def _close_shard(self):
+
+        if self.arrays is not None:
+            for array in self.arrays.values():
+                array.flush()
+            self.arrays = None
+
+    def _save_metadata(self):
+
+        np.save(os.path.join(self.directory, 'episodes.npy'),
+                np.array(self.episodes, dtype=np.int64).reshape(-1, 2))
+
+        with open(os.path.join(self.directory, 'dataset.json'), 'w') as f:
+            json.dump({'observation_size': self.observation_size,
+                       'action_size': self.action_size,
+                       'shard_size': self.shard_size,
+                       'rows': self.rows}, f)
+
+
+class DatasetReader:
+
+    def __init__(self, directory):
+        '''
+        @param directory directory written by DatasetWriter
+        '''
+
+        self.directory = directory
+
+        with open(os.path.join(directory, 'dataset.json')) as f:
+            meta = json.load(f)
+
+        self.observation_size = meta['observation_size']
+        self.action_size = meta['action_size']
+        self.shard_size = meta['shard_size']
+        self.rows = meta['rows']
+
+        # Every shard but the last is full, so row k lives in shard
+        # k // shard_size
+        self.count = sum(self.rows)
+        if any(n != self.shard_size for n in self.rows[:-1]):
+            raise ValueError('%s has a partial shard before the last' %
+                             directory)
+
+        episodes = os.path.join(directory, 'episodes.npy')
+        self.episodes = (np.load(episodes)
+                         if os.path.exists(episodes)
+                         else np.zeros((0, 2), dtype=np.int64))
+
+        self._maps = None
+        self._pid = None
+
+    def __len__(self):
+
+        return self.count
+
+    def sample(self, batch_size, rng=np.random):
+        '''
+        @param batch_size number of transitions
+        @param rng random generator (np.random.Generator or module)
+        @return dictionary of arrays, one per field
+        '''
+
+        integers = getattr(rng, 'integers', None) or rng.randint
+
+        return self.get(integers(0, self.count, batch_size))
+
+    def get(self, indices):
+        '''
+        @param indices global transition indices
+        @return dictionary of arrays, one per field
+        '''
+
+        indices = np.asarray(indices, dtype=np.int64)
+
+        shards = indices // self.shard_size
+        rows = indices % self.shard_size
+
+        maps = self._get_maps()
+
+        batch = {field: np.empty((len(indices),) + maps[0][field].shape[1:],
+                                 dtype=maps[0][field].dtype)
+                 for field in FIELDS}
+
+        for shard in np.unique(shards):
+            mask = shards == shard
+            for field in FIELDS:
+                batch[field][mask] = maps[shard][field][rows[mask]]
+
+        return batch
+
+    def episode(self, k):
+        '''
+        @return dictionary of arrays for the k-th episode
+        '''
+
+        start, length = self.episodes[k]
+
+        return self.get(np.arange(start, start + length))
+
+    def _get_maps(self):
+
+        # Memory maps are opened per process, so readers survive fork
+        if self._maps is None or self._pid != os.getpid():
+            self._maps = [{field: np.load(_shard_path(self.directory,
+                                                      shard,
+                                                      field),
+                                          mmap_mode='r')
+                           for field in FIELDS}
+                          for shard in range(len(self.rows))]
+            self._pid = os.getpid()
+
+        return self._maps
+
+    def __getstate__(self):
+
+        # Send only paths and metadata to other processes
+        state = self.__dict__.copy()
+        state['_maps'] = None
+        state['_pid'] = None
+        return state
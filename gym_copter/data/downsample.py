@@ -0,0 +1,108 @@
+'''
+Downsampling long time series for plotting
+
+Both methods return the indices of the samples to keep, so that they work
+on memory-mapped columns without copying them, touching one bucket of rows
+at a time.
+
+Copyright (C) 2021 Simon D. Levy
+
+MIT License
+'''
+
+import numpy as np
+
+METHODS = ('minmax', 'lttb', 'none')
+
+
+def downsample(t, y, points, method='minmax'):
+    '''
+    @param t times
+    @param y values
+    @param points approximate number of points to keep
+    @param method 'minmax', 'lttb', or 'none'
+    @return indices of kept points, in time order
+    '''
+
+    if method == 'minmax':
+        return minmax(y, points)
+
+    if method == 'lttb':
+        return lttb(t, y, points)
+
+    if method == 'none':
+        return np.arange(len(y))
+
+    raise ValueError('Downsampling method must be one of %s' % (METHODS,))
+
+
+def _edges(n, buckets):
+
+    return np.linspace(0, n, buckets+1).astype(int)
+
+
+def minmax(y, points):
+    '''
+    Keeps the minimum and maximum of each of points/2 equal buckets, which
+    preserves the visible envelope of the signal
+    '''
+
+    n = len(y)
+
+    if n <= points:
+        return np.arange(n)
+
+    edges = _edges(n, points // 2)
+
+    indices = np.empty((len(edges)-1, 2), dtype=np.int64)
+
+    for k, (start, stop) in enumerate(zip(edges[:-1], edges[1:])):
+        bucket = y[start:stop]
+        indices[k] = start + np.argmin(bucket), start + np.argmax(bucket)
+
+    indices.sort(axis=1)
+
+    return indices.ravel()
+
+
+def lttb(t, y, points):
+    '''
+    Largest-Triangle-Three-Buckets (Steinarsson 2013): keeps the first and
+    last points and, from each bucket in between, the point forming the
+    largest triangle with the previously kept point and the average of the
+    next bucket
+    '''
+
+    n = len(y)
+
+    if n <= points or points < 3:
+        return np.arange(n)
+
+    edges = 1 + _edges(n-2, points-2)
+
+    indices = np.empty(points, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = n-1
+
+    a = 0
+
+    for k in range(points-2):
+
+        start, stop = edges[k], edges[k+1]
+
+        # Average of next bucket (or last point)
+        nstart, nstop = ((edges[k+1], edges[k+2])
+                         if k < points-3
+                         else (n-1, n))
+        tc = np.mean(t[nstart:nstop])
+        yc = np.mean(y[nstart:nstop])
+
+        ta, ya = t[a], y[a]
+
+        area = np.abs((ta - tc) * (y[start:stop] - ya) -
+                      (ta - t[start:stop]) * (yc - ya))
+
+        a = start + np.argmax(area)
+        indices[k+1] = a
+
+    return indices
@@ -0,0 +1,155 @@
+'''
+Streaming quantile estimation
+
+P2Quantiles tracks several quantiles of every element of an array (e.g.,
+each point of a common time grid) over a stream of arrays, using the P²
+algorithm: five markers per quantile and element, so memory stays fixed
+however many arrays are seen.
+
+    @article{10.1145/4372.4378,
+      author  = {Jain, Raj and Chlamtac, Imrich},
+      title   = {The P2 Algorithm for Dynamic Calculation of Quantiles and
+                 Histograms without Storing Observations},
+      journal = {Communications of the ACM},
+      volume  = {28},
+      number  = {10},
+      pages   = {1076--1085},
+      year    = {1985}
+    }
+
+Copyright (C) 2021 Simon D. Levy
+
+MIT License
+'''
+
+import warnings
+
+import numpy as np
+
+
+class P2Quantiles:
+
+    def __init__(self, probs, shape):
+        '''
+        @param probs quantiles to track, each in (0, 1)
+        @param shape shape of each observed array
+        '''
+
+        self.probs = np.asarray(probs, dtype=float)
+        self.shape = tuple(np.atleast_1d(shape))
+
+        q = len(self.probs)
+        g = int(np.prod(self.shape))
+
+        # Number of observations seen by each element
+        self.count = np.zeros(g, dtype=np.int64)
+
+        # First five observations, before the markers are set up
+        self.first = np.full((g, 5), np.nan)
+
+        # Marker heights, actual and desired positions, position increments
+        p = self.probs[:, None, None]
+        self.heights = np.zeros((q, g, 5))
+        self.positions = np.tile(np.arange(1., 6.), (q, g, 1))
+        self.desired = np.concatenate((np.ones((q, g, 1)),
+                                       np.broadcast_to(1 + 2*p, (q, g, 1)),
+                                       np.broadcast_to(1 + 4*p, (q, g, 1)),
+                                       np.broadcast_to(3 + 2*p, (q, g, 1)),
+                                       np.full((q, g, 1), 5.)), axis=2)
+        self.increments = np.concatenate((np.zeros((q, 1, 1)),
+                                          p/2, p, (1+p)/2,
+                                          np.ones((q, 1, 1))), axis=2)
+
+    def update(self, x):
+        '''
+        @param x array of observations; NaN elements are skipped
+        '''
+
+        x = np.asarray(x, dtype=float).ravel()
+
+        valid = np.isfinite(x)
+
+        # Collect the first five observations of each element
+        early = valid & (self.count < 5)
+        if np.any(early):
+            self.first[early, self.count[early]] = x[early]
+            self.count[early] += 1
+            ready = early & (self.count == 5)
+            if np.any(ready):
+                self.heights[:, ready] = np.sort(self.first[ready], axis=1)
+
+        late = valid & ~early & (self.count >= 5)
+        if np.any(late):
+            self._update(late, x[late])
+            self.count[late] += 1
+
+    def quantiles(self):
+        '''
+        @return array of shape (len(probs),) + shape, NaN where nothing has
+                been observed
+        '''
+
+        result = self.heights[:, :, 2].copy()
+
+        # Too few observations for markers: use them directly
+        few = self.count < 5
+        if np.any(few):
+
+            # Elements with no observations yield NaN
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', RuntimeWarning)
+                result[:, few] = np.nanquantile(self.first[few],
+                                                self.probs,
+                                                axis=1)
+
+        return result.reshape((len(self.probs),) + self.shape)
+
+    def _update(self, mask, x):
+
+        q = self.heights[:, mask]
+        n = self.positions[:, mask]
+        d = self.desired[:, mask]
+
+        # Extend the extreme markers and find the cell containing x
+        q[:, :, 0] = np.minimum(q[:, :, 0], x)
+        q[:, :, 4] = np.maximum(q[:, :, 4], x)
+        k = np.sum(q[:, :, 1:4] <= x[None, :, None], axis=2)
+
+        # Increment positions of markers above x
+        n += np.arange(5) > k[:, :, None]
+
+        d += self.increments
+
+        # Adjust the middle markers if they are off their desired positions
+        for i in (1, 2, 3):
+
+            delta = d[:, :, i] - n[:, :, i]
+
+            move = (((delta >= 1) & (n[:, :, i+1] - n[:, :, i] > 1)) |
+                    ((delta <= -1) & (n[:, :, i-1] - n[:, :, i] < -1)))
+
+            s = np.sign(delta)
+
+            qi, qlo, qhi = q[:, :, i], q[:, :, i-1], q[:, :, i+1]
+            ni, nlo, nhi = n[:, :, i], n[:, :, i-1], n[:, :, i+1]
+
+            with np.errstate(divide='ignore', invalid='ignore'):
+
+                parabolic = qi + s / (nhi - nlo) * (
+                        (ni - nlo + s) * (qhi - qi) / (nhi - ni) +
+                        (nhi - ni - s) * (qi - qlo) / (ni - nlo))
+
+                qn = np.where(s > 0, qhi, qlo)
+                nn = np.where(s > 0, nhi, nlo)
+                linear = qi + s * (qn - qi) / (nn - ni)
+
+            adjusted = np.where((qlo < parabolic) & (parabolic < qhi),
+                                parabolic,
+                                linear)
+
+            q[:, :, i] = np.where(move, adjusted, qi)
+            n[:, :, i] = np.where(move, ni + s, ni)
+
+        self.heights[:, mask] = q
+        self.positions[:, mask] = n
+        self.desired[:, mask] = d
@@ -0,0 +1,201 @@
+'''
+Trajectory recording
+
+TrajectoryRecorder appends time, motors and state to preallocated NumPy
+buffers and hands full buffers to a background thread that writes them to
+a binary file: a short header naming the columns, followed by rows of
+float64 values.  The file can be memory-mapped with open_trajectory().
+Buffers are laid out row by row, like the file, so that each step fills
+one contiguous row and the writer saves a buffer without transposing it.
+An error in the writer (e.g., a full disk) is raised again by the next
+call to append() or close().
+
+CsvRecorder writes the same columns to a .csv file, for files that end in
+.csv.
+
+Copyright (C) 2021 Simon D. Levy
+
+MIT License
+'''
+
+import json
+import os
+import queue
+import struct
+import threading
+
+import numpy as np
+
+MAGIC = b'COPTRAJ1'
+
+
+def make_columns(motor_count, state_names):
+
+    return (['t'] +
+            [('m%d' % k) for k in range(1, motor_count+1)] +
+            list(state_names))
+
+
+def make_recorder(filename, motor_count, state_names):
+    '''
+    @param filename output file name; .csv for text, anything else binary
+    @param motor_count number of motor values per row
+    @param state_names names of state values per row
+    '''
+
+    return (CsvRecorder(filename, motor_count, state_names)
+            if filename.lower().endswith('.csv')
+            else TrajectoryRecorder(filename, motor_count, state_names))
+
+
+def open_trajectory(filename):
+    '''
+    Memory-maps a file written by TrajectoryRecorder
+    @return column names, read-only rows X columns array
+    '''
+
+    with open(filename, 'rb') as f:
+
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError('%s is not a trajectory file' % filename)
+
+        size, = struct.unpack('<Q', f.read(8))
+        header = json.loads(f.read(size))
+
+    columns = header['columns']
+
+    offset = len(MAGIC) + 8 + size
+
+    # Ignore any partial row left by an interrupted writer
+    rows = (os.path.getsize(filename) - offset) // (8 * len(columns))
+
+    if rows == 0:
+        return columns, np.zeros((0, len(columns)))
+
+    return columns, np.memmap(filename,
+                              dtype='<f8',
+                              mode='r',
+                              offset=offset,
+                              shape=(rows, len(columns)))
+
+
+class TrajectoryRecorder:
+
+    # Number of buffers cycling between recorder and writer thread
+    BUFFERS = 3
+
+    def __init__(self, filename, motor_count, state_names, chunk=4096):
+        '''
+        @param filename output file name
+        @param motor_count number of motor values per row
+        @param state_names names of state values per row
+        @param chunk number of rows per buffer
+        '''
+
+        self.columns = make_columns(motor_count, state_names)
+
+        self.file = open(filename, 'wb')
+
+        # Pad the header so that rows start on an eight-byte boundary
+        header = json.dumps({'columns': self.columns}).encode()
+        header += b' ' * (-len(header) % 8)
+        self.file.write(MAGIC + struct.pack('<Q', len(header)) + header)
+
+        self.motors = slice(1, 1 + motor_count)
+        self.state = slice(1 + motor_count, len(self.columns))
+
+        self.free = queue.Queue()
+        for _ in range(self.BUFFERS):
+            self.free.put(np.empty((chunk, len(self.columns)), dtype='<f8'))
+
+        self.full = queue.Queue()
+
+        self.buffer = self.free.get()
+        self.count = 0
+
+        # Exception raised by the writer thread, if any
+        self.error = None
+
+        self.writer = threading.Thread(target=self._write, daemon=True)
+        self.writer.start()
+
+    def append(self, t, motors, state):
+
+        if self.error is not None:
+            raise self.error
+
+        row = self.buffer[self.count]
+        row[0] = t
+        row[self.motors] = motors
+        row[self.state] = state
+
+        self.count += 1
+
+        if self.count == len(self.buffer):
+            self._flush()
+
+    def close(self):
+
+        if self.count > 0:
+            self._flush()
+
+        self.full.put(None)
+        self.writer.join()
+        self.file.close()
+
+        if self.error is not None:
+            raise self.error
+
+    def _flush(self):
+
+        self.full.put((self.buffer, self.count))
+
+        # Blocks only if the writer has fallen a whole buffer behind; the
+        # writer returns every buffer, even after failing
+        self.buffer = self.free.get()
+        self.count = 0
+
+        if self.error is not None:
+            raise self.error
+
+    def _write(self):
+
+        while True:
+
+            item = self.full.get()
+
+            if item is None:
+                break
+
+            buffer, count = item
+
+            try:
+                if self.error is None:
+                    self.file.write(buffer[:count].tobytes())
+
+            # Keep the error for the recorder to raise, rather than ending
+            # the thread and leaving the recorder waiting for a buffer
+            except Exception as error:
+                self.error = error
+
+            finally:
+                self.free.put(buffer)
+
+
+class CsvRecorder:
+
+    def __init__(self, filename, motor_count, state_names):
+
+        self.file = open(filename, 'w')
+        self.file.write(','.join(make_columns(motor_count, state_names)) +
+                        '\n')
+
+    def append(self, t, motors, state):
+
+        self.file.write('%f' % t)
+        self.file.write((',%f' * len(motors)) % tuple(motors))
+        self.file.write(((',%f' * len(state)) + '\n') % tuple(state))
+
+    def close(self):
+
+        self.file.close()
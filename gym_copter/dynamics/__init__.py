@@ -75,11 +75,13 @@ class Dynamics:
     # Graviational constant
     G = 9.80665
 
-    def __init__(self, params, framesPerSecond):
+    def __init__(self, params, framesPerSecond, terrain=None):
 
         '''
         Constructor initializes kinematic pose, with flag for whether we're
-        airbone (helps with testing gravity).
+        airbone (helps with testing gravity).  Optional terrain (a
+        gym_copter.dynamics.terrain.Terrain) replaces the flat ground at
+        Z = 0.
         '''
 
         # Vehicle parameters [see Bouabdallah et al. 2004]
@@ -94,6 +96,8 @@ class Dynamics:
 
         self.maxrpm = params['maxrpm']
 
+        self.terrain = terrain
+
         self._dt = 1. / framesPerSecond
         self._ticks = 0
 
@@ -159,7 +163,7 @@ class Dynamics:
         elif self._status == self.STATUS_AIRBORNE:
 
             # If we've descended to the ground
-            if self._x[self.STATE_Z] > 0 and self._x[self.STATE_Z_DOT] > 0:
+            if self._x[self.STATE_Z_DOT] > 0 and self._reachedGround():
 
                 # Big angles indicate a crash
                 phi = self._x[self.STATE_PHI]
@@ -208,9 +212,24 @@ class Dynamics:
         '''
         self._x = np.array(state)
         self._status = (self.STATUS_AIRBORNE
-                        if self._x[self.STATE_Z] < 0
+                        if self.getClearance() > 0
                         else self.STATUS_LANDED)
 
+    def getClearance(self):
+        '''
+        Returns the signed distance from the vehicle to the ground (negative
+        below it)
+        '''
+        x = self._x
+
+        # Flat ground at Z = 0 (NED)
+        if self.terrain is None:
+            return -x[..., self.STATE_Z]
+
+        return self.terrain.distance(x[..., self.STATE_X],
+                                     x[..., self.STATE_Y],
+                                     x[..., self.STATE_Z])
+
     def getTime(self):
 
         return self._ticks * self._dt
@@ -223,6 +242,16 @@ class Dynamics:
 
         self._perturb = force / self.M
 
+    def _reachedGround(self):
+
+        # Nothing on the terrain reaches above the top of its distance
+        # field, where vehicles spend most of any flight
+        if (self.terrain is not None and
+           -self._x[self.STATE_Z] > self.terrain.top):
+            return False
+
+        return self.getClearance() < 0
+
     def _u2(self,  o):
         '''
         roll right
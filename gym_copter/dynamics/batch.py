@@ -0,0 +1,195 @@
+'''
+Multirotor dynamics for a batch of vehicles
+
+BatchDynamics follows the same equations and flight-status logic as
+Dynamics, but holds one row of state per vehicle and updates every row with
+whole-array NumPy operations, so that simulating a population costs a few
+array operations per step rather than one Python update per vehicle.
+
+Copyright (C) 2021 Simon D. Levy, Alex Sender
+
+MIT License
+'''
+
+import numpy as np
+
+from gym_copter.dynamics import Dynamics
+
+
+class BatchDynamics(Dynamics):
+
+    def __init__(self, params, framesPerSecond, count, terrain=None):
+        '''
+        @param params vehicle parameters, as for Dynamics
+        @param framesPerSecond update rate
+        @param count number of vehicles
+        @param terrain optional Terrain, as for Dynamics
+        '''
+
+        Dynamics.__init__(self, params, framesPerSecond, terrain)
+
+        self.count = count
+
+        self._x = np.zeros((count, 12))
+        self._dxdt = np.zeros((count, 12))
+        self._ticks = np.zeros(count, dtype=np.int64)
+        self._status = np.full(count, self.STATUS_LANDED)
+        self._perturb = np.zeros((count, 6))
+
+    def update(self, motorvals, active=None):
+        '''
+        Implements Equations 6 and 12 from Bouabdallah et al. (2004) for
+        every vehicle
+        @param motorvals count X 4 array of motor values
+        @param active boolean array of vehicles to update (default = all);
+                      others are left as they are, as if update() had not
+                      been called for them
+        '''
+
+        if active is None:
+            active = np.ones(self.count, dtype=bool)
+
+        x = self._x
+
+        # Convert the motor values to radians per second and square them
+        omegas2 = (np.asarray(motorvals) * self.maxrpm * np.pi / 30)**2
+        o0, o1, o2, o3 = omegas2.T
+
+        # Compute overall thrust, roll, pitch and yaw torque
+        U1 = self.B * np.sum(omegas2, axis=1)
+        U2 = self.L * self.B * ((o1 + o2) - (o0 + o3))
+        U3 = self.L * self.B * ((o1 + o3) - (o0 + o2))
+        U4 = self.D * ((o0 + o1) - (o2 + o3))
+
+        # Rotate thrust into the inertial frame.  Negate to use NED.
+        accelNED = BatchDynamics._bodyZToInertial(-U1 / self.M,
+                                                  (x[:, self.STATE_PHI],
+                                                   x[:, self.STATE_THETA],
+                                                   x[:, self.STATE_PSI]))
+
+        # Compute net vertical acceleration by subtracting gravity
+        netz = accelNED[:, 2] + self.G
+
+        status = self._status
+
+        # Landed vehicles become airborne once net acceleration is upward
+        status[active &
+               (status == self.STATUS_LANDED) &
+               (netz < 0)] = self.STATUS_AIRBORNE
+
+        leveling = active & (status == self.STATUS_LEVELING)
+        airborne = active & (status == self.STATUS_AIRBORNE)
+
+        # Leveling mode: change roll, pitch angles for rendering
+        x[leveling, self.STATE_PHI] = 0
+        x[leveling, self.STATE_THETA] = 0
+        status[leveling] = self.STATUS_LANDED
+
+        # Vehicles that have descended to the ground crash on big angles
+        # or velocities and level off otherwise; like Dynamics, this uses
+        # Y and Z velocities and roll only
+        ground = (airborne &
+                  (x[:, self.STATE_Z_DOT] > 0) &
+                  (self.getClearance() < 0))
+
+        crashed = ground & ((x[:, self.STATE_Z_DOT] > self.LANDING_VEL_Y) |
+                            (np.abs(x[:, self.STATE_Y_DOT]) >
+                             self.LANDING_VEL_X) |
+                            (np.abs(x[:, self.STATE_PHI]) >
+                             self.LANDING_ANGLE))
+
+        status[crashed] = self.STATUS_CRASHED
+        status[ground & ~crashed] = self.STATUS_LEVELING
+
+        # The rest of the airborne vehicles fly on
+        flying = airborne & ~ground
+
+        self._computeStateDerivative(accelNED, netz, U2, U3, U4)
+
+        # Add instantaneous perturbation
+        self._dxdt[:, 1::2] += self._perturb
+
+        x[flying] += self._dt * self._dxdt[flying]
+
+        # Vehicles that just touched down skip the rest, as in Dynamics
+        finished = active & ~ground
+        self._perturb[finished] = 0
+        self._ticks[finished] += 1
+
+    def getState(self):
+        '''
+        Returns a copy of the state as a count X 12 array
+        '''
+        return self._x.copy()
+
+    def setState(self, state):
+        '''
+        Sets the state from a count X 12 array
+        '''
+        self._x = np.array(state, dtype=float)
+        self._status = np.where(self.getClearance() > 0,
+                                self.STATUS_AIRBORNE,
+                                self.STATUS_LANDED)
+
+    def getTime(self):
+
+        return self._ticks * self._dt
+
+    def getStatus(self):
+
+        return self._status.copy()
+
+    def perturb(self, force):
+        '''
+        @param force count X 6 array of forces
+        '''
+
+        self._perturb = np.array(force, dtype=float) / self.M
+
+    def _computeStateDerivative(self, accelNED, netz, U2, U3, U4):
+        '''
+        Implements Equation 12, ignoring Omega as Dynamics does
+        '''
+
+        x = self._x
+        dxdt = self._dxdt
+        p = self._perturb
+
+        phidot = x[:, self.STATE_PHI_DOT]
+        thedot = x[:, self.STATE_THETA_DOT]
+        psidot = x[:, self.STATE_PSI_DOT]
+
+        dxdt[:, self.STATE_X] = x[:, self.STATE_X_DOT]
+        dxdt[:, self.STATE_X_DOT] = accelNED[:, 0] + p[:, 0]
+        dxdt[:, self.STATE_Y] = x[:, self.STATE_Y_DOT]
+        dxdt[:, self.STATE_Y_DOT] = accelNED[:, 1] + p[:, 1]
+        dxdt[:, self.STATE_Z] = x[:, self.STATE_Z_DOT]
+        dxdt[:, self.STATE_Z_DOT] = netz + p[:, 2]
+
+        dxdt[:, self.STATE_PHI] = phidot
+        dxdt[:, self.STATE_PHI_DOT] = (
+            psidot*thedot*(self.Iy-self.Iz) / self.Ix + U2 / self.Ix +
+            p[:, 3])
+
+        dxdt[:, self.STATE_THETA] = thedot
+        dxdt[:, self.STATE_THETA_DOT] = (
+            -(psidot*phidot*(self.Iz-self.Ix) / self.Iy + U3 / self.Iy) +
+            p[:, 4])
+
+        dxdt[:, self.STATE_PSI] = psidot
+        dxdt[:, self.STATE_PSI_DOT] = (
+            thedot*phidot*(self.Ix-self.Iy)/self.Iz + U4/self.Iz + p[:, 5])
+
+    def _bodyZToInertial(bodyZ, rotation):
+        '''
+        Dynamics._bodyZToInertial for arrays of thrusts and angles
+        @return count X 3 array
+        '''
+
+        cph, cth, cps, sph, sth, sps = Dynamics._sincos(rotation)
+
+        R = np.column_stack((sph*sps+cph*cps*sth,
+                             cph*sps*sth-cps*sph,
+                             cph*cth))
+
+        return bodyZ[:, None] * R
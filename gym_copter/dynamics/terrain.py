@@ -0,0 +1,238 @@
+'''
+Heightmap terrain with a precomputed signed distance field
+
+Terrain samples a signed distance field (positive above the ground) and its
+gradient on a 3D grid around a heightmap once, at construction, so that
+ground contact and clearance for any number of vehicles are O(1) trilinear
+lookups in the grid.  The grid spans the heightmap horizontally and a
+window of altitudes from a few cells below its lowest point to a few cells
+above its highest; distances are exact within that many cells of the
+surface, and the sign is exact everywhere.  Above the grid, clearance
+grows with altitude.
+
+Positions use the same NED coordinates as Dynamics (z down); heights are
+meters up.
+
+Copyright (C) 2021 Simon D. Levy
+
+MIT License
+'''
+
+import numpy as np
+
+
+class Terrain:
+
+    def __init__(self, heights, resolution=1.0, origin=None, window=4):
+        '''
+        @param heights X cells X Y cells array of ground heights (meters)
+        @param resolution cell size (meters)
+        @param origin X, Y of heights[0, 0] (default = center map on 0, 0)
+        @param window cells within which distances are exact; also the
+                      margin of the grid below and above the heightmap
+        '''
+
+        self.heights = np.array(heights, dtype=float)
+        self.resolution = resolution
+        self.window = window
+
+        nx, ny = self.heights.shape
+
+        self.origin = (np.array(origin, dtype=float)
+                       if origin is not None
+                       else -resolution * (np.array([nx, ny]) - 1) / 2)
+
+        # Altitudes of the grid levels
+        self.bottom = self.heights.min() - window * resolution
+        levels = int(np.ceil((self.heights.max() - self.bottom) /
+                             resolution)) + window + 1
+        altitudes = self.bottom + resolution * np.arange(levels)
+        self.top = altitudes[-1]
+
+        sdf = Terrain._distance_field(self.heights, altitudes, resolution,
+                                      window)
+
+        # Distance and its X, Y, altitude gradient, interleaved so that one
+        # gather fetches all four
+        self.field = np.stack((sdf,) + tuple(np.gradient(sdf, resolution)),
+                              axis=-1)
+
+        self.shape = np.array(sdf.shape)
+
+        # Nested lists and plain numbers are faster than arrays for one
+        # point at a time
+        self.sdf = sdf.tolist()
+        self.limits = tuple(int(n) - 1 for n in sdf.shape)
+        self.corner = (float(self.origin[0]), float(self.origin[1]),
+                       float(self.bottom), float(self.top))
+
+        # Bound on the slope of the interpolated distance: along each axis,
+        # it never exceeds the largest difference between neighboring
+        # samples, and above the grid distance grows one for one
+        slopes = [np.max(np.abs(np.diff(sdf, axis=k))) / resolution
+                  for k in range(3)]
+        slopes[2] = max(slopes[2], 1)
+        self.lipschitz = np.sqrt(np.sum(np.square(slopes)))
+
+        # Offsets of the eight corners of a cell in the flattened field
+        nx, ny, nz = sdf.shape
+        self.strides = np.array([ny * nz, nz, 1])
+        self.corners = np.array([self.strides @ (i, j, k)
+                                 for i in (0, 1)
+                                 for j in (0, 1)
+                                 for k in (0, 1)])
+
+    def distance(self, x, y, z):
+        '''
+        @param x, y, z NED positions (scalars or arrays)
+        @return signed distance to the ground (negative below it)
+        '''
+
+        # A single vehicle stepping Dynamics asks for one point at a time
+        if np.ndim(x) == 0 and np.ndim(y) == 0 and np.ndim(z) == 0:
+            return self._distance_point(float(x), float(y), float(z))
+
+        return self.query(x, y, z)[0]
+
+    def gradient(self, x, y, z):
+        '''
+        @param x, y, z NED positions (scalars or arrays)
+        @return ... X 3 array of NED gradients of distance (away from the
+                ground; normal to it at the surface)
+        '''
+
+        return self.query(x, y, z)[1]
+
+    def query(self, x, y, z):
+        '''
+        @param x, y, z NED positions (scalars or arrays)
+        @return signed distance, ... X 3 array of NED gradients
+        '''
+
+        altitude = -np.asarray(z, dtype=float)
+
+        # Clamp to the grid, carrying any distance above or below it
+        clamped = np.clip(altitude, self.bottom, self.top)
+
+        values = self._interpolate(np.stack((np.asarray(x, dtype=float),
+                                             np.asarray(y, dtype=float),
+                                             clamped), axis=-1))
+
+        distance = values[..., 0] + (altitude - clamped)
+
+        # NED z points down, opposite altitude
+        gradient = values[..., 1:] * np.array([1, 1, -1])
+
+        return distance, gradient
+
+    def height(self, x, y):
+        '''
+        @param x, y positions (scalars or arrays)
+        @return ground height, interpolated between cells
+        '''
+
+        u = np.clip((np.asarray(x, dtype=float) - self.origin[0]) /
+                    self.resolution, 0, self.shape[0] - 1)
+        v = np.clip((np.asarray(y, dtype=float) - self.origin[1]) /
+                    self.resolution, 0, self.shape[1] - 1)
+
+        i = np.minimum(u.astype(int), self.shape[0] - 2)
+        j = np.minimum(v.astype(int), self.shape[1] - 2)
+        fu, fv = u - i, v - j
+
+        h = self.heights
+
+        return ((1-fu) * (1-fv) * h[i, j] + fu * (1-fv) * h[i+1, j] +
+                (1-fu) * fv * h[i, j+1] + fu * fv * h[i+1, j+1])
+
+    def _distance_point(self, x, y, z):
+
+        x0, y0, bottom, top = self.corner
+        nx, ny, nz = self.limits
+        r = self.resolution
+
+        altitude = -z
+
+        # Nothing lies above the grid, whose top level is all the distance
+        # interpolated there needs
+        if altitude >= top:
+            k, fz = nz - 1, 1.
+        else:
+            g = max((altitude - bottom) / r, 0.)
+            k = min(int(g), nz - 1)
+            fz = g - k
+
+        u = min(max((x - x0) / r, 0.), nx)
+        v = min(max((y - y0) / r, 0.), ny)
+        i = min(int(u), nx - 1)
+        j = min(int(v), ny - 1)
+        fx, fy = u - i, v - j
+
+        # Interpolate in Z along the four edges of the cell, then in Y and X
+        edges = [column[k] + fz * (column[k+1] - column[k])
+                 for plane in self.sdf[i:i+2]
+                 for column in plane[j:j+2]]
+        c00, c01, c10, c11 = edges
+        c0 = c00 + fy * (c01 - c00)
+        c1 = c10 + fy * (c11 - c10)
+
+        return c0 + fx * (c1 - c0) + max(altitude - top, 0.)
+
+    def _interpolate(self, points):
+
+        # Fractional grid coordinates, clamped to the grid
+        lo = np.array([self.origin[0], self.origin[1], self.bottom])
+        g = np.clip((points - lo) / self.resolution, 0, self.shape - 1)
+
+        # Lower corner of each cell, keeping one cell above it
+        c = np.minimum(g.astype(int), np.maximum(self.shape - 2, 0))
+        f = g - c
+
+        # Gather the eight corners of every cell at once
+        index = (c @ self.strides)[..., None] + self.corners
+        corners = self.field.reshape(-1, 4).take(index, axis=0)
+
+        # Weights of the corners, in the same order as the offsets
+        fx, fy, fz = np.moveaxis(f, -1, 0)
+        wx, wy, wz = (1 - fx, fx), (1 - fy, fy), (1 - fz, fz)
+        w = np.stack([wx[i] * wy[j] * wz[k]
+                      for i in (0, 1)
+                      for j in (0, 1)
+                      for k in (0, 1)], axis=-1)
+
+        return (w[..., None, :] @ corners)[..., 0, :]
+
+    def _distance_field(heights, altitudes, resolution, window):
+        '''
+        Signed distance from each grid point to the ground, treating each
+        cell as a column of solid up to its height and searching columns
+        within the window
+        '''
+
+        nx, ny = heights.shape
+
+        padded = np.pad(heights, window, mode='edge')
+
+        a = altitudes[None, None, :]
+
+        outside = np.full((nx, ny, len(altitudes)), np.inf)
+        inside = np.full((nx, ny, len(altitudes)), np.inf)
+
+        for di in range(-window, window+1):
+            for dj in range(-window, window+1):
+
+                h = padded[window+di:window+di+nx,
+                           window+dj:window+dj+ny, None]
+
+                across = (di**2 + dj**2) * resolution**2
+
+                # Distance to this column's solid, and to the air above it
+                outside = np.minimum(outside,
+                                     np.sqrt(across +
+                                             np.maximum(a - h, 0)**2))
+                inside = np.minimum(inside,
+                                    np.sqrt(across +
+                                            np.maximum(h - a, 0)**2))
+
+        # One of the two is zero at every point
+        return outside - inside
@@ -7,3 +7,4 @@ MIT License
 from gym_copter.envs.lander import _Lander  # noqa: F401
 from gym_copter.envs.lander2d import Lander2D  # noqa: F401
 from gym_copter.envs.lander3d import Lander3D  # noqa: F401
+from gym_copter.envs.swarm import Swarm3D  # noqa: F401
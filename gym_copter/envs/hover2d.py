@@ -15,10 +15,15 @@ from gym_copter.pidcontrollers import PositionHoldPidController
 
 class Hover2D(_Hover):
 
-    def __init__(self):
+    def __init__(self, render_backend='gl'):
+        '''
+        @param render_backend 'gl' or 'software' (for headless rgb_array)
+        '''
 
         _Hover.__init__(self, 6, 2)
 
+        self.render_backend = render_backend
+
         # Add PID controllers for heuristic demo
         self.rate_pid = AngularVelocityPidController()
         self.poshold_pid = PositionHoldPidController()
@@ -28,9 +33,6 @@ class Hover2D(_Hover):
 
     def reset(self):
 
-        if self.viewer is not None:
-            self.viewer.close()
-
         return _Hover._reset(self)
 
     def render(self, mode='human'):
@@ -39,13 +41,11 @@ class Hover2D(_Hover):
 
         # Create viewer if not done yet
         if self.viewer is None:
-            self.viewer = TwoDRenderer(self)
-
-        if self.steps%2:
-            self.viewer.render(mode, self.pose, self.spinning)
-            return self.viewer._complete(mode)
+            self.viewer = TwoDRenderer(self, self.render_backend)
 
-        return None
+        return (self.viewer.render(mode, self.pose, self.spinning)
+                if self.steps % 2
+                else None)
 
     def close(self):
         if self.viewer is not None:
@@ -14,8 +14,10 @@ import threading
 from gym_copter.envs.parsing import _make_parser
 from gym_copter.envs.hover import _Hover
 from gym_copter.rendering.threed import ThreeDHoverRenderer
+from gym_copter.rendering.remote import RemoteRenderer
 from gym_copter.sensors.vision.vs import VisionSensor
 from gym_copter.sensors.vision.dvs import DVS
+from gym_copter.sensors.scheduler import SensorScheduler
 from gym_copter.pidcontrollers import AngularVelocityPidController
 from gym_copter.pidcontrollers import PositionHoldPidController
 
@@ -48,7 +50,7 @@ class Hover3D(_Hover):
         Returns None because we run viewer on a separate thread
         '''
 
-        if self.prev is not None:
+        if self.viewer.paced and self.prev is not None:
             dt = 1/self.FRAMES_PER_SECOND - 3.0 * (time()-self.prev)
             if dt > 0:
                 sleep(dt)
@@ -113,40 +115,98 @@ class HoverVisual(Hover3D):
 
     RES = 16
 
-    def __init__(self, vs=VisionSensor(res=RES)):
+    def __init__(self, vs=None, packed=False, rate=None,
+                 phase=0, sink=None):
+        '''
+        @param vs vision sensor (default = new VisionSensor at RES)
+        @param packed if True, store image bit-packed (see vs.pack())
+        @param rate vision update rate in Hz (default = physics rate)
+        @param phase delay of first vision update (seconds)
+        @param sink frame sink for render() (default = sensor's own)
+        '''
 
         Hover3D.__init__(self)
 
+        # Build a sensor for each environment, so that no two share a sink
+        if vs is None:
+            vs = VisionSensor(res=self.RES, sink=sink)
+
+        elif sink is not None:
+            vs.sink = sink
+
         self.vs = vs
 
+        self.packed = packed
+
         self.image = None
 
+        # Run vision at its own rate, holding the image between updates
+        self.scheduler = SensorScheduler(self.FRAMES_PER_SECOND)
+        self.scheduler.add('vision', self._get_image, rate, phase)
+
+    def reset(self):
+
+        self.scheduler.reset()
+
+        return Hover3D.reset(self)
+
     def step(self, action):
 
         result = Hover3D.step(self, action)
 
-        x, y, z, phi, theta, psi = self.pose
+        fresh = self.scheduler.update()
+
+        self.image = self.scheduler.get('vision')
 
-        self.image = self.vs.getImage(x,
-                                      y,
-                                      max(-z, 1e-6),  # keep Z positive
-                                      degrees(phi),
-                                      degrees(theta),
-                                      degrees(psi))
+        # Report which sensors were sampled on this step
+        result[3]['fresh'] = fresh
 
         return result
 
     def render(self, mode='human'):
 
         if self.image is not None:
-            self.vs.display_image(self.image)
+            self.vs.display_image(self.vs.unpack(self.image)
+                                  if self.packed
+                                  else self.image)
+
+    def close(self):
+
+        self.vs.sink.close()
+
+        Hover3D.close(self)
+
+    def _time_phases(self):
+
+        Hover3D._time_phases(self)
+
+        # The scheduler holds its own reference to the sensor function
+        schedule = self.scheduler.schedules['vision']
+        schedule.fun = self.timer.wrap('vision', schedule.fun)
+
+    def _get_image(self):
+
+        x, y, z, phi, theta, psi = self.pose
+
+        image = self.vs.getImage(x,
+                                 y,
+                                 max(-z, 1e-6),  # keep Z positive
+                                 degrees(phi),
+                                 degrees(theta),
+                                 degrees(psi))
+
+        return self.vs.pack(image) if self.packed else image
 
 
 class HoverDVS(HoverVisual):
 
-    def __init__(self):
+    def __init__(self, packed=False, rate=None, phase=0, sink=None):
 
-        HoverVisual.__init__(self, vs=DVS(res=HoverVisual.RES))
+        HoverVisual.__init__(self,
+                             vs=DVS(res=HoverVisual.RES, sink=sink),
+                             packed=packed,
+                             rate=rate,
+                             phase=phase)
 
 # End of Hover3D classes -------------------------------------------------
 
@@ -176,6 +236,9 @@ def make_parser():
     group.add_argument('--nodisplay', action='store_true',
                        help='Suppress display')
 
+    parser.add_argument('--remote', action='store_true',
+                        help='Run display in a separate process')
+
     return parser
 
 
@@ -194,12 +257,15 @@ def main():
 
     args, viewangles = parse(parser)
 
-    env = (HoverDVS(args) if args.dvs
+    env = (HoverDVS() if args.dvs
            else (HoverVisual() if args.vision
                  else Hover3D()))
 
     if not args.nodisplay:
-        viewer = ThreeDHoverRenderer(env, viewangles=viewangles)
+        viewer = (RemoteRenderer(env, ThreeDHoverRenderer,
+                                 viewangles=viewangles)
+                  if args.remote
+                  else ThreeDHoverRenderer(env, viewangles=viewangles))
 
     threadfun = env.demo_heuristic
     threadargs = args.seed, args.nopid, args.csvfilename
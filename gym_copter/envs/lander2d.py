@@ -15,10 +15,15 @@ from gym_copter.pidcontrollers import PositionHoldPidController
 
 class Lander2D(_Lander):
 
-    def __init__(self):
+    def __init__(self, render_backend='gl'):
+        '''
+        @param render_backend 'gl' or 'software' (for headless rgb_array)
+        '''
 
         _Lander.__init__(self, 6, 2)
 
+        self.render_backend = render_backend
+
         # Add PID controllers for heuristic demo
         self.rate_pid = AngularVelocityPidController()
         self.poshold_pid = PositionHoldPidController()
@@ -28,9 +33,6 @@ class Lander2D(_Lander):
 
     def reset(self):
 
-        if self.viewer is not None:
-            self.viewer.close()
-
         return _Lander._reset(self)
 
     def render(self, mode='human'):
@@ -39,7 +41,7 @@ class Lander2D(_Lander):
 
         # Create viewer if not done yet
         if self.viewer is None:
-            self.viewer = TwoDLanderRenderer(self)
+            self.viewer = TwoDLanderRenderer(self, self.render_backend)
 
         return None if self.steps%2 else self.viewer.render(mode, self.pose, self.spinning)
 
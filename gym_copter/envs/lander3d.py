@@ -14,11 +14,16 @@ from gym_copter.envs.lander import _Lander
 from gym_copter.rendering.hud import HUD
 from gym_copter.sensors.vision.vs import VisionSensor
 from gym_copter.sensors.vision.dvs import DVS
+from gym_copter.sensors.scheduler import SensorScheduler
 
 
 class Lander3D(_Lander):
 
-    def __init__(self, obs_size=10):
+    def __init__(self, obs_size=10, render_backend='gl'):
+        '''
+        @param obs_size observation size
+        @param render_backend 'gl' or 'software' (for headless rgb_array)
+        '''
 
         _Lander.__init__(self, obs_size, 4)
 
@@ -28,7 +33,8 @@ class Lander3D(_Lander):
 
         self.prev = None
 
-        self.viewer = HUD(self)
+        self.render_backend = render_backend
+        self.viewer = HUD(self, render_backend)
 
     def reset(self):
 
@@ -36,7 +42,11 @@ class Lander3D(_Lander):
 
     def render(self, mode='human'):
 
-        if self.prev is not None:
+        # Create a new viewer if close() removed the last one
+        if self.viewer is None:
+            self.viewer = HUD(self, self.render_backend)
+
+        if self.viewer.paced and self.prev is not None:
             dt = 1/self.FRAMES_PER_SECOND - 3.0 * (time()-self.prev)
             if dt > 0:
                 sleep(dt)
@@ -45,6 +55,12 @@ class Lander3D(_Lander):
 
         return self.viewer.render(mode)
 
+    def close(self):
+
+        if self.viewer is not None:
+            self.viewer.close()
+            self.viewer = None
+
     def demo_pose(self, args):
 
         x, y, z, phi, theta, viewer = args
@@ -72,37 +88,98 @@ class LanderVisual(Lander3D):
 
     RES = 16
 
-    def __init__(self, vs=VisionSensor(res=RES)):
+    def __init__(self, vs=None, packed=False, rate=None,
+                 phase=0, sink=None, render_backend='gl'):
+        '''
+        @param vs vision sensor (default = new VisionSensor at RES)
+        @param packed if True, store image bit-packed (see vs.pack())
+        @param rate vision update rate in Hz (default = physics rate)
+        @param phase delay of first vision update (seconds)
+        @param sink frame sink for render() (default = sensor's own)
+        @param render_backend 'gl' or 'software' (for headless rgb_array)
+        '''
 
-        Lander3D.__init__(self)
+        Lander3D.__init__(self, render_backend=render_backend)
+
+        # Build a sensor for each environment, so that no two share a sink
+        if vs is None:
+            vs = VisionSensor(res=self.RES, sink=sink)
+
+        elif sink is not None:
+            vs.sink = sink
 
         self.vs = vs
 
+        self.packed = packed
+
         self.image = None
 
+        # Run vision at its own rate, holding the image between updates
+        self.scheduler = SensorScheduler(self.FRAMES_PER_SECOND)
+        self.scheduler.add('vision', self._get_image, rate, phase)
+
+    def reset(self):
+
+        self.scheduler.reset()
+
+        return Lander3D.reset(self)
+
     def step(self, action):
 
         result = Lander3D.step(self, action)
 
-        x, y, z, phi, theta, psi = self.pose
+        fresh = self.scheduler.update()
 
-        self.image = self.vs.getImage(x,
-                                      y,
-                                      max(-z, 1e-6),  # keep Z positive
-                                      np.degrees(phi),
-                                      np.degrees(theta),
-                                      np.degrees(psi))
+        self.image = self.scheduler.get('vision')
+
+        # Report which sensors were sampled on this step
+        result[3]['fresh'] = fresh
 
         return result
 
     def render(self, mode='human'):
 
         if self.image is not None:
-            self.vs.display_image(self.image)
+            self.vs.display_image(self.vs.unpack(self.image)
+                                  if self.packed
+                                  else self.image)
+
+    def close(self):
+
+        self.vs.sink.close()
+
+        Lander3D.close(self)
+
+    def _time_phases(self):
+
+        Lander3D._time_phases(self)
+
+        # The scheduler holds its own reference to the sensor function
+        schedule = self.scheduler.schedules['vision']
+        schedule.fun = self.timer.wrap('vision', schedule.fun)
+
+    def _get_image(self):
+
+        x, y, z, phi, theta, psi = self.pose
+
+        image = self.vs.getImage(x,
+                                 y,
+                                 max(-z, 1e-6),  # keep Z positive
+                                 np.degrees(phi),
+                                 np.degrees(theta),
+                                 np.degrees(psi))
+
+        return self.vs.pack(image) if self.packed else image
 
 
 class LanderDVS(LanderVisual):
 
-    def __init__(self):
+    def __init__(self, packed=False, rate=None, phase=0, sink=None,
+                 render_backend='gl'):
 
-        LanderVisual.__init__(self, vs=DVS(res=LanderVisual.RES))
+        LanderVisual.__init__(self,
+                              vs=DVS(res=LanderVisual.RES, sink=sink),
+                              packed=packed,
+                              rate=rate,
+                              phase=phase,
+                              render_backend=render_backend)
@@ -0,0 +1,282 @@
+'''
+Multi-copter swarm hovering
+
+Swarm3D flies count copters in one world on a BatchDynamics model.  Each
+copter earns the hover reward for every step it stays up, loses reward for
+each neighbor inside the proximity radius, and crashes, along with the
+other copter, if it comes within the collision radius.
+
+Neighbors are found with a uniform spatial hash: positions are binned
+into cells one proximity radius wide, the cell keys are sorted, and each
+copter looks up the 27 cells around its own with a binary search, so the
+cost grows with the number of copters and their neighbors rather than with
+the number of pairs.
+
+Copyright (C) 2021 Simon D. Levy
+
+MIT License
+'''
+
+from itertools import product
+
+import numpy as np
+
+from gym_copter.envs.task import _Task
+from gym_copter.dynamics import djiphantom_params
+from gym_copter.dynamics.batch import BatchDynamics
+
+# Cell offsets of a cell and its 26 neighbors
+_OFFSETS = np.array(list(product((-1, 0, 1), repeat=3)))
+
+
+def neighbor_pairs(positions, radius):
+    '''
+    @param positions N X 3 array of positions
+    @param radius neighbor distance
+    @return arrays i, j, distance for all pairs i < j closer than radius
+    '''
+
+    n = len(positions)
+
+    if n < 2:
+        return (np.zeros(0, dtype=np.int64),
+                np.zeros(0, dtype=np.int64),
+                np.zeros(0))
+
+    cells = np.floor(positions / radius).astype(np.int64)
+
+    # Start cells at 1, leaving an empty border so that offsets never wrap
+    cells -= cells.min(axis=0) - 1
+    dims = cells.max(axis=0) + 2
+
+    strides = np.array([dims[1] * dims[2], dims[2], 1])
+
+    keys = cells @ strides
+
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+
+    # Range of sorted entries in each neighboring cell of each copter
+    targets = (keys[None, :] + (_OFFSETS @ strides)[:, None]).ravel()
+    lo = np.searchsorted(sorted_keys, targets, side='left')
+    hi = np.searchsorted(sorted_keys, targets, side='right')
+    counts = hi - lo
+
+    # Expand ranges into candidate pairs
+    i = np.repeat(np.tile(np.arange(n), len(_OFFSETS)), counts)
+    starts = np.repeat(lo - np.cumsum(counts) + counts, counts)
+    j = order[starts + np.arange(len(i))]
+
+    keep = i < j
+    i, j = i[keep], j[keep]
+
+    distance = np.sqrt(np.sum((positions[i] - positions[j])**2, axis=1))
+
+    close = distance < radius
+
+    return i[close], j[close], distance[close]
+
+
+class Swarm3D(_Task):
+
+    def __init__(self, count=16, spacing=2, collision_radius=0.5,
+                 proximity_radius=1.5, proximity_penalty=1):
+        '''
+        @param count number of copters
+        @param spacing initial distance between copters on a square grid
+        @param collision_radius copters closer than this crash
+        @param proximity_radius copters closer than this are penalized
+        @param proximity_penalty penalty per step for a neighbor at zero
+                                 distance, falling linearly to zero at the
+                                 proximity radius
+        '''
+
+        # Own state plus offset to nearest neighbor
+        _Task.__init__(self, 15, 4)
+
+        if collision_radius > proximity_radius:
+            raise ValueError('Collision radius must not exceed proximity '
+                             'radius')
+
+        self.count = count
+        self.spacing = spacing
+        self.collision_radius = collision_radius
+        self.proximity_radius = proximity_radius
+        self.proximity_penalty = proximity_penalty
+
+        # Start in a square grid centered over the origin
+        side = int(np.ceil(np.sqrt(count)))
+        ticks = (np.arange(side) - (side - 1) / 2) * spacing
+        grid = np.array(list(product(ticks, ticks)))[:count]
+        self.formation = grid
+
+        # Keep the usual margin around the whole formation
+        self.bounds += np.max(np.abs(grid)) if count > 0 else 0
+
+        # For generating CSV file
+        self.STATE_NAMES = ['X', 'dX', 'Y', 'dY', 'Z', 'dZ',
+                            'Phi', 'dPhi', 'Theta', 'dTheta', 'Psi', 'dPsi']
+
+        self.poses = np.zeros((count, 6))
+        self.fitness = np.zeros(count)
+        self.dones = np.ones(count, dtype=bool)
+
+    def reset(self):
+
+        return self._reset()
+
+    def step(self, actions):
+        '''
+        @param actions count X 4 array of motor values
+        @return count X 15 observations (state, offset to nearest neighbor),
+                count rewards, count done flags, info dictionary with the
+                number of collisions on this step
+        '''
+
+        # Abbreviation
+        d = self.dynamics
+        status = d.getStatus()
+
+        live = ~self.dones
+
+        # Stop motors after landing; otherwise set motors from action
+        landed = status == d.STATUS_LANDED
+        motors = np.clip(actions, 0, 1)
+        motors[landed] = 0
+        self.spinning = np.where(live, np.sum(motors, axis=1) > 0,
+                                 self.spinning)
+
+        d.update(motors, live & ~landed)
+
+        # Get new state from dynamics
+        state = d.getState()
+
+        x, y = state[:, d.STATE_X], state[:, d.STATE_Y]
+        phi, theta = state[:, d.STATE_PHI], state[:, d.STATE_THETA]
+
+        # Set poses for display
+        self.poses = state[:, 0::2].copy()
+
+        i, j, distance, nearest = self._get_neighbors(state, live)
+
+        reward = self._get_reward(status, state, d, i, j, distance)
+
+        done = np.zeros(self.count, dtype=bool)
+
+        # Lose bigly if we go outside window
+        outside = (np.abs(x) >= self.bounds) | (np.abs(y) >= self.bounds)
+        done |= outside
+        reward[outside] -= self.out_of_bounds_penalty
+
+        # Lose bigly for excess roll or pitch, or for hitting another copter
+        collided = np.zeros(self.count, dtype=bool)
+        hit = distance < self.collision_radius
+        collided[i[hit]] = True
+        collided[j[hit]] = True
+
+        crashed = ~outside & (collided |
+                              (np.abs(phi) >= self.max_angle) |
+                              (np.abs(theta) >= self.max_angle))
+        done |= crashed
+        reward[crashed] = -self.out_of_bounds_penalty
+
+        # It's all over if we crash into the ground
+        grounded = ~outside & ~crashed & (status == d.STATUS_CRASHED)
+        done |= grounded
+
+        self.spinning &= ~(landed | grounded)
+
+        # Don't run forever!
+        if self.steps >= self.max_steps:
+            done[:] = True
+        self.steps += 1
+
+        # Finished copters earn nothing more and drop out of the swarm
+        reward[~live] = 0
+        self.dones |= done
+        self.done = bool(np.all(self.dones))
+
+        self.fitness += reward
+
+        return (np.array(np.column_stack((state, nearest)), dtype=np.float32),
+                reward,
+                self.dones.copy(),
+                {'collisions': int(np.sum(hit))})
+
+    def render(self, mode='human'):
+
+        # Drawn by a renderer, if one is attached
+        return None if self.viewer is None else self.viewer.render(mode)
+
+    def _reset(self):
+
+        n = self.count
+
+        self.done = False
+        self.dones = np.zeros(n, dtype=bool)
+        self.spinning = np.zeros(n, dtype=bool)
+        self.fitness = np.zeros(n)
+
+        self.dynamics = BatchDynamics(djiphantom_params,
+                                      self.FRAMES_PER_SECOND,
+                                      n,
+                                      self.terrain)
+        if self.timer is not None:
+            self._time_dynamics()
+
+        d = self.dynamics
+
+        state = np.zeros((n, 12))
+        state[:, d.STATE_X] = self.formation[:, 0]
+        state[:, d.STATE_Y] = self.formation[:, 1]
+        state[:, d.STATE_Z] = -self.initial_altitude  # NED
+        d.setState(state)
+
+        # Perturb with random X, Y, Z forces
+        forces = np.zeros((n, 6))
+        forces[:, :3] = self.np_random.uniform(-self.initial_random_force,
+                                               +self.initial_random_force,
+                                               (n, 3))
+        d.perturb(forces)
+
+        self.steps = 0
+
+        obs = self.step(np.zeros((n, self.action_size)))[0]
+        self.fitness[:] = 0
+
+        return obs
+
+    def _get_neighbors(self, state, live):
+
+        positions = state[:, 0:6:2]
+
+        # Only copters still flying take part
+        index = np.flatnonzero(live)
+
+        i, j, distance = neighbor_pairs(positions[index],
+                                        self.proximity_radius)
+        i, j = index[i], index[j]
+
+        # Offset to each copter's nearest neighbor, zero if none in range
+        nearest = np.zeros((self.count, 3))
+        first = np.concatenate((i, j))
+        second = np.concatenate((j, i))
+        order = np.lexsort((np.concatenate((distance, distance)), first))
+        owners, firsts = np.unique(first[order], return_index=True)
+        nearest[owners] = (positions[second[order][firsts]] -
+                           positions[owners])
+
+        return i, j, distance, nearest
+
+    def _get_reward(self, status, state, d, i, j, distance):
+
+        # Hover reward for each step we complete
+        reward = np.ones(self.count)
+
+        # Lose some for each neighbor, more the closer it is
+        penalty = self.proximity_penalty * (1 - distance /
+                                            self.proximity_radius)
+        reward -= np.bincount(i, penalty, self.count)
+        reward -= np.bincount(j, penalty, self.count)
+
+        return reward
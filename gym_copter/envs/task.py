@@ -17,6 +17,7 @@ from gym import spaces
 from gym.utils import EzPickle, seeding
 
 from gym_copter.dynamics import Dynamics, djiphantom_params
+from gym_copter.envs.timing import PhaseTimer
 
 
 class _Task(gym.Env, EzPickle):
@@ -28,6 +29,12 @@ class _Task(gym.Env, EzPickle):
         'video.frames_per_second': FRAMES_PER_SECOND
     }
 
+    # Phase name, method name for enable_timing()
+    TIMED_METHODS = (('step', 'step'),
+                     ('reset', 'reset'),
+                     ('reward', '_get_reward'),
+                     ('render', 'render'))
+
     def __init__(self, observation_size, action_size,
                  initial_random_force=30,
                  out_of_bounds_penalty=100,
@@ -41,6 +48,11 @@ class _Task(gym.Env, EzPickle):
         self.viewer = None
         self.pose = None
         self.action_size = action_size
+        self.dynamics = None
+        self.timer = None
+
+        # Flat ground unless a gym_copter.dynamics.terrain.Terrain is set
+        self.terrain = None
 
         # useful range is -1 .. +1, but spikes can be higher
         self.observation_space = spaces.Box(-np.inf,
@@ -70,6 +82,40 @@ class _Task(gym.Env, EzPickle):
         self.np_random, seed = seeding.np_random(seed)
         return [seed]
 
+    def enable_timing(self, info=False):
+        '''
+        Starts accumulating time and calls for each phase of step(), reset()
+        and render(), including dynamics, reward and subclass sensors.
+        Phases nest: step includes dynamics and reward, and reset includes
+        its initial step.
+        @param info if True, step() adds a snapshot to info['timing']
+        '''
+
+        if self.timer is None:
+
+            self.timer = PhaseTimer()
+
+            self._time_phases()
+
+            if self.dynamics is not None:
+                self._time_dynamics()
+
+        if info:
+            self._time_info()
+
+    def get_timings(self):
+        '''
+        @return dictionary from PhaseTimer.snapshot(), empty if timing is
+                not enabled
+        '''
+
+        return {} if self.timer is None else self.timer.snapshot()
+
+    def reset_timings(self):
+
+        if self.timer is not None:
+            self.timer.reset()
+
     def step(self, action):
 
         # Abbreviation
@@ -144,7 +190,10 @@ class _Task(gym.Env, EzPickle):
         self.prev_shaping = None
 
         # Create dynamics model
-        self.dynamics = Dynamics(djiphantom_params, self.FRAMES_PER_SECOND)
+        self.dynamics = Dynamics(djiphantom_params, self.FRAMES_PER_SECOND,
+                                 self.terrain)
+        if self.timer is not None:
+            self._time_dynamics()
 
         # Set up initial conditions
         state = np.zeros(12)
@@ -174,6 +223,34 @@ class _Task(gym.Env, EzPickle):
         # Return initial state
         return self.step(np.zeros(self.action_size))[0]
 
+    def _time_phases(self):
+
+        # Shadow the class methods on this instance only
+        for phase, name in self.TIMED_METHODS:
+            setattr(self, name, self.timer.wrap(phase, getattr(self, name)))
+
+    def _time_dynamics(self):
+
+        self.dynamics.update = self.timer.wrap('dynamics',
+                                               self.dynamics.update)
+
+    def _time_info(self):
+
+        if getattr(self.step, 'reports_timing', False):
+            return
+
+        step = self.step
+
+        def step_with_timing(action):
+
+            result = step(action)
+            result[3]['timing'] = self.timer.snapshot()
+            return result
+
+        step_with_timing.reports_timing = True
+
+        self.step = step_with_timing
+
     def _randforce(self):
 
         return np.random.uniform(-self.initial_random_force,
@@ -0,0 +1,68 @@
+'''
+Per-phase timing for copter environments
+
+PhaseTimer wraps functions so that each call adds its elapsed time and a
+count to a named phase.  Environments install the wrappers on their own
+instances only when timing is enabled, so the class methods, and untimed
+environments, run unchanged.
+
+Copyright (C) 2021 Simon D. Levy
+
+MIT License
+'''
+
+import functools
+from time import perf_counter
+
+
+class PhaseTimer:
+
+    def __init__(self):
+
+        self.seconds = {}
+        self.calls = {}
+
+    def wrap(self, phase, fun):
+        '''
+        @param phase name of phase
+        @param fun function to time
+        @return function accumulating its time into the phase
+        '''
+
+        self.seconds.setdefault(phase, 0.0)
+        self.calls.setdefault(phase, 0)
+
+        seconds = self.seconds
+        calls = self.calls
+
+        @functools.wraps(fun)
+        def timed(*args, **kwargs):
+
+            start = perf_counter()
+
+            try:
+                return fun(*args, **kwargs)
+
+            finally:
+                seconds[phase] += perf_counter() - start
+                calls[phase] += 1
+
+        return timed
+
+    def snapshot(self):
+        '''
+        @return dictionary mapping each phase to a dictionary of its total
+                seconds, number of calls, and mean microseconds per call
+        '''
+
+        return {phase: {'seconds': self.seconds[phase],
+                        'calls': self.calls[phase],
+                        'usec_per_call': (1e6 * self.seconds[phase] /
+                                          max(self.calls[phase], 1))}
+                for phase in self.seconds}
+
+    def reset(self):
+
+        for phase in self.seconds:
+            self.seconds[phase] = 0.0
+            self.calls[phase] = 0
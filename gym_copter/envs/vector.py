@@ -0,0 +1,193 @@
+'''
+Batched 3D Copter-Lander
+
+VectorLander3D flies a whole population of Lander3D vehicles in lockstep on
+one BatchDynamics model.  Each step takes a row of motor values per vehicle
+and returns a row of observations, rewards and done flags; vehicles that
+have finished their episode stay where they are and earn no more reward
+until the next reset.
+
+It also provides the poses, fitness (total reward) and done attributes
+needed to watch the population in a ThreeDPopulationRenderer.
+
+Copyright (C) 2021 Simon D. Levy
+
+MIT License
+'''
+
+import numpy as np
+
+from gym_copter.envs.lander import _Lander
+from gym_copter.dynamics import djiphantom_params
+from gym_copter.dynamics.batch import BatchDynamics
+
+
+class VectorLander3D(_Lander):
+
+    def __init__(self, count, obs_size=10, max_episode_steps=400):
+        '''
+        @param count number of vehicles
+        @param obs_size observation size, as for Lander3D
+        @param max_episode_steps steps per episode, as registered for
+                                 Lander3D-v0 (None = max_steps only)
+        '''
+
+        _Lander.__init__(self, obs_size, 4)
+
+        self.count = count
+        self.max_episode_steps = max_episode_steps
+
+        self.poses = np.zeros((count, 6))
+        self.fitness = np.zeros(count)
+        self.dones = np.ones(count, dtype=bool)
+
+    def reset(self):
+
+        return self._reset()
+
+    def step(self, actions):
+        '''
+        @param actions count X 4 array of motor values
+        @return count X obs_size observations, count rewards, count done
+                flags, empty info dictionary
+        '''
+
+        # Abbreviation
+        d = self.dynamics
+        status = d.getStatus()
+
+        live = ~self.dones
+
+        # Stop motors after safe landing; otherwise set motors from action
+        landed = status == d.STATUS_LANDED
+        motors = np.clip(actions, 0, 1)
+        motors[landed] = 0
+        self.spinning = np.where(live, np.sum(motors, axis=1) > 0,
+                                 self.spinning)
+
+        d.update(motors, live & ~landed)
+
+        # Get new state from dynamics
+        state = d.getState()
+
+        x, y = state[:, d.STATE_X], state[:, d.STATE_Y]
+        phi, theta = state[:, d.STATE_PHI], state[:, d.STATE_THETA]
+
+        # Set poses for display
+        self.poses = state[:, 0::2].copy()
+
+        reward = self._get_reward(status, state, d, x, y)
+
+        # Safe landings end the episode
+        done = landed.copy()
+
+        # Lose bigly if we go outside window
+        outside = (np.abs(x) >= self.bounds) | (np.abs(y) >= self.bounds)
+        done |= outside
+        reward[outside] -= self.out_of_bounds_penalty
+
+        # Lose bigly for excess roll or pitch
+        tilted = ~outside & ((np.abs(phi) >= self.max_angle) |
+                             (np.abs(theta) >= self.max_angle))
+        done |= tilted
+        reward[tilted] = -self.out_of_bounds_penalty
+
+        # It's all over if we crash
+        crashed = ~outside & ~tilted & (status == d.STATUS_CRASHED)
+        done |= crashed
+
+        self.spinning &= ~(landed | crashed)
+
+        # Don't run forever!
+        if self.steps >= self.limit:
+            done[:] = True
+        self.steps += 1
+
+        # Finished vehicles earn nothing more
+        reward[~live] = 0
+        self.dones |= done
+        self.done = bool(np.all(self.dones))
+
+        self.fitness += reward
+
+        return (np.array(state[:, :10], dtype=np.float32),
+                reward,
+                self.dones.copy(),
+                {})
+
+    def render(self, mode='human'):
+
+        # Drawn by a ThreeDPopulationRenderer, if one is attached
+        return None if self.viewer is None else self.viewer.render(mode)
+
+    def _reset(self):
+
+        n = self.count
+
+        self.done = False
+        self.dones = np.zeros(n, dtype=bool)
+        self.spinning = np.zeros(n, dtype=bool)
+        self.fitness = np.zeros(n)
+
+        # Support for reward shaping
+        self.prev_shaping = None
+
+        self.dynamics = BatchDynamics(djiphantom_params,
+                                      self.FRAMES_PER_SECOND,
+                                      n,
+                                      self.terrain)
+        if self.timer is not None:
+            self._time_dynamics()
+
+        # Start every vehicle at the initial altitude (NED)
+        state = np.zeros((n, 12))
+        state[:, self.dynamics.STATE_Z] = -self.initial_altitude
+        self.dynamics.setState(state)
+
+        # Perturb with random X, Y, Z forces
+        forces = np.zeros((n, 6))
+        forces[:, :3] = self.np_random.uniform(-self.initial_random_force,
+                                               +self.initial_random_force,
+                                               (n, 3))
+        self.dynamics.perturb(forces)
+
+        # Stop at the sooner of our own limit and the episode limit
+        self.steps = 0
+        self.limit = (self.max_steps
+                      if self.max_episode_steps is None
+                      else min(self.max_steps, self.max_episode_steps))
+
+        # Like Lander3D, count the initial step toward the limit
+        obs = self.step(np.zeros((n, self.action_size)))[0]
+        self.fitness[:] = 0
+
+        return obs
+
+    def _get_reward(self, status, state, d, x, y):
+
+        # Get penalty based on state and motors
+        shaping = -(self.XYZ_PENALTY_FACTOR *
+                    np.sqrt(np.sum(state[:, 0:6]**2, axis=1)) +
+                    self.YAW_PENALTY_FACTOR *
+                    np.sqrt(np.sum(state[:, 10:12]**2, axis=1)))
+
+        shaping[np.abs(state[:, d.STATE_Z_DOT]) > self.DZ_MAX] -= (
+                self.DZ_PENALTY)
+
+        reward = (shaping - self.prev_shaping
+                  if self.prev_shaping is not None
+                  else np.zeros(self.count))
+
+        # Finished vehicles keep their last shaping
+        self.prev_shaping = (shaping
+                             if self.prev_shaping is None
+                             else np.where(self.dones,
+                                           self.prev_shaping,
+                                           shaping))
+
+        # Win bigly we land safely between the flags
+        reward[(status == d.STATUS_LANDED) &
+               (np.sqrt(x**2 + y**2) < self.TARGET_RADIUS)] += (
+                self.INSIDE_RADIUS_BONUS)
+
+        return reward
@@ -0,0 +1,78 @@
+'''
+Batched evaluation of PyTorch policies on VectorLander3D
+
+evaluate() flies one episode per seed slot at once: observations are copied
+into a preallocated NumPy buffer that shares its memory with a torch tensor
+(torch.from_numpy), so each step is one copy, one batched forward pass and
+one vector-environment step, with no per-step tensor allocation.
+
+Requires PyTorch.
+
+Copyright (C) 2021 Simon D. Levy
+
+MIT License
+'''
+
+from statistics import NormalDist
+
+import numpy as np
+import torch
+
+from gym_copter.envs.vector import VectorLander3D
+
+
+def evaluate(policy, episodes=100, seed=None, max_episode_steps=400):
+    '''
+    @param policy torch module (or function) mapping a batch of
+                  observations to a batch of actions
+    @param episodes number of episodes, all run at once
+    @param seed random seed; use the same seed to compare policies on the
+                same initial conditions
+    @param max_episode_steps steps per episode, as for Lander3D-v0
+    @return array of total reward per episode
+    '''
+
+    env = VectorLander3D(episodes, max_episode_steps=max_episode_steps)
+    env.seed(seed)
+
+    # Tensor view of the observation buffer, filled in place each step
+    observations = np.zeros((episodes, env.observation_space.shape[0]),
+                            dtype=np.float32)
+    tensor = torch.from_numpy(observations)
+
+    observations[:] = env.reset()
+
+    with torch.no_grad():
+
+        while not env.done:
+
+            actions = policy(tensor).numpy()
+
+            state, _, _, _ = env.step(np.clip(actions, -1, 1))
+
+            observations[:] = state
+
+    return env.fitness
+
+
+def summarize(returns, confidence=0.95):
+    '''
+    @param returns array of episode returns
+    @param confidence level for the confidence interval of the mean
+    @return dictionary of episodes, mean, std, ci_low, ci_high (normal
+            approximation)
+    '''
+
+    returns = np.asarray(returns, dtype=float)
+
+    n = len(returns)
+    mean = float(np.mean(returns))
+    std = float(np.std(returns, ddof=1)) if n > 1 else 0.0
+
+    halfwidth = NormalDist().inv_cdf(0.5 + confidence / 2) * std / np.sqrt(n)
+
+    return {'episodes': n,
+            'mean': mean,
+            'std': std,
+            'ci_low': mean - halfwidth,
+            'ci_high': mean + halfwidth}
@@ -0,0 +1,268 @@
+'''
+Population evaluation for NEAT feed-forward networks
+
+NetworkBatch compiles a list of neat-python FeedForwardNetworks into padded
+NumPy arrays (one row per network, one column per node evaluation) so that
+the whole population is activated with a few array operations per node
+rather than a Python loop per network.  evaluate() uses it to fly every
+genome at once on a VectorLander3D and returns the vector of fitnesses.
+
+Networks are read through their input_nodes, output_nodes and node_evals
+attributes, so neat-python itself is not imported.  The built-in
+neat-python activation and aggregation functions are supported.
+
+Copyright (C) 2021 Simon D. Levy
+
+MIT License
+'''
+
+import numpy as np
+
+from gym_copter.envs.vector import VectorLander3D
+
+
+def _clip(z, lo, hi):
+
+    return np.clip(z, lo, hi)
+
+
+def _inv(z):
+
+    with np.errstate(divide='ignore'):
+        return np.where(z == 0, 0.0, 1 / np.where(z == 0, 1, z))
+
+
+# NumPy versions of neat.activations, by function name
+ACTIVATIONS = {
+    'sigmoid_activation':
+        lambda z: 1 / (1 + np.exp(-_clip(5 * z, -60, 60))),
+    'tanh_activation':
+        lambda z: np.tanh(_clip(2.5 * z, -60, 60)),
+    'sin_activation':
+        lambda z: np.sin(_clip(5 * z, -60, 60)),
+    'gauss_activation':
+        lambda z: np.exp(-5 * _clip(z, -3.4, 3.4)**2),
+    'relu_activation':
+        lambda z: np.where(z > 0, z, 0.0),
+    'elu_activation':
+        lambda z: np.where(z > 0, z, np.exp(np.minimum(z, 0)) - 1),
+    'lelu_activation':
+        lambda z: np.where(z > 0, z, 0.005 * z),
+    'selu_activation':
+        lambda z: 1.0507009873554804934193349852946 * np.where(
+            z > 0, z,
+            1.6732632423543772848170429916717 * (np.exp(np.minimum(z, 0)) -
+                                                 1)),
+    'softplus_activation':
+        lambda z: 0.2 * np.log(1 + np.exp(_clip(5 * z, -60, 60))),
+    'identity_activation':
+        lambda z: z,
+    'clamped_activation':
+        lambda z: _clip(z, -1, 1),
+    'inv_activation':
+        _inv,
+    'log_activation':
+        lambda z: np.log(np.maximum(z, 1e-7)),
+    'exp_activation':
+        lambda z: np.exp(_clip(z, -60, 60)),
+    'abs_activation':
+        np.abs,
+    'hat_activation':
+        lambda z: np.maximum(0, 1 - np.abs(z)),
+    'square_activation':
+        lambda z: z**2,
+    'cube_activation':
+        lambda z: z**3,
+}
+
+
+def _maxabs(x):
+
+    k = np.nanargmax(np.abs(x), axis=1)
+
+    return x[np.arange(len(x)), k]
+
+
+# NumPy versions of neat.aggregations over NaN-padded rows, by function name
+AGGREGATIONS = {
+    'sum_aggregation': lambda x: np.nansum(x, axis=1),
+    'product_aggregation': lambda x: np.nanprod(x, axis=1),
+    'max_aggregation': lambda x: np.nanmax(x, axis=1),
+    'min_aggregation': lambda x: np.nanmin(x, axis=1),
+    'maxabs_aggregation': _maxabs,
+    'median_aggregation': lambda x: np.nanmedian(x, axis=1),
+    'mean_aggregation': lambda x: np.nanmean(x, axis=1),
+}
+
+# Aggregation of no links, where it is not zero
+EMPTY_AGGREGATIONS = {'product_aggregation': 1.0}
+
+
+def _lookup(table, fun, kind):
+
+    name = getattr(fun, '__name__', None)
+
+    if name not in table:
+        raise ValueError('Cannot vectorize %s function %r' % (kind, fun))
+
+    return name
+
+
+class NetworkBatch:
+
+    def __init__(self, nets):
+        '''
+        @param nets list of neat.nn.FeedForwardNetwork, all with the same
+                    numbers of inputs and outputs
+        '''
+
+        self.input_size = len(nets[0].input_nodes)
+        self.output_size = len(nets[0].output_nodes)
+
+        for net in nets:
+            if (len(net.input_nodes) != self.input_size or
+                    len(net.output_nodes) != self.output_size):
+                raise ValueError('Networks must have the same inputs and '
+                                 'outputs')
+
+        count = len(nets)
+        steps = max(len(net.node_evals) for net in nets)
+        width = max([len(links)
+                     for net in nets
+                     for _, _, _, _, _, links in net.node_evals] + [1])
+
+        # Value columns: inputs, then one per node evaluation, then a column
+        # that stays zero for nodes that are never evaluated
+        self.zero = self.input_size + steps
+        self.columns = self.zero + 1
+
+        self.sources = np.full((count, steps, width), self.zero)
+        self.weights = np.zeros((count, steps, width))
+        self.valid = np.zeros((count, steps, width), dtype=bool)
+        self.biases = np.zeros((count, steps))
+        self.responses = np.zeros((count, steps))
+        self.outputs = np.full((count, self.output_size), self.zero)
+
+        activations = np.full((count, steps), 'identity_activation',
+                              dtype=object)
+        aggregations = np.full((count, steps), 'sum_aggregation',
+                               dtype=object)
+
+        for i, net in enumerate(nets):
+
+            column = {key: k for k, key in enumerate(net.input_nodes)}
+
+            for j, (node, act, agg, bias, response, links) in \
+                    enumerate(net.node_evals):
+
+                activations[i, j] = _lookup(ACTIVATIONS, act, 'activation')
+                aggregations[i, j] = _lookup(AGGREGATIONS, agg, 'aggregation')
+
+                self.biases[i, j] = bias
+                self.responses[i, j] = response
+
+                for k, (source, weight) in enumerate(links):
+                    self.sources[i, j, k] = column.get(source, self.zero)
+                    self.weights[i, j, k] = weight
+                    self.valid[i, j, k] = True
+
+                column[node] = self.input_size + j
+
+            self.outputs[i] = [column.get(key, self.zero)
+                               for key in net.output_nodes]
+
+        # Group networks by function at each step, so that each function is
+        # called once per step
+        self.activations = [NetworkBatch._group(activations[:, j])
+                            for j in range(steps)]
+        self.aggregations = [NetworkBatch._group(aggregations[:, j])
+                             for j in range(steps)]
+
+        # Gather link values from the flattened value array, one contiguous
+        # index array per step
+        rows = np.arange(count)[:, None] * self.columns
+        self.gathers = [np.ascontiguousarray(rows + self.sources[:, j])
+                        for j in range(steps)]
+        self.results = rows + self.outputs
+
+    def __len__(self):
+
+        return len(self.outputs)
+
+    def activate(self, inputs):
+        '''
+        @param inputs networks X input_size array, one row per network
+        @return networks X output_size array of outputs
+        '''
+
+        values = np.zeros((len(self), self.columns))
+        values[:, :self.input_size] = inputs
+
+        flat = values.ravel()
+
+        layers = zip(self.activations, self.aggregations)
+
+        for j, (activations, aggregations) in enumerate(layers):
+
+            x = flat.take(self.gathers[j]) * self.weights[:, j]
+
+            s = np.zeros(len(self))
+
+            for name, rows in aggregations:
+
+                if name == 'sum_aggregation':
+                    s[rows] = np.sum(x[rows], axis=1)
+                    continue
+
+                # Other aggregations see only real links
+                padded = np.where(self.valid[rows, j], x[rows], np.nan)
+                linked = np.any(self.valid[rows, j], axis=1)
+                result = np.full(len(padded),
+                                 EMPTY_AGGREGATIONS.get(name, 0.0))
+                result[linked] = AGGREGATIONS[name](padded[linked])
+                s[rows] = result
+
+            z = self.biases[:, j] + self.responses[:, j] * s
+
+            for name, rows in activations:
+                values[rows, self.input_size + j] = ACTIVATIONS[name](z[rows])
+
+        return flat.take(self.results)
+
+    def _group(names):
+
+        unique = np.unique(names)
+
+        # A single function applies to every row
+        if len(unique) == 1:
+            return [(unique[0], slice(None))]
+
+        return [(name, np.flatnonzero(names == name)) for name in unique]
+
+
+def evaluate(nets, episodes=1, seed=None, max_episode_steps=400):
+    '''
+    Flies every network on a VectorLander3D at once
+    @param nets list of neat.nn.FeedForwardNetwork
+    @param episodes number of episodes per network
+    @param seed random seed
+    @param max_episode_steps steps per episode, as for Lander3D-v0
+    @return array of mean total reward per network
+    '''
+
+    batch = NetworkBatch([net for net in nets for _ in range(episodes)])
+
+    env = VectorLander3D(len(batch), max_episode_steps=max_episode_steps)
+
+    if batch.input_size != env.observation_space.shape[0]:
+        raise ValueError('Networks take %d inputs; Lander3D provides %d' %
+                         (batch.input_size, env.observation_space.shape[0]))
+
+    env.seed(seed)
+
+    state = env.reset()
+
+    while not env.done:
+        state, _, _, _ = env.step(batch.activate(state))
+
+    return env.fitness.reshape(len(nets), episodes).mean(axis=1)
@@ -0,0 +1,145 @@
+'''
+NumPy-only inference for trained actor networks
+
+export() saves the linear layers of a PyTorch actor's state_dict (e.g.,
+ModelActor or a TD3 actor) to a compressed .npz file of float32 weights,
+and MLPPolicy loads that file and runs the network with NumPy alone, on a
+single observation or a batch of them.  Workers that only fly trained
+policies therefore never import torch.
+
+Copyright (C) 2021 Simon D. Levy
+
+MIT License
+'''
+
+import numpy as np
+
+ACTIVATIONS = {
+    'tanh': np.tanh,
+    'relu': lambda x: np.maximum(x, 0, out=x),
+    'identity': lambda x: x,
+}
+
+
+def export(state_dict, filename, hidden='tanh', output='tanh', scale=1.0):
+    '''
+    @param state_dict state dictionary of the actor, whose linear layers
+                      appear as <name>.weight, <name>.bias pairs in order
+    @param filename output .npz file name
+    @param hidden activation after each hidden layer
+    @param output activation after the last layer
+    @param scale factor applied to the output (e.g., maximum action)
+    @return number of layers saved
+    '''
+
+    for name in (hidden, output):
+        if name not in ACTIVATIONS:
+            raise ValueError('Activation must be one of %s' %
+                             (tuple(ACTIVATIONS),))
+
+    arrays = {}
+    layers = 0
+
+    for key, value in state_dict.items():
+
+        # Skip anything but linear weights, like ModelActor's logstd
+        if not key.endswith('.weight') or len(value.shape) != 2:
+            continue
+
+        bias = state_dict[key[:-len('weight')] + 'bias']
+
+        arrays['weight%d' % layers] = _to_numpy(value)
+        arrays['bias%d' % layers] = _to_numpy(bias)
+        layers += 1
+
+    if layers == 0:
+        raise ValueError('No linear layers in state dictionary')
+
+    np.savez_compressed(filename,
+                        hidden=hidden,
+                        output=output,
+                        scale=scale,
+                        **arrays)
+
+    return layers
+
+
+def _to_numpy(tensor):
+
+    # Accept torch tensors without importing torch
+    if hasattr(tensor, 'detach'):
+        tensor = tensor.detach().cpu().numpy()
+
+    return np.asarray(tensor, dtype=np.float32)
+
+
+class MLPPolicy:
+
+    def __init__(self, filename):
+        '''
+        @param filename .npz file written by export()
+        '''
+
+        with np.load(filename) as data:
+
+            layers = sum(1 for key in data.files if key.startswith('weight'))
+
+            # Store transposed weights, so each layer is x @ W + b
+            self.weights = [np.ascontiguousarray(data['weight%d' % k].T)
+                            for k in range(layers)]
+            self.biases = [data['bias%d' % k] for k in range(layers)]
+
+            self.hidden = ACTIVATIONS[str(data['hidden'])]
+            self.output = ACTIVATIONS[str(data['output'])]
+            self.scale = float(data['scale'])
+
+        self.input_size = self.weights[0].shape[0]
+        self.output_size = self.weights[-1].shape[1]
+
+    def __call__(self, observations):
+        '''
+        @param observations one observation or a batch (one per row)
+        @return action(s), clipped to [-1, +1]
+        '''
+
+        x = np.asarray(observations, dtype=np.float32)
+
+        last = len(self.weights) - 1
+
+        for k, (w, b) in enumerate(zip(self.weights, self.biases)):
+            x = x @ w
+            x += b
+            x = (self.output if k == last else self.hidden)(x)
+
+        return np.clip(self.scale * x, -1, 1)
+
+
+def fly(policy, env, render=False):
+    '''
+    Runs one episode of a gym_copter environment (or all of a
+    VectorLander3D's episodes at once)
+    @param policy function from observations to actions, e.g. MLPPolicy
+    @param env environment
+    @param render whether to render each step
+    @return total reward (per episode), number of steps
+    '''
+
+    obs = env.reset()
+
+    total_reward = 0
+    steps = 0
+
+    while True:
+
+        obs, reward, done, _ = env.step(policy(obs))
+
+        total_reward += reward
+        steps += 1
+
+        if render:
+            env.render()
+
+        if np.all(done):
+            break
+
+    return total_reward, steps
@@ -0,0 +1,106 @@
+'''
+Helpers for drawing with pyglet Batches inside a gym rendering.Viewer
+
+Copyright (C) 2021 Simon D. Levy
+
+MIT License
+'''
+
+from pyglet.gl import glTranslatef, glRotatef, glPushMatrix, glPopMatrix
+from pyglet.gl import glLineWidth, GL_LINES, GL_TRIANGLES
+from pyglet.graphics import OrderedGroup
+from pyglet.text import Label
+
+
+class BatchGeom:
+    '''
+    Lets the Viewer draw a pyglet Batch as one persistent geom
+    '''
+
+    def __init__(self, batch):
+        self.batch = batch
+
+    def render(self):
+        self.batch.draw()
+
+
+class LineWidthGroup(OrderedGroup):
+
+    def __init__(self, order, width, parent=None):
+        OrderedGroup.__init__(self, order, parent)
+        self.width = width
+
+    def set_state(self):
+        glLineWidth(self.width)
+
+    def unset_state(self):
+        glLineWidth(1)
+
+
+class RotationGroup(OrderedGroup):
+    '''
+    Rotates children by angle degrees about (x, y), then shifts them by xoff
+    along the rotated X axis
+    '''
+
+    def __init__(self, order, x, y, angle=0, xoff=0, parent=None):
+        OrderedGroup.__init__(self, order, parent)
+        self.x = x
+        self.y = y
+        self.angle = angle
+        self.xoff = xoff
+
+    def set_state(self):
+        glPushMatrix()
+        glTranslatef(self.x, self.y, 0)
+        glRotatef(self.angle, 0.0, 0.0, 1.0)
+        glTranslatef(self.xoff, 0, 0)
+
+    def unset_state(self):
+        glPopMatrix()
+
+
+def flatten(points):
+    return [c for point in points for c in point]
+
+
+def colors(color, n):
+    return ('c3B', [int(255*c) for c in color] * n)
+
+
+def add_lines(batch, group, segments, color):
+    '''
+    @param segments list of ((x1, y1), (x2, y2))
+    '''
+    return batch.add(2*len(segments), GL_LINES, group,
+                     ('v2f', flatten([p for s in segments for p in s])),
+                     colors(color, 2*len(segments)))
+
+
+def add_outline(batch, group, points, color):
+    return add_lines(batch, group,
+                     list(zip(points, points[1:] + points[:1])),
+                     color)
+
+
+def add_fan(batch, group, points, color):
+    '''
+    Adds a convex polygon as a triangle fan
+    '''
+    triangles = [p
+                 for k in range(1, len(points)-1)
+                 for p in (points[0], points[k], points[k+1])]
+    return batch.add(len(triangles), GL_TRIANGLES, group,
+                     ('v2f', flatten(triangles)),
+                     colors(color, len(triangles)))
+
+
+def add_label(batch, group, text, x, y, font_size, color):
+    return Label(text,
+                 x=x, y=y,
+                 font_size=font_size,
+                 color=color,
+                 anchor_x='center',
+                 anchor_y='center',
+                 batch=batch,
+                 group=group)
@@ -1,5 +1,10 @@
 '''
-Heads-Up Display using gym.envs.classic_control.rendering / pyglet
+Heads-Up Display using gym.envs.classic_control.rendering / pyglet, or the
+NumPy software rasterizer for headless rgb_array rendering
+
+Static elements and text labels are built once (into a pyglet Batch, or a
+pre-rasterized overlay).  Each frame then only updates the elements that
+depend on the vehicle state.
 
 Copyright (C) 2019 Simon D. Levy
 
@@ -7,42 +12,15 @@ MIT License
 '''
 
 import numpy as np
-from gym.envs.classic_control import rendering
-from pyglet.gl import glTranslatef, glLoadIdentity, glRotatef
-from pyglet.text import Label
-
-
-class _DrawText:
-    '''
-    https://stackoverflow.com/questions/56744840
-    '''
-
-    def __init__(self, label):
-        self.label = label
-
-    def render(self):
-        self.label.draw()
 
-
-class _DrawTextRotated:
-
-    def __init__(self, label, x, y, angle, xoff=0):
-        self.label = label
-        self.x = x
-        self.y = y
-        self.angle = angle
-        self.xoff = xoff
-
-    def render(self):
-        glTranslatef(self.x, self.y, 0)
-        glRotatef(self.angle, 0.0, 0.0, 1.0)
-        glTranslatef(self.xoff, 0, 0)
-        self.label.draw()
-        glLoadIdentity()  # Restores ordinary drawing
+from gym_copter.rendering.raster import make_viewer
 
 
 class HUD:
 
+    # Simulation should sleep to keep pace with the display
+    paced = True
+
     # Arbitrary constants
     W = 800  # window width
     H = 600  # window height
@@ -73,6 +51,7 @@ class HUD:
     VERTICAL_STEP_PIXELS = 8
     VERTICAL_TITLE_X_OFFSET = 45
     VERTICAL_TITLE_Y_OFFSET = 20
+    VERTICAL_TICK_COUNT = 7
     ROLL_RETICLE_RADIUS = 300
     ROLL_RETICLE_LIM = 45
     ROLL_RETICLE_PTS = 100
@@ -85,52 +64,152 @@ class HUD:
     TIME_LABEL_X = 400
     TIME_LABEL_Y = 50
 
+    # Left edges of the altitude and groundspeed gauges, and their strips
+    ALT_LEFT_X = W - VERTICAL_BOX_WIDTH
+    ALT_STRIP_X = W - VERTICAL_BOX_WIDTH + 1
+    GS_LEFT_X = 10
+    GS_STRIP_X = -VERTICAL_POINTER_HEIGHT
+
     def _rotate(x, y, angle):
         angle = np.radians(angle)
         return (np.cos(angle)*x - np.sin(angle)*y,
                 np.sin(angle)*x + np.cos(angle)*y)
 
     def _tickval2index(tickval, tickvals):
-        return int((HUD.ROLL_RETICLE_PTS-1) *
-                   (tickval-tickvals[0]) / (tickvals[-1]-tickvals[0]))
+        index = int((HUD.ROLL_RETICLE_PTS-1) *
+                    (tickval-tickvals[0]) / (tickvals[-1]-tickvals[0]))
+
+        # Values past the end ticks (e.g., roll beyond the reticle) stick to
+        # the nearest end, rather than raising IndexError or wrapping around
+        # as they once did
+        return min(max(index, 0), HUD.ROLL_RETICLE_PTS-1)
+
+    # Geometry ---------------------------------------------------------------
+    #
+    # These functions compute HUD elements in window coordinates (origin at
+    # bottom left) independently of any drawing backend.
+
+    def _ground(pitch, roll):
+        '''
+        Ground quadrilateral: center vertical depends on pitch, left and
+        right top depend on roll
+        '''
+
+        cx = HUD.W/2
+        gcy = (HUD.H/2 +
+               pitch * HUD.PITCH_RETICLE_SPACING / HUD.PITCH_RETICLE_INCREMENT)
+
+        dx, dy = HUD._rotate(HUD.W, 0, roll)
+        x1 = cx - dx
+        y1 = gcy - dy
+        x2 = cx + dx
+        y2 = gcy + dy
 
-    def _add_label(viewer, label):
-        viewer.add_onetime(_DrawText(label))
+        return [(x1, y1), (x2, y2), (x2, y2-2*HUD.H), (x1, y1-2*HUD.H)]
 
-    def _add_label_rotated(viewer, label, x, y, angle, xoff=0):
-        viewer.add_onetime(_DrawTextRotated(label, x, y, angle, xoff))
+    def _pitch_reticle():
+        '''
+        Pitch reticle line segments and (text, x, y) labels, relative to the
+        window center before rotation by roll
+        '''
 
-    def _vertical_display(viewer, leftx, stripx, value, title):
+        segments = []
+        labels = []
 
-        dy = HUD.VERTICAL_POINTER_HEIGHT
+        for i in range(-3, 4):
 
-        # Display a tapered strip in the middle for highlighting current value
+            x1 = 0
+            y1 = i * HUD.PITCH_RETICLE_SPACING
+
+            # Alternate the line lengths
+            x2 = (x1 +
+                  HUD.PITCH_RETICLE_WIDTH + (1-(i % 2)) *
+                  HUD.PITCH_RETICLE_WIDTH/2)
+            y2 = y1
+
+            segments.append(((x1, y1), (x2, y2)))
+            segments.append(((-x1, -y1), (-x2, -y2)))
+
+            # Add a label on the left of every other tick
+            if i % 2 == 0:
+                labels.append((
+                    ('%+3d' % (-i*HUD.PITCH_RETICLE_INCREMENT)).center(3),
+                    -x2-HUD.PITCH_LABEL_X_OFFSET,
+                    -y2-HUD.PITCH_LABEL_Y_OFFSET))
+
+        return segments, labels
+
+    def _heading_line():
+
+        y = HUD.H-HUD.HEADING_LINE_Y_OFFSET
+
+        return (0, y), (HUD.W, y)
+
+    def _heading_box():
+
+        y = HUD.H-HUD.HEADING_LINE_Y_OFFSET
+
+        return [(HUD.W/2-HUD.HEADING_BOX_WIDTH, y),
+                (HUD.W/2+HUD.HEADING_BOX_WIDTH, y),
+                (HUD.W/2+HUD.HEADING_BOX_WIDTH, HUD.H),
+                (HUD.W/2-HUD.HEADING_BOX_WIDTH, HUD.H)]
+
+    def _heading_labels(heading):
+        '''
+        (text, x, y) for each compass label
+        '''
+
+        d = HUD.HEADING_TICK_SPACING * HUD.HEADING_TICK_COUNT
+
+        return [(('%d' % (i*360//HUD.HEADING_TICK_COUNT)).center(3),
+                 ((HUD.W/2 - heading*d/360 +
+                   HUD.HEADING_TICK_SPACING*i) % d),
+                 HUD.H-HUD.HEADING_LABEL_Y_OFFSET)
+                for i in range(HUD.HEADING_TICK_COUNT)]
+
+    def _vertical_strip(stripx):
+        '''
+        Tapered strip in the middle of a gauge for highlighting current value
+        '''
+
+        dy = HUD.VERTICAL_POINTER_HEIGHT
         stripw = HUD.VERTICAL_BOX_WIDTH + dy
-        x1, y1 = stripx, 0+HUD.H/2
-        x2, y2 = stripx+dy, dy+HUD.H/2
-        x3, y3 = stripx+stripw-dy, dy+HUD.H/2
-        x4, y4 = stripx+stripw, 0+HUD.H/2
-        x5, y5 = stripx+stripw-dy, -dy+HUD.H/2
-        x6, y6 = stripx+dy, -dy+HUD.H/2
-        viewer.draw_polygon([(x1, y1),
-                             (x2, y2),
-                             (x3, y3),
-                             (x4, y4),
-                             (x5, y5),
-                             (x6, y6)],
-                            color=HUD.HIGHLIGHT_COLOR)
-
-        # Display a box for the gauge
+
+        return [(stripx, HUD.H/2),
+                (stripx+dy, dy+HUD.H/2),
+                (stripx+stripw-dy, dy+HUD.H/2),
+                (stripx+stripw, HUD.H/2),
+                (stripx+stripw-dy, -dy+HUD.H/2),
+                (stripx+dy, -dy+HUD.H/2)]
+
+    def _vertical_box(leftx):
+
         lx = leftx
         rx = lx + HUD.VERTICAL_BOX_WIDTH
         b = HUD.H/2 - HUD.VERTICAL_BOX_HEIGHT/2
         t = HUD.H/2 + HUD.VERTICAL_BOX_HEIGHT/2
-        viewer.draw_polygon([(lx, t), (rx, t), (rx, b), (lx, b)],
-                            color=HUD.LINE_COLOR, linewidth=2, filled=False)
 
-        # Display the current values in the box
+        return [(lx, t), (rx, t), (rx, b), (lx, b)]
+
+    def _vertical_title(leftx):
+
+        return (leftx+HUD.VERTICAL_TITLE_X_OFFSET,
+                (HUD.H/2-HUD.VERTICAL_BOX_HEIGHT/2 -
+                 HUD.VERTICAL_TITLE_Y_OFFSET))
+
+    def _vertical_labels(leftx, value):
+        '''
+        (text, x, y, alpha) for each of the values shown in a gauge, with
+        None for values that fall below the bottom of the box
+        '''
+
+        labels = []
+
         closest = value // HUD.VERTICAL_STEP_METERS * HUD.VERTICAL_STEP_METERS
-        for k in range(-3, 4):
+
+        for k in range(-(HUD.VERTICAL_TICK_COUNT//2),
+                       HUD.VERTICAL_TICK_COUNT//2+1):
+
             tickval = closest+k*HUD.VERTICAL_STEP_METERS
             diff = tickval - value
             dy = diff*HUD.VERTICAL_STEP_PIXELS
@@ -140,33 +219,105 @@ class HUD:
                         (HUD.VERTICAL_BOX_HEIGHT/2.))
 
             # Avoid putting tick label below bottom of box
-            if dy > -HUD.VERTICAL_BOX_HEIGHT/2+20:
-                label = Label(('%3d' % tickval).center(3),
-                              x=lx+HUD.VERTICAL_LABEL_OFFSET,
-                              y=HUD.H/2+dy,
-                              font_size=HUD.FONT_SIZE,
-                              color=(*HUD.FONT_COLOR, alpha),
-                              anchor_x='center',
-                              anchor_y='center')
-                viewer.add_onetime(_DrawText(label))
-
-        # Add a title at the bottom
-        HUD._add_label(viewer,
-                       Label(title,
-                             x=lx+HUD.VERTICAL_TITLE_X_OFFSET,
-                             y=(HUD.H/2-HUD.VERTICAL_BOX_HEIGHT/2 -
-                                HUD.VERTICAL_TITLE_Y_OFFSET),
-                             font_size=HUD.FONT_SIZE,
-                             color=(*HUD.FONT_COLOR, 255),
-                             anchor_x='center', anchor_y='center'))
-
-    def __init__(self, env):
+            labels.append((('%3d' % tickval).center(3),
+                           leftx+HUD.VERTICAL_LABEL_OFFSET,
+                           HUD.H/2+dy,
+                           min(max(alpha, 0), 255))
+                          if dy > -HUD.VERTICAL_BOX_HEIGHT/2+20
+                          else None)
+
+        return labels
+
+    def _roll_reticle():
+        '''
+        Roll reticle arc points, tick segments, tick values, and
+        (text, x, y, angle, xoff) labels
+        '''
+
+        angles = np.linspace(np.radians(180-HUD.ROLL_RETICLE_LIM),
+                             np.radians(HUD.ROLL_RETICLE_LIM),
+                             HUD.ROLL_RETICLE_PTS)
+        points = [(np.cos(a)*HUD.ROLL_RETICLE_RADIUS+HUD.W/2,
+                   np.sin(a)*HUD.ROLL_RETICLE_RADIUS+HUD.ROLL_RETICLE_YOFF)
+                  for a in angles]
+
+        tickvals = np.append(-np.array(HUD.ROLL_RETICLE_TICKVALS[::-1]),
+                             [0] + HUD.ROLL_RETICLE_TICKVALS)
+
+        segments = []
+        labels = []
+
+        for tickval in tickvals:
+            k = HUD._tickval2index(tickval, tickvals)
+            x1, y1 = points[k]
+            x2, y2 = x1, y1+HUD.ROLL_RETICLE_TICKLEN
+            rangle = (-HUD.ROLL_RETICLE_TICKVALS[-1] /
+                      HUD.ROLL_RETICLE_LIM*tickval)
+            xr, yr = HUD._rotate(0, HUD.ROLL_RETICLE_TICKLEN, rangle)
+            segments.append(((x1, y1), (x2+xr, y2+yr)))
+            labels.append((('%2d' % abs(tickval)).center(3),
+                           x2,
+                           y2 + HUD.ROLL_RETICLE_TICK_YOFF,
+                           rangle/2,
+                           -(6 if rangle == 0 else rangle/3.82)))
+
+        return points, segments, tickvals, labels
+
+    def _roll_pointer(roll, points, tickvals):
+        '''
+        Rotated pointer below the current angle in the roll reticle
+        '''
+
+        x, y = points[HUD._tickval2index(roll, tickvals)]
+        x1, y1 = HUD._rotate(-HUD.ROLL_POINTER_SIZE, 0, -roll)
+        x2, y2 = HUD._rotate(HUD.ROLL_POINTER_SIZE, 0, -roll)
+        x3, y3 = HUD._rotate(0, HUD.ROLL_POINTER_SIZE, -roll)
+        y -= HUD.ROLL_POINTER_SIZE
+
+        return [(x+x1, y+y1), (x+x2, y+y2), (x+x3, y+y3)]
+
+
+    # Construction -----------------------------------------------------------
+
+    def __init__(self, env, backend='gl'):
+        '''
+        @param env environment whose dynamics we display
+        @param backend 'gl' or 'software' (see rendering.raster.make_viewer)
+        '''
 
         env = env.unwrapped
         self.env = env
         self.env.viewer = self
 
-        self.viewer = rendering.Viewer(HUD.W, HUD.H)
+        self.backend = backend
+
+        self.viewer = make_viewer(HUD.W, HUD.H, backend)
+
+        self.roll_points, self.roll_segments, self.roll_tickvals, \
+            self.roll_labels = HUD._roll_reticle()
+
+        self.pitch_segments, self.pitch_labels = HUD._pitch_reticle()
+
+        if backend == 'software':
+            self._build_software()
+        else:
+            self._build_gl()
+
+    def _build_gl(self):
+        '''
+        Creates every HUD element once in a pyglet Batch; render() updates
+        the dynamic ones
+        '''
+
+        import pyglet
+        from pyglet.gl import GL_QUADS
+        from pyglet.graphics import OrderedGroup
+        from gym.envs.classic_control import rendering
+        from gym_copter.rendering import glbatch
+
+        def add_label(group, text, x=0, y=0, font_size=HUD.FONT_SIZE):
+            return glbatch.add_label(batch, group, text, x, y, font_size,
+                                     (*HUD.FONT_COLOR, 255))
 
         # Add sky as backround
         sky = rendering.FilledPolygon([(0, HUD.H),
@@ -176,6 +327,116 @@ class HUD:
         sky.set_color(*HUD.SKY_COLOR)
         self.viewer.add_geom(sky)
 
+        batch = pyglet.graphics.Batch()
+
+        # Drawing order
+        ground_group = OrderedGroup(0)
+        fill_group = OrderedGroup(1)
+        thin_group = glbatch.LineWidthGroup(2, 1)
+        thick_group = glbatch.LineWidthGroup(3, 2)
+        self.pitch_group = glbatch.RotationGroup(4, HUD.W/2, HUD.H/2)
+        pointer_group = OrderedGroup(5)
+        label_group = OrderedGroup(6)
+
+        # Ground quadrilateral, whose vertices follow pitch and roll
+        self.ground = batch.add(4, GL_QUADS, ground_group,
+                                ('v2f', [0] * 8),
+                                glbatch.colors(HUD.GROUND_COLOR, 4))
+
+        # Pitch reticle and labels, rotated as a unit by roll
+        glbatch.add_lines(batch,
+                          glbatch.LineWidthGroup(0, 2, self.pitch_group),
+                          self.pitch_segments,
+                          HUD.LINE_COLOR)
+        pitch_label_group = OrderedGroup(1, self.pitch_group)
+        for text, x, y in self.pitch_labels:
+            add_label(pitch_label_group, text, x, y)
+
+        # Heading line, center box, and compass labels
+        glbatch.add_lines(batch, thin_group, [HUD._heading_line()],
+                          HUD.LINE_COLOR)
+        glbatch.add_fan(batch, fill_group, HUD._heading_box(),
+                        HUD.HIGHLIGHT_COLOR)
+        self.heading_labels = [add_label(label_group, text, x, y)
+                               for text, x, y in HUD._heading_labels(0)]
+
+        # Altitude and groundspeed gauges
+        self.gauge_labels = {}
+        for leftx, stripx, title in HUD._gauges():
+            glbatch.add_fan(batch, fill_group, HUD._vertical_strip(stripx),
+                            HUD.HIGHLIGHT_COLOR)
+            glbatch.add_outline(batch, thick_group, HUD._vertical_box(leftx),
+                                HUD.LINE_COLOR)
+            self.gauge_labels[leftx] = [
+                add_label(label_group, '')
+                for _ in range(HUD.VERTICAL_TICK_COUNT)]
+            add_label(label_group, title, *HUD._vertical_title(leftx))
+
+        # Roll reticle, with each tick label rotated in its own group
+        glbatch.add_lines(batch, thick_group,
+                          list(zip(self.roll_points[:-1],
+                                   self.roll_points[1:])),
+                          HUD.LINE_COLOR)
+        glbatch.add_lines(batch, thick_group, self.roll_segments,
+                          HUD.LINE_COLOR)
+        for k, (text, x, y, angle, xoff) in enumerate(self.roll_labels):
+            add_label(glbatch.RotationGroup(7+k, x, y, angle, xoff), text)
+
+        # Roll pointer, whose vertices follow roll
+        self.roll_pointer = glbatch.add_fan(batch, pointer_group,
+                                            [(0, 0)] * 3,
+                                            HUD.POINTER_COLOR)
+
+        # Time display at bottom
+        self.time_label = add_label(label_group, '',
+                                    HUD.TIME_LABEL_X, HUD.TIME_LABEL_Y,
+                                    HUD.LARGE_FONT_SIZE)
+
+        self.viewer.add_geom(glbatch.BatchGeom(batch))
+
+    def _build_software(self):
+        '''
+        Pre-rasterizes the static HUD elements into an overlay that render()
+        composites over the sky and ground
+        '''
+
+        self.viewer.clear(HUD.SKY_COLOR)
+
+        overlay = make_viewer(HUD.W, HUD.H, 'software')
+
+        x1, x2 = HUD._heading_line()
+        overlay.draw_line(x1, x2, color=HUD.LINE_COLOR)
+        overlay.draw_polygon(HUD._heading_box(), color=HUD.HIGHLIGHT_COLOR)
+
+        for leftx, stripx, title in HUD._gauges():
+            overlay.draw_polygon(HUD._vertical_strip(stripx),
+                                 color=HUD.HIGHLIGHT_COLOR)
+            overlay.draw_polygon(HUD._vertical_box(leftx),
+                                 color=HUD.LINE_COLOR, linewidth=2,
+                                 filled=False)
+            overlay.draw_text(title, *HUD._vertical_title(leftx),
+                              HUD.FONT_SIZE)
+
+        overlay.draw_polyline(self.roll_points, color=HUD.LINE_COLOR,
+                              linewidth=2)
+        for x1, x2 in self.roll_segments:
+            overlay.draw_line(x1, x2, color=HUD.LINE_COLOR, linewidth=2)
+        for text, x, y, angle, xoff in self.roll_labels:
+            overlay.draw_text(text, x, y, HUD.FONT_SIZE,
+                              angle=angle, xoff=xoff)
+
+        self.overlay = overlay
+
+    def _gauges():
+        '''
+        (left edge, strip position, title) for altitude and groundspeed
+        '''
+
+        return ((HUD.ALT_LEFT_X, HUD.ALT_STRIP_X, 'Alt (m)'),
+                (HUD.GS_LEFT_X, HUD.GS_STRIP_X, 'GS (m/s)'))
+
+    # Rendering --------------------------------------------------------------
+
     def render(self, mode):
 
         # Get state from environment's dynamics
@@ -185,175 +446,94 @@ class HUD:
         # Extract pitch, roll, heading, converting them from radians to degrees
         pitch, roll, heading = np.degrees(state[6:12:2])
 
-        # Get center coordinates
-        cx, cy = HUD.W/2, HUD.H/2
+        # Altitude (negate to accommodate NED) and groundspeed
+        gauges = {HUD.ALT_LEFT_X: -state[4],
+                  HUD.GS_LEFT_X: np.sqrt(state[1]**2 + state[3]**2)}
 
-        # Center vertical of ground depends on pitch
-        gcy = (HUD.H/2 +
-               pitch * HUD.PITCH_RETICLE_SPACING / HUD.PITCH_RETICLE_INCREMENT)
+        time = 'Time: %3.2f' % dynamics.getTime()
 
-        # Left and right top of ground quadrilateral depend on roll
-        dx, dy = HUD._rotate(HUD.W, 0, roll)
-        x1 = cx - dx
-        y1 = gcy - dy
-        x2 = cx + dx
-        y2 = gcy + dy
+        if self.backend == 'software':
+            self._render_software(pitch, roll, heading, gauges, time)
+        else:
+            self._render_gl(pitch, roll, heading, gauges, time)
 
-        # Draw new ground quadrilateral
-        self.viewer.draw_polygon([(x1, y1),
-                                  (x2, y2),
-                                  (x2, y2-2*HUD.H),
-                                  (x1, y1-2*HUD.H)],
-                                 color=HUD.GROUND_COLOR)
+        return self.viewer.render(return_rgb_array=True)
 
-        # Add a reticle for pitch, rotated by roll to match horizon
-        for i in range(-3, 4):
+    def _render_gl(self, pitch, roll, heading, gauges, time):
 
-            x1 = 0
-            y1 = i * HUD.PITCH_RETICLE_SPACING
+        from gym_copter.rendering.glbatch import flatten
 
-            # Alternate the line lengths
-            x2 = (x1 +
-                  HUD.PITCH_RETICLE_WIDTH + (1-(i % 2)) *
-                  HUD.PITCH_RETICLE_WIDTH/2)
-            y2 = y1
+        self.ground.vertices[:] = flatten(HUD._ground(pitch, roll))
 
-            x1r, y1r = HUD._rotate(x1, y1, roll)
-            x2r, y2r = HUD._rotate(x2, y2, roll)
+        self.pitch_group.angle = roll
 
-            # Draw two sets of lines for thickness
-            self.viewer.draw_line((cx+x1r, cy+y1r),
-                                  (cx+x2r, cy+y2r),
-                                  color=HUD.LINE_COLOR)
-            self.viewer.draw_line((cx+x1r, cy+y1r+1),
-                                  (cx+x2r, cy+y2r+1),
-                                  color=HUD.LINE_COLOR)
-            self.viewer.draw_line((cx-x1r, cy-y1r),
-                                  (cx-x2r, cy-y2r),
-                                  color=HUD.LINE_COLOR)
-            self.viewer.draw_line((cx-x1r, cy-y1r+1),
-                                  (cx-x2r, cy-y2r+1),
-                                  color=HUD.LINE_COLOR)
+        for label, (_, x, _) in zip(self.heading_labels,
+                                    HUD._heading_labels(heading)):
+            label.x = x
 
-            # Add a label on the left of every other tick
-            if i % 2 == 0:
-                txt = ('%+3d' % (-i*HUD.PITCH_RETICLE_INCREMENT)).center(3)
-                pitch_label = Label(txt,
-                                    font_size=HUD.FONT_SIZE,
-                                    color=(*HUD.FONT_COLOR, 255),
-                                    anchor_x='center',
-                                    anchor_y='center')
-                label_x = cx-x2r-HUD.PITCH_LABEL_X_OFFSET
-                label_y = cy-y2r-HUD.PITCH_LABEL_Y_OFFSET
-                HUD._add_label_rotated(self.viewer,
-                                       pitch_label,
-                                       label_x,
-                                       label_y,
-                                       roll)
-
-        # Add a horizontal line and center box at the top for the heading
-        # display
-        y = HUD.H-HUD.HEADING_LINE_Y_OFFSET
-        self.viewer.draw_line((0, y), (HUD.W, y), color=HUD.LINE_COLOR)
-        self.viewer.draw_polygon([
-            (HUD.W/2-HUD.HEADING_BOX_WIDTH, y),
-            (HUD.W/2+HUD.HEADING_BOX_WIDTH, y),
-            (HUD.W/2+HUD.HEADING_BOX_WIDTH, HUD.H),
-            (HUD.W/2-HUD.HEADING_BOX_WIDTH, HUD.H)],
-            color=HUD.HIGHLIGHT_COLOR)
-
-        # Display heading
-        d = HUD.HEADING_TICK_SPACING * HUD.HEADING_TICK_COUNT
-        for i in range(HUD.HEADING_TICK_COUNT):
-
-            HUD._add_label(self.viewer,
-                           Label((('%d' %
-                                   (i*360//HUD.HEADING_TICK_COUNT)).center(3)),
-                                 font_size=HUD.FONT_SIZE,
-                                 x=((HUD.W/2 - heading*d/360 +
-                                     HUD.HEADING_TICK_SPACING*i) % d),
-                                 y=HUD.H-HUD.HEADING_LABEL_Y_OFFSET,
-                                 color=(*HUD.FONT_COLOR, 255),
-                                 anchor_x='center',
-                                 anchor_y='center'))
-
-        # Display altitude at right (negate to accommodate NED)
-        HUD._vertical_display(self.viewer,
-                              HUD.W-HUD.VERTICAL_BOX_WIDTH,
-                              HUD.W-HUD.VERTICAL_BOX_WIDTH+1,
-                              -state[4],
-                              'Alt (m)')
-
-        # Display ground speed at left
-        groundspeed = np.sqrt(state[1]**2 + state[3]**2)
-        HUD._vertical_display(self.viewer,
-                              10,
-                              -HUD.VERTICAL_POINTER_HEIGHT,
-                              groundspeed,
-                              'GS (m/s)')
-
-        # Add a reticle at the top for roll
-        angles = np.linspace(np.radians(180-HUD.ROLL_RETICLE_LIM),
-                             np.radians(HUD.ROLL_RETICLE_LIM),
-                             HUD.ROLL_RETICLE_PTS)
-        points = [(np.cos(a)*HUD.ROLL_RETICLE_RADIUS+HUD.W/2,
-                   np.sin(a)*HUD.ROLL_RETICLE_RADIUS+HUD.ROLL_RETICLE_YOFF)
-                  for a in angles]
-        self.viewer.draw_polyline(points, color=HUD.LINE_COLOR, linewidth=2)
-        tickvals = np.append(-np.array(HUD.ROLL_RETICLE_TICKVALS[::-1]),
-                             [0] + HUD.ROLL_RETICLE_TICKVALS)
-        for tickval in tickvals:
-            k = HUD._tickval2index(tickval, tickvals)
-            x1, y1 = points[k]
-            x2, y2 = x1, y1+HUD.ROLL_RETICLE_TICKLEN
-            rangle = (-HUD.ROLL_RETICLE_TICKVALS[-1] /
-                      HUD.ROLL_RETICLE_LIM*tickval)
-            xr, yr = HUD._rotate(0, HUD.ROLL_RETICLE_TICKLEN, rangle)
-            self.viewer.draw_line((x1, y1),
-                                  (x2+xr, y2+yr),
-                                  color=HUD.LINE_COLOR)
-            # Add another tick line for thickness
-            self.viewer.draw_line((x1+1, y1),
-                                  (x2+xr+1, y2+yr),
-                                  color=HUD.LINE_COLOR)
-
-            roll_label = Label(('%2d' % abs(tickval)).center(3),
-                               font_size=HUD.FONT_SIZE,
-                               color=(*HUD.FONT_COLOR, 255),
-                               anchor_x='center',
-                               anchor_y='center')
-
-            label_x = x2
-            label_y = y2 + HUD.ROLL_RETICLE_TICK_YOFF
-            HUD._add_label_rotated(self.viewer,
-                                   roll_label,
-                                   label_x,
-                                   label_y,
-                                   rangle/2,
-                                   -(6 if rangle == 0 else rangle/3.82))
-
-        # Add a rotated pointer below the current angle in the roll reticle
-        x, y = points[HUD._tickval2index(roll, tickvals)]
-        x1, y1 = HUD._rotate(-HUD.ROLL_POINTER_SIZE, 0, -roll)
-        x2, y2 = HUD._rotate(HUD.ROLL_POINTER_SIZE, 0, -roll)
-        x3, y3 = HUD._rotate(0, HUD.ROLL_POINTER_SIZE, -roll)
-        y -= HUD.ROLL_POINTER_SIZE
-        self.viewer.draw_polygon([(x+x1, y+y1),
-                                 (x+x2, y+y2),
-                                 (x+x3, y+y3)],
-                                 color=HUD.POINTER_COLOR)
-
-        # Add a time display at bottom
-        HUD._add_label(self.viewer,
-                       Label('Time: %3.2f' % dynamics.getTime(),
-                             x=HUD.TIME_LABEL_X, y=HUD.TIME_LABEL_Y,
-                             font_size=HUD.LARGE_FONT_SIZE,
-                             color=(*HUD.FONT_COLOR, 255),
-                             anchor_x='center',
-                             anchor_y='center'))
+        for leftx, value in gauges.items():
 
-        return self.viewer.render(return_rgb_array=True)
+            for label, spec in zip(self.gauge_labels[leftx],
+                                   HUD._vertical_labels(leftx, value)):
+
+                if spec is None:
+                    label.text = ''
+                    continue
+
+                text, x, y, alpha = spec
+
+                if label.text != text:
+                    label.text = text
+                label.x = x
+                label.y = y
+                label.color = (*HUD.FONT_COLOR, alpha)
+
+        self.roll_pointer.vertices[:] = flatten(
+                HUD._roll_pointer(roll, self.roll_points, self.roll_tickvals))
+
+        self.time_label.text = time
+
+    def _render_software(self, pitch, roll, heading, gauges, time):
+
+        viewer = self.viewer
+
+        viewer.draw_polygon(HUD._ground(pitch, roll), color=HUD.GROUND_COLOR)
+
+        viewer.blit(self.overlay)
+
+        # Pitch reticle and labels, rotated by roll about the center
+        cx, cy = HUD.W/2, HUD.H/2
+        for (x1, y1), (x2, y2) in self.pitch_segments:
+            x1r, y1r = HUD._rotate(x1, y1, roll)
+            x2r, y2r = HUD._rotate(x2, y2, roll)
+            viewer.draw_line((cx+x1r, cy+y1r), (cx+x2r, cy+y2r),
+                             color=HUD.LINE_COLOR, linewidth=2)
+        for text, x, y in self.pitch_labels:
+            xr, yr = HUD._rotate(x, y, roll)
+            viewer.draw_text(text, cx+xr, cy+yr, HUD.FONT_SIZE, angle=roll)
+
+        for text, x, y in HUD._heading_labels(heading):
+            viewer.draw_text(text, x, y, HUD.FONT_SIZE)
+
+        for leftx, value in gauges.items():
+            for spec in HUD._vertical_labels(leftx, value):
+                if spec is not None:
+                    text, x, y, alpha = spec
+                    viewer.draw_text(text, x, y, HUD.FONT_SIZE,
+                                     alpha=alpha/255)
+
+        viewer.draw_polygon(HUD._roll_pointer(roll,
+                                              self.roll_points,
+                                              self.roll_tickvals),
+                            color=HUD.POINTER_COLOR)
+
+        viewer.draw_text(time, HUD.TIME_LABEL_X, HUD.TIME_LABEL_Y,
+                         HUD.LARGE_FONT_SIZE)
 
     def isOpen(self):
 
         return self.viewer.isopen
+
+    def close(self):
+
+        self.viewer.close()
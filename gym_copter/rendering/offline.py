@@ -0,0 +1,202 @@
+'''
+Offline rendering of recorded trajectories to video
+
+Frames are rendered headlessly (software rasterizer for 2D and HUD, Agg
+for 3D) in chunks on a pool of worker processes, and piped in order into
+a single encoder.
+
+Copyright (C) 2021 Simon D. Levy
+
+MIT License
+'''
+
+import multiprocessing
+
+import numpy as np
+
+from gym_copter.data.recorder import open_trajectory
+from gym_copter.envs.lander import _Lander
+from gym_copter.rendering.sinks import PipeSink
+
+DISPLAYS = ('2d', '3d', 'hud')
+
+STATE_NAMES = ('X', 'dX', 'Y', 'dY', 'Z', 'dZ',
+               'Phi', 'dPhi', 'Theta', 'dTheta', 'Psi', 'dPsi')
+
+
+def load_trajectory(filename):
+    '''
+    Loads a trajectory saved with --save
+    @param filename name of .csv file with column headers, or binary file
+                    from TrajectoryRecorder
+    @return times, full 12-element states, motors
+    '''
+
+    if filename.lower().endswith('.csv'):
+        data = np.genfromtxt(filename, delimiter=',', names=True)
+        names = list(data.dtype.names)
+        columns = [data[name] for name in names]
+
+    else:
+        names, data = open_trajectory(filename)
+        columns = data.T
+
+    if 't' not in names:
+        raise ValueError('%s has no column headers' % filename)
+
+    # 2D environments name their lateral coordinate X but it is really Y
+    if 'Y' not in names:
+        names = [{'X': 'Y', 'dX': 'dY'}.get(name, name) for name in names]
+
+    data = dict(zip(names, columns))
+
+    n = len(data['t'])
+
+    states = np.column_stack([data[name] if name in data else np.zeros(n)
+                              for name in STATE_NAMES])
+
+    motors = np.column_stack([data[name]
+                              for name in names
+                              if name[0] == 'm' and name[1:].isdigit()])
+
+    return np.array(data['t']), states, motors
+
+
+class _Snapshot:
+    '''
+    Stands in for the environment (and its dynamics) at one recorded time
+    '''
+
+    TARGET_RADIUS = _Lander.TARGET_RADIUS
+
+    def __init__(self):
+
+        self.viewer = None
+        self.done = False
+
+        self.dynamics = self
+
+    @property
+    def unwrapped(self):
+
+        return self
+
+    def set(self, time, state, motors):
+
+        self.time = time
+        self.state = state
+        self.pose = tuple(state[0::2])
+        self.spinning = np.sum(motors) > 0
+
+    def getState(self):
+
+        return self.state
+
+    def getTime(self):
+
+        return self.time
+
+
+class _FrameRenderer:
+
+    def __init__(self, display, times, states, motors, viewangles):
+
+        self.display = display
+        self.times = times
+        self.states = states
+        self.motors = motors
+
+        self.env = _Snapshot()
+
+        if display == '3d':
+            import matplotlib
+            matplotlib.use('Agg')
+            from gym_copter.rendering.threed import ThreeDLanderRenderer
+            self.viewer = ThreeDLanderRenderer(self.env,
+                                               viewangles=viewangles)
+
+        elif display == '2d':
+            from gym_copter.rendering.twod import TwoDLanderRenderer
+            self.viewer = TwoDLanderRenderer(self.env, 'software')
+
+        elif display == 'hud':
+            from gym_copter.rendering.hud import HUD
+            self.viewer = HUD(self.env, 'software')
+
+        else:
+            raise ValueError('Display must be one of %s' % (DISPLAYS,))
+
+    def render(self, k):
+
+        env = self.env
+
+        env.set(self.times[k], self.states[k], self.motors[k])
+
+        if self.display == '3d':
+            self.viewer.display()
+            return self.viewer.render('rgb_array').copy()
+
+        if self.display == '2d':
+            return self.viewer.render('rgb_array', env.pose, env.spinning)
+
+        return self.viewer.render('rgb_array')
+
+
+# One renderer per worker process, reused across chunks
+_renderer = None
+
+
+def _init_worker(*args):
+
+    global _renderer
+    _renderer = _FrameRenderer(*args)
+
+
+def _render_chunk(indices):
+
+    return np.array([_renderer.render(k) for k in indices])
+
+
+def render_video(infile, outfile, display='3d', fps=25, workers=None,
+                 chunk=50, viewangles=(30, 120), sink=None):
+    '''
+    @param infile trajectory file (see load_trajectory)
+    @param outfile output video file name
+    @param display '2d', '3d', or 'hud'
+    @param fps output frame rate; trajectory is subsampled to match
+    @param workers number of worker processes (default = CPU count)
+    @param chunk number of frames rendered per worker task
+    @param viewangles elevation, azimuth for 3D display
+    @param sink frame sink (default = PipeSink to outfile)
+    @return number of frames written
+    '''
+
+    if display not in DISPLAYS:
+        raise ValueError('Display must be one of %s' % (DISPLAYS,))
+
+    times, states, motors = load_trajectory(infile)
+
+    # Subsample the trajectory to the video frame rate
+    dt = np.median(np.diff(times)) if len(times) > 1 else 1/fps
+    step = max(1, int(round(1 / (fps * dt))))
+    frames = np.arange(0, len(times), step)
+
+    chunks = [frames[k:k+chunk] for k in range(0, len(frames), chunk)]
+
+    sink = PipeSink(outfile, fps=fps) if sink is None else sink
+
+    # Spawn rather than fork, so each worker sets up its own graphics
+    context = multiprocessing.get_context('spawn')
+
+    with context.Pool(workers,
+                      _init_worker,
+                      (display, times, states, motors, viewangles)) as pool:
+
+        # imap keeps chunks in order for the encoder
+        for block in pool.imap(_render_chunk, chunks):
+            for frame in block:
+                sink.write(frame[:, :, ::-1])  # RGB => BGR
+
+    sink.close()
+
+    return len(frames)
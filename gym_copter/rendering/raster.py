@@ -0,0 +1,278 @@
+'''
+Pure-NumPy software rasterizer
+
+SoftwareViewer supports the subset of the
+gym.envs.classic_control.rendering.Viewer drawing API used by our renderers
+(plus text), rasterizing into a NumPy array with no OpenGL context or
+display.  This lets rgb_array rendering run on headless machines.
+
+Copyright (C) 2021 Simon D. Levy
+
+MIT License
+'''
+
+import numpy as np
+
+BACKENDS = ('gl', 'software')
+
+# 5x7 bitmap glyphs for the characters our renderers display
+_GLYPHS = {
+    '0': ('01110', '10001', '10011', '10101', '11001', '10001', '01110'),
+    '1': ('00100', '01100', '00100', '00100', '00100', '00100', '01110'),
+    '2': ('01110', '10001', '00001', '00010', '00100', '01000', '11111'),
+    '3': ('11111', '00010', '00100', '00010', '00001', '10001', '01110'),
+    '4': ('00010', '00110', '01010', '10010', '11111', '00010', '00010'),
+    '5': ('11111', '10000', '11110', '00001', '00001', '10001', '01110'),
+    '6': ('00110', '01000', '10000', '11110', '10001', '10001', '01110'),
+    '7': ('11111', '00001', '00010', '00100', '01000', '01000', '01000'),
+    '8': ('01110', '10001', '10001', '01110', '10001', '10001', '01110'),
+    '9': ('01110', '10001', '10001', '01111', '00001', '00010', '01100'),
+    '+': ('00000', '00100', '00100', '11111', '00100', '00100', '00000'),
+    '-': ('00000', '00000', '00000', '11111', '00000', '00000', '00000'),
+    '.': ('00000', '00000', '00000', '00000', '00000', '01100', '01100'),
+    ':': ('00000', '01100', '01100', '00000', '01100', '01100', '00000'),
+    '(': ('00010', '00100', '01000', '01000', '01000', '00100', '00010'),
+    ')': ('01000', '00100', '00010', '00010', '00010', '00100', '01000'),
+    '/': ('00000', '00001', '00010', '00100', '01000', '10000', '00000'),
+    'A': ('01110', '10001', '10001', '11111', '10001', '10001', '10001'),
+    'G': ('01110', '10001', '10000', '10111', '10001', '10001', '01111'),
+    'S': ('01111', '10000', '10000', '01110', '00001', '00001', '11110'),
+    'T': ('11111', '00100', '00100', '00100', '00100', '00100', '00100'),
+    'e': ('00000', '00000', '01110', '10001', '11111', '10000', '01110'),
+    'i': ('00100', '00000', '01100', '00100', '00100', '00100', '01110'),
+    'l': ('01100', '00100', '00100', '00100', '00100', '00100', '01110'),
+    'm': ('00000', '00000', '11010', '10101', '10101', '10001', '10001'),
+    's': ('00000', '00000', '01110', '10000', '01110', '00001', '11110'),
+    't': ('01000', '01000', '11100', '01000', '01000', '01001', '00110'),
+}
+
+_GLYPH_W, _GLYPH_H = 5, 7
+
+_BLANK = np.zeros((_GLYPH_H, _GLYPH_W), dtype=bool)
+
+_GLYPH_MASKS = {c: np.array([[b == '1' for b in row] for row in rows])
+                for c, rows in _GLYPHS.items()}
+
+
+def make_viewer(width, height, backend='gl'):
+    '''
+    @param width, height window size (pixels)
+    @param backend 'gl' for a gym / pyglet window, or 'software' for an
+                   offscreen SoftwareViewer
+    '''
+
+    if backend == 'software':
+        return SoftwareViewer(width, height)
+
+    if backend == 'gl':
+        from gym.envs.classic_control import rendering
+        return rendering.Viewer(width, height)
+
+    raise ValueError('Rendering backend must be one of %s' % (BACKENDS,))
+
+
+class SoftwareViewer:
+
+    TEXT_CACHE_SIZE = 256
+
+    def __init__(self, width, height):
+
+        self.width = width
+        self.height = height
+
+        self.frame = np.zeros((height, width, 3), dtype=np.uint8)
+
+        # Pixels drawn since the last clear, for compositing with blit()
+        self.mask = np.zeros((height, width), dtype=bool)
+
+        self.background = 0, 0, 0
+
+        self.set_bounds(0, width, 0, height)
+
+        self.isopen = True
+
+        self._text_masks = {}
+
+    def set_bounds(self, left, right, bottom, top):
+
+        assert right > left and top > bottom
+        self.left = left
+        self.bottom = bottom
+        self.scalex = self.width / (right-left)
+        self.scaley = self.height / (top-bottom)
+
+    def clear(self, color=None):
+
+        if color is not None:
+            self.background = color
+
+        self.frame[:] = _to_uint8(self.background)
+        self.mask[:] = False
+
+    def draw_polygon(self, v, filled=True, color=(0, 0, 0), linewidth=1):
+
+        if filled:
+            self._fill(self._to_pixels(v), _to_uint8(color))
+
+        else:
+            v = list(v)
+            self.draw_polyline(v + v[:1], color=color, linewidth=linewidth)
+
+    def draw_polyline(self, v, color=(0, 0, 0), linewidth=1):
+
+        pts = self._to_pixels(v)
+        c = _to_uint8(color)
+
+        for k in range(len(pts)-1):
+            self._line(pts[k], pts[k+1], c, linewidth)
+
+    def draw_line(self, start, end, color=(0, 0, 0), linewidth=1):
+
+        self.draw_polyline((start, end), color=color, linewidth=linewidth)
+
+    def draw_text(self, text, x, y, font_size, color=(1, 1, 1), alpha=1,
+                  angle=0, xoff=0):
+        '''
+        Draws text centered on (x, y), rotated counter-clockwise by angle
+        degrees and then shifted xoff pixels along its own baseline
+        '''
+
+        if alpha <= 0:
+            return
+
+        mask = self._text_mask(text)
+
+        # Glyphs are about as tall as the font's cap height
+        scale = font_size / 7.5
+        h, w = scale * mask.shape[0], scale * mask.shape[1]
+
+        (x0, y0), = self._to_pixels([(x, y)])
+
+        # Bounding box of the rotated, shifted text
+        r = int(np.ceil(np.hypot(w/2 + abs(xoff), h/2))) + 1
+        c0, c1 = max(int(x0) - r, 0), min(int(x0) + r, self.width)
+        r0, r1 = max(int(y0) - r, 0), min(int(y0) + r, self.height)
+        if c0 >= c1 or r0 >= r1:
+            return
+
+        # Map each pixel back into the unrotated text (Y up)
+        rows, cols = np.mgrid[r0:r1, c0:c1]
+        dx = cols + 0.5 - x0
+        dy = y0 - (rows + 0.5)
+        a = np.radians(angle)
+        tx = np.cos(a)*dx + np.sin(a)*dy - xoff
+        ty = -np.sin(a)*dx + np.cos(a)*dy
+        mc = np.floor((tx + w/2) / scale).astype(int)
+        mr = np.floor((h/2 - ty) / scale).astype(int)
+        ok = ((mc >= 0) & (mc < mask.shape[1]) &
+              (mr >= 0) & (mr < mask.shape[0]))
+        ok[ok] = mask[mr[ok], mc[ok]]
+
+        region = self.frame[r0:r1, c0:c1]
+        region[ok] = (alpha * _to_uint8(color) +
+                      (1-alpha) * region[ok]).astype(np.uint8)
+        self.mask[r0:r1, c0:c1] |= ok
+
+    def blit(self, layer):
+        '''
+        Copies the pixels drawn into another SoftwareViewer onto this one
+        '''
+
+        self.frame[layer.mask] = layer.frame[layer.mask]
+        self.mask |= layer.mask
+
+    def render(self, return_rgb_array=False):
+        '''
+        Finishes the current frame and starts a new one
+        '''
+
+        arr = self.frame.copy() if return_rgb_array else None
+
+        self.clear()
+
+        return arr if return_rgb_array else self.isopen
+
+    def close(self):
+
+        self.isopen = False
+
+    def _to_pixels(self, v):
+
+        v = np.asarray(v, dtype=float).reshape(-1, 2)
+
+        return np.column_stack(((v[:, 0] - self.left) * self.scalex,
+                                self.height -
+                                (v[:, 1] - self.bottom) * self.scaley))
+
+    def _fill(self, pts, color):
+        '''
+        Even-odd fill, sampling at pixel centers within the bounding box
+        '''
+
+        c0 = max(int(np.floor(pts[:, 0].min())), 0)
+        c1 = min(int(np.ceil(pts[:, 0].max())), self.width)
+        r0 = max(int(np.floor(pts[:, 1].min())), 0)
+        r1 = min(int(np.ceil(pts[:, 1].max())), self.height)
+        if c0 >= c1 or r0 >= r1:
+            return
+
+        px = np.arange(c0, c1) + 0.5
+        py = (np.arange(r0, r1) + 0.5)[:, None]
+
+        inside = np.zeros((r1-r0, c1-c0), dtype=bool)
+
+        for (xi, yi), (xj, yj) in zip(pts, np.roll(pts, -1, axis=0)):
+            if yi == yj:
+                continue
+            crosses = (yi > py) != (yj > py)
+            xint = xi + (py - yi) * (xj - xi) / (yj - yi)
+            inside ^= crosses & (px < xint)
+
+        self.frame[r0:r1, c0:c1][inside] = color
+        self.mask[r0:r1, c0:c1] |= inside
+
+    def _line(self, p1, p2, color, linewidth):
+
+        d = p2 - p1
+        n = int(np.ceil(np.abs(d).max())) + 1
+        length = np.hypot(*d)
+        normal = (np.array([-d[1], d[0]]) / length
+                  if length > 0
+                  else np.zeros(2))
+
+        # Thick lines are parallel copies offset along the normal
+        s = np.linspace(0, 1, n)[:, None]
+        pts = np.concatenate([p1 + s*d + (k - (linewidth-1)/2) * normal
+                              for k in range(max(int(linewidth), 1))])
+
+        cols = np.floor(pts[:, 0]).astype(int)
+        rows = np.floor(pts[:, 1]).astype(int)
+        ok = ((cols >= 0) & (cols < self.width) &
+              (rows >= 0) & (rows < self.height))
+
+        self.frame[rows[ok], cols[ok]] = color
+        self.mask[rows[ok], cols[ok]] = True
+
+    def _text_mask(self, text):
+
+        if text not in self._text_masks:
+
+            # Keep the cache bounded (e.g., for constantly changing times)
+            if len(self._text_masks) >= self.TEXT_CACHE_SIZE:
+                self._text_masks.clear()
+
+            spacer = np.zeros((_GLYPH_H, 1), dtype=bool)
+            glyphs = [g
+                      for c in text
+                      for g in (_GLYPH_MASKS.get(c, _BLANK), spacer)][:-1]
+            self._text_masks[text] = (np.hstack(glyphs)
+                                      if glyphs
+                                      else np.zeros((_GLYPH_H, 0),
+                                                    dtype=bool))
+
+        return self._text_masks[text]
+
+
+def _to_uint8(color):
+
+    return (np.clip(color[:3], 0, 1) * 255).astype(np.uint8)
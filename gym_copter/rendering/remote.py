@@ -0,0 +1,203 @@
+'''
+Out-of-process rendering
+
+RemoteRenderer runs a renderer (e.g., ThreeDHoverRenderer) in its own
+process, feeding it vehicle poses through a PoseChannel in shared memory.
+The simulation and the renderer no longer contend for the GIL, and the
+renderer samples the latest pose at its own frame rate, so the simulation
+can run at full speed without pacing.
+
+Copyright (C) 2021 Simon D. Levy
+
+MIT License
+'''
+
+import multiprocessing
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+class PoseChannel:
+    '''
+    Double-buffered pose snapshot in shared memory, for one writer and any
+    number of readers.
+
+    The buffer holds a publish count followed by two slots of
+    (x, y, z, phi, theta, psi, done).  The writer fills the slot after the
+    latest one and then bumps the count.  Readers copy the latest slot and
+    keep the copy only if the count has not changed meanwhile (as in a
+    seqlock), so they always see a complete pose.
+    '''
+
+    SLOT_SIZE = 7
+
+    def __init__(self, name=None):
+        '''
+        @param name name of existing channel to attach to (default = create
+                    a new one)
+        '''
+
+        size = 8 * (1 + 2 * self.SLOT_SIZE)
+
+        self.owner = name is None
+
+        self.shm = (shared_memory.SharedMemory(create=True, size=size)
+                    if self.owner
+                    else shared_memory.SharedMemory(name))
+
+        self.name = self.shm.name
+
+        self.count = np.ndarray((1,), dtype=np.int64, buffer=self.shm.buf)
+
+        self.slots = np.ndarray((2, self.SLOT_SIZE), dtype=np.float64,
+                                buffer=self.shm.buf, offset=8)
+
+        if self.owner:
+            self.count[0] = 0
+            self.slots[:] = 0
+
+    def write(self, pose, done=False):
+
+        n = self.count[0] + 1
+
+        slot = self.slots[n % 2]
+        slot[:6] = pose
+        slot[6] = done
+
+        # Publish the pose only after it has been copied in
+        self.count[0] = n
+
+    def read(self):
+        '''
+        @return (pose, done) from the most recent write
+        '''
+
+        while True:
+
+            n = self.count[0]
+
+            sample = self.slots[n % 2].copy()
+
+            # Once the count moves on, the writer may already be refilling
+            # our slot with the pose after next, so try again
+            if self.count[0] == n:
+                break
+
+        return tuple(sample[:6]), bool(sample[6])
+
+    def close(self):
+
+        del self.count, self.slots
+        self.shm.close()
+
+        if self.owner:
+            self.shm.unlink()
+
+
+class _ChannelSource:
+    '''
+    Stands in for the environment in the renderer process
+    '''
+
+    def __init__(self, channel, attrs):
+
+        self.channel = channel
+        self.__dict__.update(attrs)
+
+    @property
+    def pose(self):
+
+        return self.channel.read()[0]
+
+    @property
+    def done(self):
+
+        return self.channel.read()[1]
+
+
+def _serve(name, renderer_class, attrs, kwargs):
+
+    channel = PoseChannel(name)
+
+    renderer_class(_ChannelSource(channel, attrs), **kwargs).start()
+
+    channel.close()
+
+
+class RemoteRenderer:
+    '''
+    Runs a renderer in a separate process
+    '''
+
+    # The renderer keeps its own pace, so the simulation need not
+    paced = False
+
+    # Environment constants the renderers need
+    ATTRIBUTES = ('TARGET_RADIUS',)
+
+    def __init__(self, env, renderer_class, **kwargs):
+        '''
+        @param env environment to display
+        @param renderer_class ThreeDRenderer subclass to run
+        @param kwargs keyword arguments for renderer_class
+        '''
+
+        self.env = env
+        self.env.viewer = self
+
+        self.channel = PoseChannel()
+
+        attrs = {name: getattr(env, name)
+                 for name in self.ATTRIBUTES
+                 if hasattr(env, name)}
+
+        # Spawn rather than fork, so the renderer gets a fresh GUI state
+        context = multiprocessing.get_context('spawn')
+
+        self.process = context.Process(target=_serve,
+                                       args=(self.channel.name,
+                                             renderer_class,
+                                             attrs,
+                                             kwargs),
+                                       daemon=True)
+        self.process.start()
+
+    def start(self):
+        '''
+        Waits for the renderer to finish, like ThreeDRenderer.start()
+        '''
+
+        self.process.join()
+
+    def render(self, mode):
+        '''
+        Publishes the environment's current pose; frames stay in the
+        renderer process, so nothing is returned
+        '''
+
+        if self.env.pose is not None:
+            self.channel.write(self.env.pose, self.env.done)
+
+        return None
+
+    def is_open(self):
+
+        return self.process.is_alive()
+
+    def close(self, timeout=2):
+        '''
+        @param timeout seconds to wait for the renderer to exit
+        '''
+
+        if self.process.is_alive():
+            self.channel.write(np.zeros(6)
+                               if self.env.pose is None
+                               else self.env.pose,
+                               True)
+            self.process.join(timeout)
+
+        if self.process.is_alive():
+            self.process.terminate()
+
+        self.channel.close()
@@ -0,0 +1,290 @@
+'''
+Frame sinks for sensor and renderer images
+
+Each sink accepts frames through write(), which returns False when the
+consumer wants to stop (e.g., ESC pressed in a window), and releases its
+resources in close().  Only WindowSink needs a display.
+
+Copyright (C) 2021 Simon D. Levy
+
+MIT License
+'''
+
+import subprocess
+import sys
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+import cv2
+
+
+def _to_uint8(frame):
+
+    frame = np.asarray(frame)
+
+    # Binary / float images are in [0, 1]
+    if frame.dtype != np.uint8:
+        frame = (np.clip(frame, 0, 1) * 255).astype(np.uint8)
+
+    return frame
+
+
+class WindowSink:
+    '''
+    Scales up and displays frames in an OpenCV window
+    '''
+
+    def __init__(self, winname, display_size=400, position=(725, 0), wait=10):
+        '''
+        @param winname window title
+        @param display_size window width and height (pixels)
+        @param position window position (pixels)
+        @param wait milliseconds to wait for a keypress after each frame
+        '''
+
+        self.winname = winname
+        self.display_size = display_size
+        self.position = position
+        self.wait = wait
+
+        # No window until the first frame
+        self.opened = False
+
+    def write(self, frame):
+
+        frame = cv2.resize(frame, ((self.display_size, )*2),
+                           interpolation=cv2.INTER_NEAREST)
+        cv2.imshow(self.winname, frame)
+        self.opened = True
+        cv2.moveWindow(self.winname, *self.position)
+        return cv2.waitKey(self.wait) != 27  # ESC
+
+    def close(self):
+
+        # Headless OpenCV builds can't destroy a window they never showed
+        if self.opened:
+            cv2.destroyWindow(self.winname)
+            self.opened = False
+
+
+class RingBufferSink:
+    '''
+    Keeps the most recent frames in a preallocated in-memory buffer
+    '''
+
+    def __init__(self, capacity=1000):
+        '''
+        @param capacity maximum number of frames kept
+        '''
+
+        self.capacity = capacity
+        self.frames = None
+        self.count = 0
+
+    def write(self, frame):
+
+        frame = _to_uint8(frame)
+
+        # Allocate once we know the frame shape
+        if self.frames is None:
+            self.frames = np.zeros((self.capacity,) + frame.shape,
+                                   dtype=np.uint8)
+
+        self.frames[self.count % self.capacity] = frame
+        self.count += 1
+
+        return True
+
+    def get(self):
+        '''
+        @return array of buffered frames, oldest first
+        '''
+
+        if self.frames is None:
+            return np.zeros((0,), dtype=np.uint8)
+
+        if self.count <= self.capacity:
+            return self.frames[:self.count]
+
+        start = self.count % self.capacity
+
+        return np.concatenate((self.frames[start:], self.frames[:start]))
+
+    def close(self):
+
+        pass
+
+
+class PipeSink:
+    '''
+    Pipes raw frames to an ffmpeg encoder process
+    '''
+
+    def __init__(self, outfile, fps=100, scale=1, ffmpeg='ffmpeg'):
+        '''
+        @param outfile output video file name
+        @param fps frame rate of output video
+        @param scale integer factor for scaling up frames
+        @param ffmpeg name of ffmpeg executable
+        '''
+
+        self.outfile = outfile
+        self.fps = fps
+        self.scale = scale
+        self.ffmpeg = ffmpeg
+        self.proc = None
+
+    def write(self, frame):
+
+        frame = _to_uint8(frame)
+
+        if self.scale > 1:
+            frame = np.repeat(np.repeat(frame, self.scale, axis=0),
+                              self.scale, axis=1)
+
+        # Start the encoder once we know the frame shape
+        if self.proc is None:
+            self._open(frame.shape)
+
+        try:
+            self.proc.stdin.write(np.ascontiguousarray(frame).tobytes())
+
+        except BrokenPipeError:
+            return False
+
+        return True
+
+    def close(self):
+
+        if self.proc is not None:
+            self.proc.stdin.close()
+            self.proc.wait()
+            self.proc = None
+
+    def _open(self, shape):
+
+        # Color frames follow OpenCV's BGR channel order
+        pix_fmt = 'bgr24' if len(shape) == 3 else 'gray'
+
+        self.proc = subprocess.Popen([self.ffmpeg, '-y', '-loglevel', 'error',
+                                      '-f', 'rawvideo',
+                                      '-pix_fmt', pix_fmt,
+                                      '-s', '%dx%d' % (shape[1], shape[0]),
+                                      '-r', str(self.fps),
+                                      '-i', '-',
+                                      '-pix_fmt', 'yuv420p',
+                                      self.outfile],
+                                     stdin=subprocess.PIPE)
+
+
+class SharedMemorySink:
+    '''
+    Streams frames through a ring buffer in shared memory, for consumption
+    by another process via SharedMemorySource.
+
+    The buffer starts with a header of five int64 values (frames written,
+    capacity, height, width, channels), followed by the frames.
+    '''
+
+    HEADER = 5
+
+    def __init__(self, name=None, capacity=64):
+        '''
+        @param name shared-memory block name (default = generated)
+        @param capacity number of frames in the ring buffer
+        '''
+
+        self.name = name
+        self.capacity = capacity
+        self.shm = None
+
+    def write(self, frame):
+
+        frame = _to_uint8(frame)
+
+        if self.shm is None:
+            self._open(frame.shape)
+
+        self.frames[self.header[0] % self.capacity] = frame
+
+        # Publish the frame only after it has been copied in
+        self.header[0] += 1
+
+        return True
+
+    def close(self):
+
+        if self.shm is not None:
+            del self.header, self.frames
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = None
+
+    def _open(self, shape):
+
+        h, w = shape[:2]
+        c = shape[2] if len(shape) == 3 else 1
+
+        offset = self.HEADER * 8
+
+        self.shm = shared_memory.SharedMemory(self.name, create=True,
+                                              size=offset +
+                                              self.capacity * h * w * c)
+        self.name = self.shm.name
+
+        self.header = np.ndarray((self.HEADER,), dtype=np.int64,
+                                 buffer=self.shm.buf)
+        self.header[:] = 0, self.capacity, h, w, c
+
+        self.frames = np.ndarray((self.capacity,) + tuple(shape),
+                                 dtype=np.uint8,
+                                 buffer=self.shm.buf,
+                                 offset=offset)
+
+
+class SharedMemorySource:
+    '''
+    Reads frames written by a SharedMemorySink in another process
+    '''
+
+    def __init__(self, name):
+
+        # The sink owns the segment; a reader that registered it too would
+        # have its resource tracker unlink it (or warn of a leak) on exit
+        if sys.version_info >= (3, 13):
+            self.shm = shared_memory.SharedMemory(name, track=False)
+        else:
+            self.shm = shared_memory.SharedMemory(name)
+            resource_tracker.unregister(self.shm._name, 'shared_memory')
+
+        self.header = np.ndarray((SharedMemorySink.HEADER,), dtype=np.int64,
+                                 buffer=self.shm.buf)
+
+        _, self.capacity, h, w, c = (int(v) for v in self.header)
+        shape = (h, w) if c == 1 else (h, w, c)
+
+        self.frames = np.ndarray((self.capacity,) + shape,
+                                 dtype=np.uint8,
+                                 buffer=self.shm.buf,
+                                 offset=SharedMemorySink.HEADER * 8)
+
+    def count(self):
+        '''
+        @return number of frames written so far
+        '''
+
+        return int(self.header[0])
+
+    def latest(self):
+        '''
+        @return copy of the most recent frame, or None if none written yet
+        '''
+
+        n = self.count()
+
+        return None if n == 0 else self.frames[(n-1) % self.capacity].copy()
+
+    def close(self):
+
+        del self.header, self.frames
+        self.shm.close()
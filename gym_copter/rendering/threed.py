@@ -13,7 +13,6 @@ from matplotlib import animation
 from matplotlib.patches import Circle
 from mpl_toolkits.mplot3d import Axes3D  # noqa: F401
 import mpl_toolkits.mplot3d.art3d as art3d
-from PIL import Image
 
 
 def _create_line3d(axes, color):
@@ -22,106 +21,233 @@ def _create_line3d(axes, color):
     '''
     line3d = axes.plot([], [], [], '-', c=color)[0]
     line3d.set_data([], [])
+
+    # Animated artists are left out of full redraws, so they can be blitted
+    # over a cached background
+    line3d.set_animated(True)
+
     return line3d
 
 
+def _project(collection):
+    '''
+    Axes3D projects collections only during a full draw, so we project
+    animated ones ourselves before they are blitted
+    '''
+
+    if collection.axes.M is not None:
+        collection.do_3d_projection()
+
+
+def _transform(body, poses):
+    '''
+    Places vehicle-frame points at one or more poses
+    @param body N X 3 array of vehicle-frame points (X, Y, Z offset)
+    @param poses V X 6 array of NED poses (x, y, z, phi, theta, psi)
+    @return V X N X 3 array of world-frame (NEU) points
+    '''
+
+    x, y, z, phi, theta, psi = np.atleast_2d(poses).T
+
+    # Adjust for X axis orientation
+    theta = -theta
+
+    # Make convenient abbreviations for functions of Euler angles
+    cph = np.cos(phi)
+    sph = np.sin(phi)
+    cth = np.cos(theta)
+    sth = np.sin(theta)
+    cps = np.cos(psi)
+    sps = np.sin(psi)
+
+    # Build rotation matrices (vehicle points have no Z component to rotate):
+    # see http://www.kwon3d.com/theory/euler/euler_angles.html, Eqn. 2
+    rot = np.empty((len(x), 3, 2))
+    rot[:, 0, 0] = cth*cps
+    rot[:, 0, 1] = sph*sth*cps + cph*sps
+    rot[:, 1, 0] = -cth*sps
+    rot[:, 1, 1] = -sph*sth*sps + cph*cps
+    rot[:, 2, 0] = sth
+    rot[:, 2, 1] = -sph*cth
+
+    # Rotate coordinates, then translate, adjusting frame NED => NEU
+    points = np.einsum('vij,nj->vni', rot, body[:, :2])
+    points += np.column_stack((x, y, -z))[:, None, :]
+    points[:, :, 2] += body[:, 2]
+
+    return points
+
+
+class _Trajectory:
+    '''
+    Fixed-size buffer of recent positions.  When full, every other point in
+    the older half is dropped, so the whole flight stays visible with older
+    parts at progressively lower resolution, and each frame plots at most
+    length points.
+    '''
+
+    def __init__(self, length):
+
+        # Shorter buffers would be full again after decimation
+        if length < 4:
+            raise ValueError('Trajectory length must be at least 4')
+
+        self.points = np.zeros((length, 3))
+        self.count = 0
+
+    def append(self, point):
+
+        if self.count == len(self.points):
+
+            half = self.count // 2
+
+            older = self.points[:half:2].copy()
+            newer = self.points[half:].copy()
+
+            self.count = len(older) + len(newer)
+            self.points[:len(older)] = older
+            self.points[len(older):self.count] = newer
+
+        self.points[self.count] = point
+        self.count += 1
+
+    def get(self):
+
+        return self.points[:self.count]
+
+
 class _Vehicle:
 
     VEHICLE_SIZE = 0.5
     PROPELLER_RADIUS = 0.2
     PROPELLER_OFFSET = 0.01
 
-    def __init__(self, ax, showtraj, color='b'):
+    def __init__(self, ax, showtraj, color='b', traj_length=1000):
 
         self.traj_line = _create_line3d(ax, color)
 
-        self.arms_lines = [_create_line3d(ax, color) for j in range(4)]
-        self.props_lines = [_create_line3d(ax, color) for j in range(4)]
+        self.body = _Vehicle.geometry()
+
+        # Arms and propellers are drawn as one collection of lines, hidden
+        # until the first update
+        self.lines = art3d.Line3DCollection(np.full(self.body.shape, np.nan),
+                                            colors=color)
+        self.lines.set_animated(True)
+        ax.add_collection3d(self.lines)
 
         # Support plotting trajectories
         self.showtraj = showtraj
 
-        # Initialize arrays that we will accumulate to plot trajectory
-        self.xs = []
-        self.ys = []
-        self.zs = []
+        # Initialize buffer that we will accumulate to plot trajectory
+        self.traj = _Trajectory(traj_length)
 
         # For render() support
         self.fig = None
 
+    def geometry():
+        '''
+        @return 8 X 50 X 3 array of vehicle-frame points for the four arms
+                followed by the four propellers
+        '''
+
         # Create points for arms
-        self.v2 = self.VEHICLE_SIZE / 2
-        self.rs = np.linspace(0, self.v2)
+        v2 = _Vehicle.VEHICLE_SIZE / 2
+        rs = np.linspace(0, v2)
 
         # Create points for propellers
         a = np.linspace(-np.pi, +np.pi)
-        self.px = self.PROPELLER_RADIUS * np.sin(a)
-        self.py = self.PROPELLER_RADIUS * np.cos(a)
+        px = _Vehicle.PROPELLER_RADIUS * np.sin(a)
+        py = _Vehicle.PROPELLER_RADIUS * np.cos(a)
 
-    def update(self, pose):
+        arms = []
+        props = []
 
-        x, y, z, phi, theta, psi = pose
+        for j in range(4):
 
-        # Adjust for X axis orientation
-        theta = -theta
+            dx = 2 * (j // 2) - 1
+            dy = 2 * (j % 2) - 1
 
-        # Adjust coordinate frame NED => NEU
-        z = -z
+            arms.append(np.column_stack((dx*rs, dy*rs, np.zeros(len(rs)))))
 
-        # Append position to arrays for plotting trajectory
-        self.xs.append(x)
-        self.ys.append(y)
-        self.zs.append(z)
+            props.append(np.column_stack((dx*v2+px,
+                                          dy*v2+py,
+                                          np.full(len(px),
+                                                  _Vehicle.PROPELLER_OFFSET))))
 
-        # Plot trajectory if indicated
+        return np.array(arms + props)
+
+    def artists(self):
+
+        return [self.traj_line, self.lines]
+
+    def update(self, pose):
+
+        x, y, z = pose[:3]
+
+        # Plot trajectory if indicated, adjusting coordinate frame NED => NEU
         if self.showtraj:
-            self.traj_line.set_data(self.xs, self.ys)
-            self.traj_line.set_3d_properties(self.zs)
+            self.traj.append((x, y, -z))
+            traj = self.traj.get()
+            self.traj_line.set_data(traj[:, 0], traj[:, 1])
+            self.traj_line.set_3d_properties(traj[:, 2])
 
-        # Loop over arms and propellers
-        for j in range(4):
+        # Transform arms and propellers together with a single rotation
+        points = _transform(self.body.reshape(-1, 3), pose)
 
-            dx = 2 * (j // 2) - 1
-            dy = 2 * (j % 2) - 1
+        self.lines.set_segments(points.reshape(self.body.shape))
+        _project(self.lines)
+
+
+class _Population:
+    '''
+    Many vehicles drawn as a single collection of lines, colored by fitness
+    '''
+
+    def __init__(self, ax, cmap):
+
+        self.body = _Vehicle.geometry()
+
+        self.cmap = plt.get_cmap(cmap)
+
+        self.lines = art3d.Line3DCollection(np.full(self.body.shape, np.nan))
+        self.lines.set_animated(True)
+        ax.add_collection3d(self.lines)
+
+    def artists(self):
+
+        return [self.lines]
+
+    def update(self, poses, fitness=None, fitness_range=None):
+        '''
+        @param poses V X 6 array of vehicle poses
+        @param fitness V-element array of fitnesses (default = all equal)
+        @param fitness_range (lo, hi) fitnesses for the ends of the colormap
+                             (default = current min, max)
+        '''
+
+        poses = np.atleast_2d(poses)
+
+        # Transform all vehicles at once
+        points = _transform(self.body.reshape(-1, 3), poses)
+
+        self.lines.set_segments(points.reshape((-1,) + self.body.shape[1:]))
+        _project(self.lines)
+
+        if fitness is None:
+            fitness = np.zeros(len(poses))
+
+        fitness = np.asarray(fitness, dtype=float)
 
-            self._set_axes(x, y, z,
-                           phi, theta, psi,
-                           self.arms_lines[j],
-                           dx*self.rs, dy*self.rs, 0)
-
-            self._set_axes(x, y, z,
-                           phi, theta, psi,
-                           self.props_lines[j],
-                           dx*self.v2+self.px, dy*self.v2+self.py,
-                           self.PROPELLER_OFFSET)
-
-    def _set_axes(self, x, y, z, phi, theta, psi, axis, xs, ys, dz):
-
-        # Make convenient abbreviations for functions of Euler angles
-        cph = np.cos(phi)
-        sph = np.sin(phi)
-        cth = np.cos(theta)
-        sth = np.sin(theta)
-        cps = np.cos(psi)
-        sps = np.sin(psi)
-
-        # Build rotation matrix:
-        # see http://www.kwon3d.com/theory/euler/euler_angles.html, Eqn. 2
-        a11 = cth*cps
-        a12 = sph*sth*cps + cph*sps
-        a21 = -cth*sps
-        a22 = -sph*sth*sps + cph*cps
-        a31 = sth
-        a32 = -sph*cth
-
-        # Rotate coordinates
-        xx = a11 * xs + a12 * ys
-        yy = a21 * xs + a22 * ys
-        zz = a31 * xs + a32 * ys
-
-        # Set axis points
-        axis.set_data(x+xx, y+yy)
-        axis.set_3d_properties(z+zz+dz)
+        lo, hi = ((fitness.min(), fitness.max())
+                  if fitness_range is None
+                  else fitness_range)
+
+        level = np.clip((fitness - lo) / ((hi - lo) or 1), 0, 1)
+
+        # One color per vehicle, repeated for its arms and propellers
+        self.lines.set_color(np.repeat(self.cmap(level),
+                                       len(self.body),
+                                       axis=0))
 
 
 class ThreeDRenderer:
@@ -129,6 +255,9 @@ class ThreeDRenderer:
     Base class for 3D rendering
     '''
 
+    # Simulation should sleep to keep pace with the display
+    paced = True
+
     def __init__(self,
                  env,
                  view_width=1,
@@ -136,6 +265,7 @@ class ThreeDRenderer:
                  fps=50,
                  label=None,
                  showtraj=False,
+                 traj_length=1000,
                  viewangles=(30, 120),
                  outfile=None):
 
@@ -180,16 +310,27 @@ class ThreeDRenderer:
         self.axes.set_zlim((0, lim))
 
         # Create a representation of the copter
-        self.copter = _Vehicle(self.axes, showtraj)
+        self.copter = self._create_vehicle(showtraj, traj_length)
+
+        # Static background (axes, target) for blitting the copter over
+        self.background = None
+        self.fig.canvas.mpl_connect('draw_event', self._handle_draw)
+
+        # Once the animator owns the canvas, frames for render() are copied
+        # on its thread
+        self.animating = False
+        self.frame = None
 
     def start(self):
 
+        self.animating = True
+
         # Instantiate the animator
         interval = int(1000/self.fps)
         anim = animation.FuncAnimation(self.fig,
                                        self._animate,
                                        interval=interval,
-                                       blit=False)
+                                       blit=True)
 
         # Support window close
         self.fig.canvas.mpl_connect('close_event', self._handle_close)
@@ -213,8 +354,15 @@ class ThreeDRenderer:
 
     def render(self, mode):
 
-        # Actual rendering is done on a separate thread
-        return None
+        if mode != 'rgb_array':
+            return None
+
+        # Actual rendering is done on a separate thread, so return the last
+        # frame it copied rather than drawing to its canvas from this one
+        if self.animating:
+            return self.frame
+
+        return self._complete()
 
     def display(self):
 
@@ -228,19 +376,36 @@ class ThreeDRenderer:
         return self.open
 
     def _complete(self):
+        '''
+        Returns the current frame as a height X width X 3 view of the canvas
+        buffer; copy it to keep it past the next frame
+        '''
+
+        canvas = self.fig.canvas
+
+        # Full redraw only when there is no valid background yet
+        if self.background is None:
+            canvas.draw()
+        else:
+            canvas.restore_region(self.background)
+
+        for artist in self.copter.artists():
+            self.axes.draw_artist(artist)
 
-        self.fig.canvas.draw()
-        self.fig.canvas.flush_events()
-        buf = np.fromstring(self.fig.canvas.tostring_rgb(), dtype=np.uint8)
-        w, h = self.fig.canvas.get_width_height()
-        buf.shape = w, h, 3
+        return np.asarray(canvas.buffer_rgba())[:, :, :3]
 
-        return np.array(Image.frombytes("RGB", (w, h), buf.tostring()))
+    def _create_vehicle(self, showtraj, traj_length):
+
+        return _Vehicle(self.axes, showtraj, traj_length=traj_length)
 
     def _handle_close(self, event):
 
         self.open = False
 
+    def _handle_draw(self, event):
+
+        self.background = self.fig.canvas.copy_from_bbox(self.fig.bbox)
+
     def _animate(self, _):
 
         try:
@@ -248,12 +413,15 @@ class ThreeDRenderer:
             # Update the copter animation with vehicle pose
             self.display()
 
-            # Draw everything
-            self.fig.canvas.draw()
+            # Keep the frame blitted last time for render()
+            self.frame = np.array(self.fig.canvas.buffer_rgba())[:, :, :3]
 
         except Exception:
             pass
 
+        # Animator will blit these over the background
+        return self.copter.artists()
+
 
 class ThreeDLanderRenderer(ThreeDRenderer):
     '''
@@ -284,12 +452,6 @@ class ThreeDLanderRenderer(ThreeDRenderer):
         self.target_y = np.cos(pts)
         self.target_z = np.zeros(len(self.target_x))
 
-    def display(self):
-
-        ThreeDRenderer.display(self)
-
-        return ThreeDRenderer._complete(self)
-
 
 class ThreeDHoverRenderer(ThreeDRenderer):
 
@@ -302,3 +464,47 @@ class ThreeDHoverRenderer(ThreeDRenderer):
                                 viewangles=viewangles,
                                 outfile=outfile,
                                 view_width=view_width)
+
+
+class ThreeDPopulationRenderer(ThreeDLanderRenderer):
+    '''
+    Displays a whole population of vehicles (e.g., a NEAT generation or a
+    batch of DRL evaluation episodes) in one figure, colored by fitness.
+
+    The source object plays the role of the environment, providing a V X 6
+    array of vehicle poses as source.poses, their fitnesses (or None) as
+    source.fitness, and source.done.
+    '''
+
+    def __init__(self, source, viewangles=None, outfile=None, view_width=1,
+                 cmap='viridis', fitness_range=None):
+        '''
+        @param source object providing poses, fitness, done, TARGET_RADIUS
+        @param cmap name of matplotlib colormap for fitness
+        @param fitness_range (lo, hi) fitnesses for the ends of the colormap
+                             (default = current min, max)
+        '''
+
+        self.cmap = cmap
+        self.fitness_range = fitness_range
+
+        ThreeDLanderRenderer.__init__(self,
+                                      source,
+                                      viewangles=viewangles,
+                                      outfile=outfile,
+                                      view_width=view_width)
+
+        self.axes.set_title('Population')
+
+    def display(self):
+
+        if self.env.done:
+            self.close()
+
+        self.copter.update(self.env.poses,
+                           self.env.fitness,
+                           self.fitness_range)
+
+    def _create_vehicle(self, showtraj, traj_length):
+
+        return _Population(self.axes, self.cmap)
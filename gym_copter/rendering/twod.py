@@ -6,9 +6,9 @@ Copyright (C) 2020 Simon D. Levy
 MIT License
 '''
 
-from gym.envs.classic_control import rendering
-import Box2D
-from Box2D.b2 import fixtureDef, polygonShape
+import numpy as np
+
+from gym_copter.rendering.raster import make_viewer
 
 
 class TwoDRenderer:
@@ -43,51 +43,50 @@ class TwoDRenderer:
     PROP_COLOR = 0.0, 0.0, 0.0
     OUTLINE_COLOR = 0.0, 0.0, 0.0
 
-    def __init__(self, env):
+    def __init__(self, env, backend='gl'):
+        '''
+        @param env environment to display
+        @param backend 'gl' or 'software' (see rendering.raster.make_viewer)
+        '''
 
         env = env.unwrapped
         self.env = env
         self.env.viewer = self
 
-        self.viewer = rendering.Viewer(self.VIEWPORT_W, self.VIEWPORT_H)
+        self.viewer = make_viewer(self.VIEWPORT_W, self.VIEWPORT_H, backend)
         self.viewer.set_bounds(0,
                                self.VIEWPORT_W/self.SCALE,
                                0,
                                self.VIEWPORT_H/self.SCALE)
-        self.world = Box2D.b2World()
-
-        self.lander = self.world.CreateDynamicBody(
-
-                fixtures=[
 
-                    fixtureDef(shape=polygonShape(vertices=[(x/self.SCALE,
-                                                             y/self.SCALE)
-                                                            for x, y in poly]),
-                               density=0.0)
-
-                    for poly in [self.HULL_POLY,
-                                 self._leg_poly(-1),
-                                 self._leg_poly(+1),
-                                 self._motor_poly(+1),
-                                 self._motor_poly(-1),
-                                 self._blade_poly(+1, -1),
-                                 self._blade_poly(+1, +1),
-                                 self._blade_poly(-1, -1),
-                                 self._blade_poly(-1, +1)]
-                    ]
-                )
+        # Vehicle polygons in body coordinates, as one array of vertices so
+        # we can place them all with a single rotation per frame
+        polys = [np.array(poly) / self.SCALE
+                 for poly in [self.HULL_POLY,
+                              self._leg_poly(-1),
+                              self._leg_poly(+1),
+                              self._motor_poly(+1),
+                              self._motor_poly(-1),
+                              self._blade_poly(+1, -1),
+                              self._blade_poly(+1, +1),
+                              self._blade_poly(-1, -1),
+                              self._blade_poly(-1, +1)]]
+        self.vertices = np.concatenate(polys)
+        self.splits = np.cumsum([len(poly) for poly in polys])[:-1]
 
         # By showing props periodically, we can emulate prop rotation
         self.props_visible = 0
 
     def close(self):
         self.viewer.close()
-        self.world.DestroyBody(self.lander)
-        self.lander = None
 
     def render(self, mode, pose, spinning):
 
-        print(pose)
+        self._draw(pose, spinning)
+
+        return self._complete(mode)
+
+    def _draw(self, pose, spinning):
 
         # Draw ground as background
         self.viewer.draw_polygon(
@@ -105,40 +104,37 @@ class TwoDRenderer:
              (0, self.VIEWPORT_H)],
             color=self.SKY_COLOR)
 
-        # Set copter pose to values from Lander2D.step(), negating for
-        # coordinate conversion
-        self.lander.position = (pose[1] + self.VIEWPORT_W/self.SCALE/2,
-                                -pose[2] + self.GROUND_Z + self.GEAR_HEIGHT)
-        self.lander.angle = -pose[3]
+        # Place copter at pose from Lander2D.step(), negating for coordinate
+        # conversion
+        position = (pose[1] + self.VIEWPORT_W/self.SCALE/2,
+                    -pose[2] + self.GROUND_Z + self.GEAR_HEIGHT)
+        c, s = np.cos(-pose[3]), np.sin(-pose[3])
+        polys = np.split(self.vertices @ np.array([[c, s], [-s, c]]) +
+                         position,
+                         self.splits)
 
         # Draw copter
-        self._show_fixture(1, self.VEHICLE_COLOR)
-        self._show_fixture(2, self.VEHICLE_COLOR)
-        self._show_fixture(0, self.VEHICLE_COLOR)
-        self._show_fixture(3, self.MOTOR_COLOR)
-        self._show_fixture(4, self.MOTOR_COLOR)
+        self._show_poly(polys[1], self.VEHICLE_COLOR)
+        self._show_poly(polys[2], self.VEHICLE_COLOR)
+        self._show_poly(polys[0], self.VEHICLE_COLOR)
+        self._show_poly(polys[3], self.MOTOR_COLOR)
+        self._show_poly(polys[4], self.MOTOR_COLOR)
 
         # Simulate spinning props by alternating show/hide
         if not spinning or self.props_visible:
             for k in range(5, 9):
-                self._show_fixture(k, self.PROP_COLOR)
+                self._show_poly(polys[k], self.PROP_COLOR)
 
         self.props_visible = (not spinning or ((self.props_visible + 1) % 3))
 
-        
-        return self.viewer.render(return_rgb_array=True)
-
     def _complete(self, mode):
 
         return self.viewer.render(return_rgb_array=mode == 'rgb_array')
 
-    def _show_fixture(self, index, color):
-        fixture = self.lander.fixtures[index]
-        trans = fixture.body.transform
-        path = [trans*v for v in fixture.shape.vertices]
-        self.viewer.draw_polygon(path, color=color)
-        path.append(path[0])
-        self.viewer.draw_polyline(path, color=self.OUTLINE_COLOR, linewidth=1)
+    def _show_poly(self, poly, color):
+        self.viewer.draw_polygon(poly, color=color)
+        self.viewer.draw_polyline(np.vstack((poly, poly[:1])),
+                                  color=self.OUTLINE_COLOR, linewidth=1)
 
     def _blade_poly(self, x, w):
         return [
@@ -169,13 +165,13 @@ class TwoDLanderRenderer(TwoDRenderer):
 
     FLAG_COLOR = 0.8, 0.0, 0.0
 
-    def __init__(self, env):
+    def __init__(self, env, backend='gl'):
 
-        TwoDRenderer.__init__(self, env)
+        TwoDRenderer.__init__(self, env, backend)
 
-    def render(self, mode, pose, spinning):
+    def _draw(self, pose, spinning):
 
-        TwoDRenderer.render(self, mode, pose, spinning)
+        TwoDRenderer._draw(self, pose, spinning)
 
         # Draw flags
         for d in [-1, +1]:
@@ -189,5 +185,3 @@ class TwoDLanderRenderer(TwoDRenderer):
                                       (x + 25/self.SCALE,
                                        flagy2-5/self.SCALE)],
                                      color=self.FLAG_COLOR)
-
-        return TwoDRenderer._complete(self, mode)
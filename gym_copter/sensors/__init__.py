@@ -4,4 +4,7 @@ Copyright (C) 2021 Simon D. Levy
 MIT License
 '''
 
+from gym_copter.sensors.rangefinder import Rangefinder  # noqa: F401
+from gym_copter.sensors.rangefinder import Lidar  # noqa: F401
+
 # from gym_copter.sensors import vision  # noqa: F401
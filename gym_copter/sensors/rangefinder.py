@@ -0,0 +1,338 @@
+'''
+Rangefinder and lidar
+
+Both sensors cast rays fixed in the vehicle's body frame and report the
+distance along each ray to the ground, along with whether the ray lands on
+the landing target, a disk drawn on the ground around the origin.  Rays for
+every beam of every vehicle are cast at once: against the flat ground by a
+ray-plane intersection, or against a Terrain by sphere tracing through its
+signed distance field.
+
+Sphere tracing divides each ray's clearance by a bound on the slope of the
+interpolated field (Terrain.lipschitz), which gives a step that cannot cross
+the surface.  Steps are over-relaxed for speed while a ray is more than a
+cell from the ground, and a ray falls back to safe steps as soon as two
+consecutive clearances show that a step may have jumped past the surface.
+Near the surface rays advance by at least a minimum step, and a ray that
+ends up below ground has its crossing refined by false position.
+
+The reported distance is therefore that of the first zero crossing of the
+terrain's distance field along the ray, to within about a millimeter,
+except that dips below ground shorter than the minimum step along the ray
+(grazing contacts) may be passed over.
+
+States are 12-element Dynamics states or N X 12 arrays of them, as from
+BatchDynamics.
+
+Copyright (C) 2021 Simon D. Levy
+
+MIT License
+'''
+
+import numpy as np
+
+# Sphere-tracing step, as a multiple of clearance
+RELAXATION = 1.5
+
+
+def cast(origins, directions, max_range, terrain=None, target_radius=None,
+         min_step=0.01, iterations=None):
+    '''
+    @param origins ... X 3 array of NED ray origins
+    @param directions ... X 3 array of NED unit ray directions
+    @param max_range longest distance reported
+    @param terrain optional Terrain (default = flat ground at Z = 0)
+    @param target_radius radius of the landing target (default = none)
+    @param min_step shortest sphere-tracing step (meters); dips below the
+                    terrain shorter than this along a ray may be missed
+    @param iterations most sphere-tracing steps per ray; rays still
+                      unfinished after these count as hitting nothing
+                      (default = enough for every ray to finish)
+    @return distances (max_range for rays that hit nothing in range),
+            boolean array of rays that hit the target
+    '''
+
+    origins = np.asarray(origins, dtype=float)
+    directions = np.asarray(directions, dtype=float)
+
+    shape = np.broadcast_shapes(origins.shape, directions.shape)
+    o = np.broadcast_to(origins, shape).reshape(-1, 3)
+    d = np.broadcast_to(directions, shape).reshape(-1, 3)
+
+    distances = (_cast_plane(o, d) if terrain is None
+                 else _cast_terrain(o, d, max_range, terrain, min_step,
+                                    iterations))
+
+    hit = distances < max_range
+
+    if target_radius is None:
+        targets = np.zeros(len(o), dtype=bool)
+
+    # The target lies on the ground, so check where the ray lands
+    else:
+        p = o[:, :2] + np.where(hit, distances, 0)[:, None] * d[:, :2]
+        targets = hit & (np.sum(p**2, axis=1) < target_radius**2)
+
+    return (np.minimum(distances, max_range).reshape(shape[:-1]),
+            targets.reshape(shape[:-1]))
+
+
+def _cast_plane(o, d):
+
+    # Only rays heading down (NED) reach the ground
+    down = d[:, 2] > 0
+
+    distances = np.full(len(o), np.inf)
+    distances[down] = np.maximum(-o[down, 2] / d[down, 2], 0)
+
+    # Rays starting at or under the ground hit it at once
+    distances[o[:, 2] >= 0] = 0
+
+    return distances
+
+
+def _cast_terrain(o, d, max_range, terrain, min_step, iterations):
+
+    distances = np.full(len(o), np.inf)
+
+    # Every step but a ray's one fallback advances it by the minimum step
+    # or more, so this many finish every ray
+    if iterations is None:
+        iterations = int(np.ceil(max_range / min_step)) + 2
+
+    # Nothing lies above the top of the distance field, so start rays from
+    # there with a ray-plane intersection
+    above = -o[:, 2] - terrain.top
+    down = d[:, 2] > 0
+    t = np.where(down, np.maximum(above, 0) / np.where(down, d[:, 2], 1), 0)
+
+    # Safe radius (clearance over the field's slope bound) and step taken
+    # at the last point of each ray, and each ray's relaxation
+    radius = np.zeros(len(o))
+    step = np.zeros(len(o))
+    relaxation = np.full(len(o), RELAXATION)
+
+    # Rays whose last step crossed the surface, with the distances and
+    # clearances before and after the crossing
+    crossed = []
+    before = []
+    after = []
+    positive = []
+    negative = []
+
+    index = np.flatnonzero(down | (above < 0))
+
+    for _ in range(iterations):
+
+        p = o[index] + t[index, None] * d[index]
+
+        clearance = terrain.distance(p[:, 0], p[:, 1], p[:, 2])
+
+        r = np.abs(clearance) / terrain.lipschitz
+
+        # If the safe spheres around the last two points don't overlap,
+        # the relaxed step may have jumped a ridge: go back and take the
+        # safe step instead, without relaxation from then on
+        missed = (relaxation[index] > 1) & (r + radius[index] < step[index])
+        i = index[missed]
+        t[i] += radius[i] - step[i]
+        step[i] = radius[i]
+        relaxation[i] = 1
+
+        # Otherwise a ray now below ground crossed the surface on its last
+        # step; where the spheres cover the step, it crossed exactly once
+        below = ~missed & (clearance <= 0)
+        i = index[below]
+        crossed.append(i)
+        before.append(t[i] - step[i])
+        after.append(t[i])
+        positive.append(radius[i] * terrain.lipschitz)
+        negative.append(clearance[below])
+
+        flying = ~missed & ~below
+        i = index[flying]
+        radius[i] = r[flying]
+
+        # Within a cell of the surface, take only safe steps, and creep
+        # along in short ones until the ray either crosses it or pulls away
+        near = clearance[flying] < terrain.resolution
+        step[i] = np.maximum(np.where(near, 1, relaxation[i]) * r[flying],
+                             min_step)
+        t[i] += step[i]
+
+        # Rays above the field and not heading down can hit nothing
+        rising = ~down[i] & (-p[flying, 2] > terrain.top)
+
+        index = np.concatenate((index[missed],
+                                i[(t[i] < max_range) & ~rising]))
+
+        if len(index) == 0:
+            break
+
+    crossed = np.concatenate(crossed)
+    if len(crossed) > 0:
+        distances[crossed] = _refine(o[crossed], d[crossed],
+                                     np.concatenate(before),
+                                     np.concatenate(after),
+                                     np.concatenate(positive),
+                                     np.concatenate(negative),
+                                     terrain)
+
+    return distances
+
+
+def _refine(o, d, lo, hi, flo, fhi, terrain, precision=1e-3,
+            iterations=30):
+
+    # Narrow each bracket around the crossing by false position, halving
+    # the clearance kept at an end that survives twice in a row (the
+    # Illinois method), so that both ends close in
+    index = np.flatnonzero(hi - lo > precision)
+    side = np.zeros(len(o), dtype=int)
+
+    for _ in range(iterations):
+
+        if len(index) == 0:
+            break
+
+        a, b = lo[index], hi[index]
+        fa, fb = flo[index], fhi[index]
+
+        mid = b - fb * (b - a) / (fb - fa)
+        p = o[index] + mid[:, None] * d[index]
+
+        fmid = terrain.distance(p[:, 0], p[:, 1], p[:, 2])
+
+        below = fmid <= 0
+
+        i = index[below]
+        hi[i] = mid[below]
+        fhi[i] = fmid[below]
+        flo[i[side[i] < 0]] /= 2
+        side[i] = -1
+
+        i = index[~below]
+        lo[i] = mid[~below]
+        flo[i] = fmid[~below]
+        fhi[i[side[i] > 0]] /= 2
+        side[i] = +1
+
+        index = index[hi[index] - lo[index] > precision]
+
+    return hi
+
+
+def _body_to_inertial(states):
+
+    phi = states[..., 6]
+    theta = states[..., 8]
+    psi = states[..., 10]
+
+    cph, sph = np.cos(phi), np.sin(phi)
+    cth, sth = np.cos(theta), np.sin(theta)
+    cps, sps = np.cos(psi), np.sin(psi)
+
+    # Transpose of Dynamics._inertialToBody's rotation matrix
+    return np.stack((np.stack((cps*cth,
+                               cps*sph*sth-cph*sps,
+                               sph*sps+cph*cps*sth), axis=-1),
+                     np.stack((cth*sps,
+                               cph*cps+sph*sps*sth,
+                               cph*sps*sth-cps*sph), axis=-1),
+                     np.stack((-sth,
+                               cth*sph,
+                               cph*cth), axis=-1)), axis=-2)
+
+
+class _RaySensor:
+
+    def __init__(self, directions, max_range, terrain, target_radius):
+
+        directions = np.asarray(directions, dtype=float)
+
+        self.directions = directions / np.sqrt(np.sum(directions**2,
+                                                      axis=1,
+                                                      keepdims=True))
+        self.max_range = max_range
+        self.terrain = terrain
+        self.target_radius = target_radius
+
+    def scan(self, states):
+        '''
+        @param states Dynamics state or N X 12 array of states
+        @return distances, boolean target hits: one per beam, for each
+                vehicle
+        '''
+
+        states = np.asarray(states, dtype=float)
+
+        # Rotate beams from body frame to NED: ... X beams X 3
+        directions = np.einsum('...ij,bj->...bi',
+                               _body_to_inertial(states),
+                               self.directions)
+
+        origins = states[..., None, 0:6:2]
+
+        return cast(origins, directions, self.max_range, self.terrain,
+                    self.target_radius)
+
+    def __call__(self, states):
+        '''
+        @param states Dynamics state or N X 12 array of states
+        @return distances, one per beam, for each vehicle
+        '''
+
+        return self.scan(states)[0]
+
+
+class Rangefinder(_RaySensor):
+    '''
+    Single beam pointing down from the body, as for altitude sensing
+    '''
+
+    def __init__(self, max_range=20, terrain=None, target_radius=None):
+        '''
+        @param max_range longest distance reported (meters)
+        @param terrain optional Terrain (default = flat ground)
+        @param target_radius radius of the landing target (default = none)
+        '''
+
+        _RaySensor.__init__(self, [[0, 0, 1]], max_range, terrain,
+                            target_radius)
+
+    def scan(self, states):
+        '''
+        @param states Dynamics state or N X 12 array of states
+        @return distance, boolean target hit for each vehicle
+        '''
+
+        distances, targets = _RaySensor.scan(self, states)
+
+        return distances[..., 0], targets[..., 0]
+
+
+class Lidar(_RaySensor):
+    '''
+    Beams spread evenly around a cone pointing down from the body
+    '''
+
+    def __init__(self, beams=16, angle=30, max_range=20, terrain=None,
+                 target_radius=None):
+        '''
+        @param beams number of beams
+        @param angle angle of the beams from straight down (degrees; 90 for
+                     a horizontal ring)
+        @param max_range longest distance reported (meters)
+        @param terrain optional Terrain (default = flat ground)
+        @param target_radius radius of the landing target (default = none)
+        '''
+
+        azimuths = 2 * np.pi * np.arange(beams) / beams
+        elevation = np.radians(angle)
+
+        directions = np.column_stack((np.sin(elevation) * np.cos(azimuths),
+                                      np.sin(elevation) * np.sin(azimuths),
+                                      np.full(beams, np.cos(elevation))))
+
+        _RaySensor.__init__(self, directions, max_range, terrain,
+                            target_radius)
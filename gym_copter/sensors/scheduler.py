@@ -0,0 +1,109 @@
+'''
+Multi-rate sensor scheduling
+
+Lets each sensor run at its own rate and phase relative to the physics
+update, holding the most recent sample between updates.
+
+Copyright (C) 2021 Simon D. Levy
+
+MIT License
+'''
+
+
+class _Schedule:
+
+    def __init__(self, fun, rate, phase, framesPerSecond):
+
+        self.fun = fun
+
+        # Sample on every physics tick by default
+        self.rate = framesPerSecond if rate is None else rate
+
+        # Convert phase from seconds to physics ticks
+        self.phase = phase * framesPerSecond
+
+        self.fps = framesPerSecond
+
+        self.reset()
+
+    def reset(self):
+
+        self.index = None
+        self.sample = None
+
+    def due(self, tick):
+
+        # Index of the most recent sensor period that began at or before
+        # this tick; a new index means a new sample is due
+        index = int((tick - self.phase) * self.rate // self.fps)
+
+        return index >= 0 and index != self.index, index
+
+
+class SensorScheduler:
+    '''
+    Calls each sensor function only when its next sample is due, so sensor
+    cost scales with the sensor rate rather than the physics rate.
+    '''
+
+    def __init__(self, framesPerSecond):
+        '''
+        @param framesPerSecond physics update rate
+        '''
+
+        self.fps = framesPerSecond
+
+        self.schedules = {}
+
+        self.reset()
+
+    def add(self, name, fun, rate=None, phase=0):
+        '''
+        @param name name for looking up samples
+        @param fun function of no arguments returning a new sample
+        @param rate sensor update rate in Hz (default = physics rate)
+        @param phase delay of first sample (seconds)
+        '''
+
+        if rate is not None and not 0 < rate <= self.fps:
+            raise ValueError('Sensor rate must be in (0, %d] Hz' % self.fps)
+
+        self.schedules[name] = _Schedule(fun, rate, phase, self.fps)
+
+    def reset(self):
+
+        self.tick = 0
+
+        for schedule in self.schedules.values():
+            schedule.reset()
+
+    def update(self):
+        '''
+        Advances one physics tick, sampling any sensors that are due.
+        @return dictionary mapping sensor names to freshness (True if the
+                sensor was sampled on this tick)
+        '''
+
+        fresh = {}
+
+        for name, schedule in self.schedules.items():
+
+            due, index = schedule.due(self.tick)
+
+            if due:
+                schedule.sample = schedule.fun()
+                schedule.index = index
+
+            fresh[name] = due
+
+        self.tick += 1
+
+        return fresh
+
+    def get(self, name):
+        '''
+        @return most recent sample from the named sensor, or None if it has
+                not been sampled yet
+        '''
+
+        return self.schedules[name].sample
@@ -13,18 +13,20 @@ import numpy as np
 import cv2
 
 from gym_copter.sensors.vision.vs import VisionSensor, _make_parser
+from gym_copter.sensors.vision.packing import pack_ternary, unpack_ternary
 
 
 class DVS(VisionSensor):
 
-    def __init__(self, objsize=1, res=128, fov=60):
+    def __init__(self, objsize=1, res=128, fov=60, sink=None):
         '''
         @param size size meters
         @param res resolution in (pixels)
         @param fov field of view (degrees)
+        @param sink frame sink for display_image() (default = window)
         '''
 
-        VisionSensor.__init__(self, objsize, res, winname='DVS')
+        VisionSensor.__init__(self, objsize, res, winname='DVS', sink=sink)
 
         self.image_prev = None
 
@@ -51,6 +53,19 @@ class DVS(VisionSensor):
 
         return image_diff 
 
+    def pack(self, image):
+        '''
+        Pack a -1, 0, +1 event image (or batch of images) at two bits per
+        pixel
+        '''
+        return pack_ternary(image)
+
+    def unpack(self, packed):
+        '''
+        Inverse of pack()
+        '''
+        return unpack_ternary(packed, self.res)
+
     def _process_image(self, image):
 
         # Make a color image with -1 red and +1 green
@@ -88,7 +103,7 @@ def main():
 
         image = dvs.getImage(x, y, z, phi, theta, psi)
 
-        if not dvs.display_image(image, 'Events'):
+        if not dvs.display_image(image):
             break
 
         # Move pose across field of view
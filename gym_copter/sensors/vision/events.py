@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+'''
+Geometry-driven Dynamic Vision Sensor simulation
+
+Instead of differencing rendered frames, we work out analytically when each
+pixel crosses the edge of the landing target as the camera moves between two
+poses.  Events therefore get microsecond timestamps without rendering any
+intermediate images.
+
+For a nadir-pointing pinhole camera with focal length f (pixels) at altitude
+z above a disk of radius R, pixel (u, v) (relative to the image center) sees
+the inside of the disk when
+
+    (u z - f x)^2 + (v z - f y)^2 < (f R)^2
+
+With x, y, z interpolated linearly between poses, the left side is a
+quadratic in the interpolation parameter, so the crossing times are its roots.
+
+Copyright (C) 2021 Simon D. Levy
+
+MIT License
+'''
+
+import numpy as np
+
+from gym_copter.sensors.vision.vs import VisionSensor, _make_parser
+from gym_copter.sensors.vision.dvs import DVS
+
+
+class EventDVS(DVS):
+    '''
+    DVS whose getImage() accumulates the analytically generated events since
+    the previous call instead of differencing frames, so it can stand in for
+    the DVS class (e.g., LanderVisual(vs=EventDVS(res=16))), packing and
+    display included.  The full event stream for the most recent call is
+    available in the events attribute.
+
+    Like the unwarped VisionSensor image, the camera is treated as pointing
+    straight down: Euler angles are accepted but do not affect the events.
+    '''
+
+    EVENT_DTYPE = np.dtype([('t', np.int64),   # microseconds
+                            ('x', np.int16),   # column
+                            ('y', np.int16),   # row
+                            ('p', np.int8)])   # polarity (previous - current)
+
+    def __init__(self, objsize=1, res=128, fov=60, framesPerSecond=100,
+                 refractory=0, sink=None):
+        '''
+        @param objsize object size (meters)
+        @param res resolution in (pixels)
+        @param fov field of view (degrees)
+        @param framesPerSecond rate at which getImage() will be called
+        @param refractory minimum time between events at a pixel (usec)
+        @param sink frame sink for display_image() (default = window)
+        '''
+
+        # DVS's own constructor sets up frame differencing, which we don't
+        # need
+        VisionSensor.__init__(self, objsize, res, fov, winname='EventDVS',
+                              sink=sink)
+
+        self.dt = 1. / framesPerSecond
+        self.refractory = refractory
+
+        # Pixel coordinates relative to the image center, matching the
+        # integer centers used by VisionSensor._locate()
+        cols, rows = np.meshgrid(np.arange(res) - res//2,
+                                 np.arange(res) - res//2)
+        self._u = cols.ravel().astype(float)
+        self._v = rows.ravel().astype(float)
+
+        # Focal length in pixels
+        self._f = res / (2 * np.tan(np.radians(fov/2)))
+
+        self.reset()
+
+    def reset(self):
+
+        self.time = 0
+        self.pose_prev = None
+        self.events = np.zeros(0, dtype=self.EVENT_DTYPE)
+
+        # Time of most recent event at each pixel, for refractory period
+        self._last = np.full(self.res**2, np.iinfo(np.int64).min // 2)
+
+    def getImage(self, x, y, z, phi, theta, psi):
+        '''
+        @param x, y, z position (meters)
+        @param phi, theta, psi Euler angles (degrees)
+        @return -1, 0, +1 image of the events since the previous call
+        '''
+
+        image = np.zeros(self.res**2)
+
+        if self.pose_prev is not None:
+
+            self.events = self.getEvents(self.pose_prev, (x, y, z),
+                                         self.time, self.time + self.dt)
+
+            # Net polarity at each pixel, quantized to -1, 0, +1
+            np.add.at(image, self.events['y'].astype(int) * self.res +
+                      self.events['x'], self.events['p'])
+            image = np.sign(image)
+
+            self.time += self.dt
+
+        self.pose_prev = x, y, z
+
+        return image.reshape((self.res, self.res))
+
+    def getEvents(self, pos0, pos1, t0, t1):
+        '''
+        @param pos0 x, y, z position (meters) at time t0
+        @param pos1 x, y, z position (meters) at time t1
+        @param t0, t1 start and end times (seconds)
+        @return time-sorted array of EVENT_DTYPE events in (t0, t1]
+        '''
+
+        x0, y0, z0 = pos0
+        x1, y1, z1 = pos1
+
+        u, v, f = self._u, self._v, self._f
+
+        # Linear coefficients of the two terms whose squares we sum
+        a0 = u * z0 - f * x0
+        a1 = u * (z1 - z0) - f * (x1 - x0)
+        b0 = v * z0 - f * y0
+        b1 = v * (z1 - z0) - f * (y1 - y0)
+
+        # Quadratic coefficients, per pixel
+        qa = a1**2 + b1**2
+        qb = 2 * (a0*a1 + b0*b1)
+        qc = a0**2 + b0**2 - (f * self.objsize)**2
+
+        # Roots where the sign actually changes; the first (smaller) root of
+        # a convex quadratic always enters the disk, the second leaves it
+        quad = qa > 1e-12
+        disc = np.where(quad, qb**2 - 4*qa*qc, 0)
+        crossing = quad & (disc > 0)
+        sq = np.sqrt(np.where(crossing, disc, 0))
+        den = np.where(crossing, 2*qa, 1)
+        s1 = np.where(crossing, (-qb - sq) / den, np.nan)
+        s2 = np.where(crossing, (-qb + sq) / den, np.nan)
+        p1 = np.full(s1.shape, -1)
+
+        # Degenerate (linear) case, e.g. pure vertical motion at the center
+        linear = ~quad & (np.abs(qb) > 1e-12)
+        s1[linear] = -qc[linear] / qb[linear]
+        p1[linear] = np.where(qb[linear] < 0, -1, +1)
+
+        first = self._emit(s1, p1, t0, t1)
+        second = self._emit(s2, np.ones(s2.shape, dtype=int), t0, t1)
+
+        events = np.concatenate((first, second))
+
+        return events[np.argsort(events['t'], kind='stable')]
+
+    def _emit(self, s, polarity, t0, t1):
+
+        pix = np.where((s > 0) & (s <= 1))[0]
+
+        t = np.round(1e6 * (t0 + s[pix] * (t1 - t0))).astype(np.int64)
+
+        # Enforce refractory period
+        keep = t - self._last[pix] >= self.refractory
+        pix, t = pix[keep], t[keep]
+        self._last[pix] = t
+
+        events = np.zeros(len(pix), dtype=self.EVENT_DTYPE)
+        events['t'] = t
+        events['x'] = pix % self.res
+        events['y'] = pix // self.res
+        events['p'] = polarity[pix]
+
+        return events
+
+# End of EventDVS class -------------------------------------------------
+
+
+def main():
+
+    XRANGE = 4
+    SPEED = .02
+
+    parser = _make_parser()
+    args = parser.parse_args()
+
+    dvs = EventDVS(args.objsize, args.res, args.fov)
+
+    # Arbitrary stating pose
+    x, y, z, phi, theta, psi = -XRANGE, 0, 10, 0, 0, 0
+
+    dx = +1
+
+    while True:
+
+        image = dvs.getImage(x, y, z, phi, theta, psi)
+
+        if not dvs.display_image(image):
+            break
+
+        # Move pose across field of view
+        x += dx * SPEED
+
+        if x <= -XRANGE:
+            dx = +1
+
+        if x >= XRANGE:
+            dx = -1
+
+
+if __name__ == '__main__':
+
+    main()
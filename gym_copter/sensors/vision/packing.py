@@ -0,0 +1,97 @@
+'''
+Compact storage for vision-sensor images
+
+VisionSensor images are binary and DVS images are ternary, so we pack them
+into uint8 at one and two bits per pixel, respectively.  All functions work
+on a single image or on a batch of images (any number of leading axes).
+
+Copyright (C) 2021 Simon D. Levy
+
+MIT License
+'''
+
+import numpy as np
+
+# Two-bit codes for -1, 0, +1 DVS values, and lookup table to invert them
+_TERNARY_CODES = {0: 0, +1: 1, -1: 2}
+_TERNARY_VALUES = np.array([0, +1, -1, 0], dtype=np.int8)
+
+# Bit shifts for four two-bit codes per byte, most significant first
+_SHIFTS = np.array([6, 4, 2, 0], dtype=np.uint8)
+
+
+def pack_binary(images):
+    '''
+    @param images array of shape (..., res, res) with values 0, 1
+    @return uint8 array of shape (..., ceil(res*res/8))
+    '''
+
+    images = np.asarray(images)
+    flat = images.reshape(images.shape[:-2] + (-1,))
+
+    return np.packbits(flat > 0, axis=-1)
+
+
+def unpack_binary(packed, res):
+    '''
+    @param packed uint8 array produced by pack_binary
+    @param res image resolution (pixels)
+    @return float array of shape (..., res, res) with values 0, 1
+    '''
+
+    _check_size(packed, -(-res*res // 8), res)
+
+    flat = np.unpackbits(packed, axis=-1, count=res*res)
+
+    return flat.reshape(packed.shape[:-1] + (res, res)).astype(float)
+
+
+def pack_ternary(images):
+    '''
+    @param images array of shape (..., res, res) with values -1, 0, +1
+    @return uint8 array of shape (..., ceil(res*res/4))
+    '''
+
+    images = np.asarray(images)
+    flat = images.reshape(images.shape[:-2] + (-1,))
+
+    # Map -1, 0, +1 to codes 2, 0, 1
+    codes = np.zeros(flat.shape, dtype=np.uint8)
+    codes[flat > 0] = _TERNARY_CODES[+1]
+    codes[flat < 0] = _TERNARY_CODES[-1]
+
+    # Pad to a whole number of bytes
+    pad = -codes.shape[-1] % 4
+    if pad:
+        codes = np.concatenate((codes,
+                                np.zeros(codes.shape[:-1] + (pad,),
+                                         dtype=np.uint8)), axis=-1)
+
+    quads = codes.reshape(codes.shape[:-1] + (-1, 4))
+
+    return np.bitwise_or.reduce(quads << _SHIFTS, axis=-1).astype(np.uint8)
+
+
+def unpack_ternary(packed, res):
+    '''
+    @param packed uint8 array produced by pack_ternary
+    @param res image resolution (pixels)
+    @return float array of shape (..., res, res) with values -1, 0, +1
+    '''
+
+    _check_size(packed, -(-res*res // 4), res)
+
+    codes = (packed[..., None] >> _SHIFTS) & 3
+    flat = codes.reshape(packed.shape[:-1] + (-1,))[..., :res*res]
+
+    return (_TERNARY_VALUES[flat]
+            .reshape(packed.shape[:-1] + (res, res))
+            .astype(float))
+
+
+def _check_size(packed, size, res):
+
+    # A mismatch would silently scramble the image
+    if packed.shape[-1] != size:
+        raise ValueError('%d packed bytes do not hold a %dx%d image' %
+                         (packed.shape[-1], res, res))
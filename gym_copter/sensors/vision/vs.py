@@ -14,14 +14,19 @@ from argparse import ArgumentDefaultsHelpFormatter
 import numpy as np
 import cv2
 
+from gym_copter.sensors.vision.packing import pack_binary, unpack_binary
+from gym_copter.rendering.sinks import WindowSink
+
 
 class VisionSensor(object):
 
-    def __init__(self, objsize=1, res=128, fov=60, winname='Vision'):
+    def __init__(self, objsize=1, res=128, fov=60, winname='Vision',
+                 sink=None):
         '''
         @param size size meters
         @param res resolution in (pixels)
         @param fov field of view (degrees)
+        @param sink frame sink for display_image() (default = window)
         '''
 
         self.objsize = objsize
@@ -30,6 +35,8 @@ class VisionSensor(object):
 
         self.window_name = winname + (': %dx%d' % (res, res))
 
+        self.sink = WindowSink(self.window_name) if sink is None else sink
+
     def getImage(self, x, y, z, phi, theta, psi):
         '''
         @param x, y, z position (meters)
@@ -60,19 +67,37 @@ class VisionSensor(object):
         warped[warped < 0.5] = 0
         warped[warped > 0.5] = 1
 
-        # Remove margin introduced by warping
-        margin = (warped.shape[0] - image.shape[0]) // 2
-        return warped[margin:-margin, margin:-margin]
+        # Remove margin introduced by warping, keeping exactly res X res
+        # pixels even when the margins are uneven
+        margin = (warped.shape[0] - self.res) // 2
+        warped = warped[margin:margin+self.res, margin:margin+self.res]
+
+        assert warped.shape == (self.res, self.res)
+
+        return warped
+
+    def display_image(self, image, display_size=None):
+        '''
+        Send the image to the frame sink
+        @param display_size window width and height in pixels, for a window
+                            sink (default = sink's own)
+        @return False if the sink wants to stop
+        '''
+        if display_size is not None and isinstance(self.sink, WindowSink):
+            self.sink.display_size = display_size
+        return self.sink.write(self._process_image(image))
+
+    def pack(self, image):
+        '''
+        Bit-pack a binary image (or batch of images) into uint8
+        '''
+        return pack_binary(image)
 
-    def display_image(self, image, display_size=400):
+    def unpack(self, packed):
         '''
-        Scale up and display the image
+        Inverse of pack()
         '''
-        image = cv2.resize(image, ((display_size, )*2), interpolation=cv2.INTER_NEAREST)
-        image = self._process_image(image)
-        cv2.imshow(self.window_name, image)
-        cv2.moveWindow(self.window_name, 725, 0);
-        return cv2.waitKey(10) != 27  # ESC
+        return unpack_binary(packed, self.res)
 
     def _process_image(self, image):
 
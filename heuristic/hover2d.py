@@ -13,6 +13,8 @@ import numpy as np
 import gym
 from gym import wrappers
 
+from gym_copter.data.recorder import make_recorder
+
 from parsing import make_parser
 from pidcontrollers import AngularVelocityPidController
 from pidcontrollers import PositionHoldPidController
@@ -35,7 +37,7 @@ def heuristic(state, rate_pid, pos_pid, alt_pid):
     return hover_todo-phi_todo, hover_todo+phi_todo
 
 
-def demo_heuristic(env, seed=None, csvfilename=None):
+def demo_heuristic(env, seed=None, savefilename=None):
 
     env.seed(seed)
     np.random.seed(seed)
@@ -52,12 +54,9 @@ def demo_heuristic(env, seed=None, csvfilename=None):
 
     actsize = env.action_space.shape[0]
 
-    csvfile = None
-    if csvfilename is not None:
-        csvfile = open(csvfilename, 'w')
-        csvfile.write('t,' + ','.join([('m%d' % k)
-                                      for k in range(1, actsize+1)]))
-        csvfile.write(',' + ','.join(env.STATE_NAMES) + '\n')
+    recorder = None
+    if savefilename is not None:
+        recorder = make_recorder(savefilename, actsize, env.STATE_NAMES)
 
     while True:
 
@@ -65,13 +64,8 @@ def demo_heuristic(env, seed=None, csvfilename=None):
         state, reward, done, _ = env.step(action)
         total_reward += reward
 
-        if csvfile is not None:
-
-            csvfile.write('%f' % (dt * steps))
-
-            csvfile.write((',%f' * actsize) % tuple(action))
-
-            csvfile.write(((',%f' * len(state)) + '\n') % tuple(state))
+        if recorder is not None:
+            recorder.append(dt * steps, action, state)
 
         steps += 1
 
@@ -84,8 +78,8 @@ def demo_heuristic(env, seed=None, csvfilename=None):
 
     sleep(1)
     env.close()
-    if csvfile is not None:
-        csvfile.close()
+    if recorder is not None:
+        recorder.close()
     return total_reward
 
 
@@ -99,7 +93,7 @@ def main():
 
     env = wrappers.Monitor(env, 'movie/', force=True)
 
-    demo_heuristic(env, seed=args.seed, csvfilename=args.csvfilename)
+    demo_heuristic(env, seed=args.seed, savefilename=args.savefilename)
 
     env.close()
 
@@ -19,7 +19,8 @@ def make_parser():
     parser.add_argument('--nopid', action='store_true',
                         help='Turn off lateral PID control')
 
-    parser.add_argument('--save', dest='csvfilename',
-                        help='Save trajectory in CSV file')
+    parser.add_argument('--save', dest='savefilename',
+                        help='Save trajectory in .csv (text) or .traj '
+                             '(binary) file')
 
     return parser
@@ -13,11 +13,13 @@ from setuptools import setup
 setup(
     name='gym_copter',
     version='0.1',
-    install_requires=['gym', 'numpy', 'Box2D', 'opencv-python'],
+    install_requires=['gym', 'numpy', 'opencv-python'],
     description='Gym environment for multicopters',
     packages=['gym_copter',
+              'gym_copter.data',
               'gym_copter.dynamics',
               'gym_copter.envs',
+              'gym_copter.policies',
               'gym_copter.rendering',
               'gym_copter.pidcontrollers',
               'gym_copter.sensors',
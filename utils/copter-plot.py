@@ -9,38 +9,25 @@ MIT License
 
 import argparse
 from argparse import ArgumentDefaultsHelpFormatter
+import os
 import numpy as np
 import matplotlib.pyplot as plt
 
 from gym_copter.envs.lander import _Lander
+from gym_copter.data.recorder import open_trajectory
+from gym_copter.data.downsample import downsample, METHODS
+from gym_copter.data.quantiles import P2Quantiles
 
+# Median and 5-95% band for directory mode
+QUANTILES = 0.05, 0.5, 0.95
 
-def main():
-
-    parser = argparse.ArgumentParser(
-            formatter_class=ArgumentDefaultsHelpFormatter)
-
-    parser.add_argument('csvfile', metavar='CSVFILE', help='input .csv file')
-
-    parser.add_argument('--title', required=False, default=None,
-                        help='Figure title (defaults to filename)')
-
-    parser.add_argument('--time', type=float, default=8,
-                        help='Time axis limit')
 
-    parser.add_argument('--dzlim', type=float, default=15,
-                        help='Axis limit for dZ/dt')
-
-    args = parser.parse_args()
-
-    data = None
+def load_csv(filename):
+    '''
+    @return t, z, dz, motors
+    '''
 
-    try:
-        data = np.genfromtxt(args.csvfile, delimiter=',')
-
-    except Exception as e:
-        print('Unable to open file %s: %s' % (args.csvfile + str(e)))
-        exit(1)
+    data = np.genfromtxt(filename, delimiter=',')
 
     cols = data.shape[1]
     is3d = cols > 9
@@ -60,25 +47,161 @@ def main():
     z = data[:, zcol]
     dz = data[:, zcol+1]
 
+    m = 4 if is3d else 2
+    motors = data[:, 0:m].T
+
+    return t, z, dz, motors
+
+
+def load_binary(filename):
+    '''
+    @return t, z, dz, motors as memory-mapped columns
+    '''
+
+    names, data = open_trajectory(filename)
+
+    def column(name):
+        return data[:, names.index(name)]
+
+    motors = [column(name)
+              for name in names
+              if name[0] == 'm' and name[1:].isdigit()]
+
+    return column('t'), column('Z'), column('dZ'), motors
+
+
+def load(filename):
+
+    return (load_csv(filename)
+            if filename.lower().endswith('.csv')
+            else load_binary(filename))
+
+
+def plot(ax, t, y, points, method, sign=1):
+
+    # Only plot as many points as the screen can show
+    keep = downsample(t, y, points, method)
+
+    ax.plot(t[keep], sign * y[keep])
+
+
+def plot_run(axs, args, points):
+
+    try:
+        t, z, dz, motors = load(args.logfile)
+
+    except Exception as e:
+        print('Unable to open file %s: %s' % (args.logfile, str(e)))
+        exit(1)
+
+    # Only the visible part of the run gets the screen's points, plus one
+    # more so the line reaches the edge
+    end = np.searchsorted(t, args.time, side='right') + 1
+    t, z, dz = t[:end], z[:end], dz[:end]
+    motors = [motor[:end] for motor in motors]
+
+    plot(axs[0], t, z, points, args.downsample, -1)  # adjust for NED
+
+    plot(axs[1], t, dz, points, args.downsample, -1)
+
+    for motor in motors:
+        plot(axs[2], t, motor, points, args.downsample)
+
+    return len(motors)
+
+
+def plot_runs(axs, args, points):
+    '''
+    Plots median and 5-95% bands over all logs in a directory, reading one
+    log at a time
+    '''
+
+    filenames = sorted(os.path.join(args.logfile, name)
+                       for name in os.listdir(args.logfile)
+                       if os.path.splitext(name)[1].lower() in
+                       ('.csv', '.traj'))
+
+    grid = np.linspace(0, args.time, points)
+
+    estimator = None
+
+    for filename in filenames:
+
+        try:
+            t, z, dz, motors = load(filename)
+
+        except Exception as e:
+            print('Skipping %s: %s' % (filename, str(e)))
+            continue
+
+        # Resample onto the common grid, leaving NaN past the end of the run
+        series = np.array([np.interp(grid, t, y, right=np.nan)
+                           for y in [z, dz] + list(motors)])
+        series[:2] *= -1  # adjust for NED
+
+        if estimator is None:
+            estimator = P2Quantiles(QUANTILES, series.shape)
+
+        estimator.update(series)
+
+    if estimator is None:
+        print('No logs found in %s' % args.logfile)
+        exit(1)
+
+    lo, median, hi = estimator.quantiles()
+
+    for k in range(len(median)):
+        ax = axs[min(k, 2)]
+        line, = ax.plot(grid, median[k])
+        ax.fill_between(grid, lo[k], hi[k],
+                        color=line.get_color(), alpha=0.3)
+
+    return len(median) - 2
+
+
+def main():
+
+    parser = argparse.ArgumentParser(
+            formatter_class=ArgumentDefaultsHelpFormatter)
+
+    parser.add_argument('logfile', metavar='LOGFILE',
+                        help='input .csv or .traj file, or directory of '
+                             'them for median and 5-95%% bands')
+
+    parser.add_argument('--title', required=False, default=None,
+                        help='Figure title (defaults to filename)')
+
+    parser.add_argument('--time', type=float, default=8,
+                        help='Time axis limit')
+
+    parser.add_argument('--dzlim', type=float, default=15,
+                        help='Axis limit for dZ/dt')
+
+    parser.add_argument('--downsample', choices=METHODS, default='minmax',
+                        help='Method for reducing points to screen width')
+
+    args = parser.parse_args()
+
     fig, axs = plt.subplots(3, 1, constrained_layout=True)
 
-    axs[0].plot(t, -z)  # adjust for NED
+    # One point per horizontal pixel
+    points = int(fig.get_size_inches()[0] * fig.dpi)
+
+    m = (plot_runs(axs, args, points)
+         if os.path.isdir(args.logfile)
+         else plot_run(axs, args, points))
+
     axs[0].set_ylabel('Z (m)')
 
-    fig.suptitle(args.csvfile if args.title is None else args.title,
+    fig.suptitle(args.logfile if args.title is None else args.title,
                  fontsize=16)
 
-    axs[1].plot(t, -dz)
     axs[1].set_ylim((-args.dzlim, 0))
     axs[1].set_ylabel('dZ/dt (m/s)')
 
-    m = 4 if is3d else 2
-    motors = data[:, 0:m]
-    for k in range(m):
-        axs[2].plot(t, motors[:, k])
     axs[2].set_ylabel('Motors')
     axs[2].set_ylim((0, 1))
-    axs[2].legend([('m%d' % (k+1)) for k in range(m)])
+    axs[2].legend(axs[2].get_lines(), [('m%d' % (k+1)) for k in range(m)])
 
     axs[2].set_xlabel('Time (s)')
 
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+'''
+Script for rendering saved gym-copter trajectories to video files
+
+Copyright (C) 2021 Simon D. Levy
+
+MIT License
+'''
+
+import argparse
+from argparse import ArgumentDefaultsHelpFormatter
+import os
+from time import time
+
+from gym_copter.rendering.offline import render_video, DISPLAYS
+
+
+def main():
+
+    parser = argparse.ArgumentParser(
+            formatter_class=ArgumentDefaultsHelpFormatter)
+
+    parser.add_argument('logfiles', metavar='LOGFILE', nargs='+',
+                        help='input .csv or .traj file(s) saved with --save')
+
+    parser.add_argument('--display', choices=DISPLAYS, default='3d',
+                        help='Kind of display to render')
+
+    parser.add_argument('--view', required=False, default='30,120',
+                        help='Elevation, azimuth for 3D view perspective')
+
+    parser.add_argument('--fps', type=int, default=25,
+                        help='Video frame rate')
+
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Number of worker processes (defaults to CPUs)')
+
+    parser.add_argument('--chunk', type=int, default=50,
+                        help='Frames rendered per worker task')
+
+    parser.add_argument('--outdir', default='.',
+                        help='Directory for output .mp4 files')
+
+    args = parser.parse_args()
+
+    viewangles = tuple((int(s) for s in args.view.split(',')))
+
+    for logfile in args.logfiles:
+
+        base = os.path.splitext(os.path.basename(logfile))[0]
+        outfile = os.path.join(args.outdir,
+                               '%s-%s.mp4' % (base, args.display))
+
+        start = time()
+
+        frames = render_video(logfile, outfile,
+                              display=args.display,
+                              fps=args.fps,
+                              workers=args.workers,
+                              chunk=args.chunk,
+                              viewangles=viewangles)
+
+        print('%s: %d frames in %3.2f sec' % (outfile, frames, time()-start))
+
+
+if __name__ == '__main__':
+    main()